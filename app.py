@@ -1,196 +1,285 @@
 import streamlit as st
-from src.mcq_generator import generate_mcqs
-from src.ui_components import display_mcqs
+from src.api.backends import get_backend
+from src.jobs import CANCELLED, DONE, FAILED, QUEUED, get_job_queue, start_job_workers
+from src.mcq_generator import get_response_cache
+from src.mcq_parser import format_mcqs
+from src.question_bank import get_question_bank
+from src.ui_components import display_mcqs, display_mcqs_stream
+from src.utils.text_processing import STOPWORDS_PATH, load_stopwords as read_stopwords
 
+# Questions from the page go ahead of queued batch work
+UI_JOB_PRIORITY = 10
+
+# Process-wide resources: built on the first run of any session, shared by all reruns
+@st.cache_resource
 def load_stopwords():
-    with open("data/nepali_stopwords.txt", "r", encoding="utf-8") as f:
-        return set(line.strip() for line in f if line.strip())
+    return read_stopwords(STOPWORDS_PATH)
 
-def apply_custom_css():
-    st.markdown("""
-    <style>
-    /* Import Google Fonts */
-    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700&display=swap');
-    
-    /* Main app styling */
-    .stApp {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        font-family: 'Poppins', sans-serif;
-    }
-    
-    /* Remove default padding */
-    .stApp > div:first-child > div:first-child > div:first-child {
-        padding-top: 1rem;
-    }
-    
-    /* Container styling */
-    .content-container {
-        background: rgba(255, 255, 255, 0.95);
-        padding: 2rem;
-        border-radius: 20px;
-        box-shadow: 0 20px 40px rgba(0, 0, 0, 0.1);
-        backdrop-filter: blur(10px);
-        margin: 1rem 0;
-        animation: fadeInUp 0.8s ease-out;
-    }
-    
-    @keyframes fadeInUp {
-        from {
-            opacity: 0;
-            transform: translateY(30px);
-        }
-        to {
-            opacity: 1;
-            transform: translateY(0);
-        }
-    }
-    
-    @keyframes slideInDown {
-        from {
-            opacity: 0;
-            transform: translateY(-50px);
-        }
-        to {
-            opacity: 1;
-            transform: translateY(0);
-        }
-    }
-    
-    @keyframes fadeIn {
-        from { opacity: 0; }
-        to { opacity: 1; }
-    }
-    
-    /* Button styling */
-    .stButton > button {
-        background: linear-gradient(45deg, #667eea, #764ba2);
-        color: white;
-        border: none;
-        border-radius: 25px;
-        padding: 0.75rem 2rem;
-        font-size: 1.1rem;
-        font-weight: 600;
-        font-family: 'Poppins', sans-serif;
-        transition: all 0.3s ease;
-        box-shadow: 0 8px 25px rgba(102, 126, 234, 0.3);
-        text-transform: uppercase;
-        letter-spacing: 1px;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 12px 35px rgba(102, 126, 234, 0.4);
-        background: linear-gradient(45deg, #764ba2, #667eea);
+@st.cache_resource
+def warm_backend():
+    """Build the generation backend (importing its SDK) and open the response cache and question bank once per process"""
+    return get_backend(), get_response_cache(), get_question_bank()
+
+@st.cache_resource
+def job_queue():
+    """Start the generation workers once per process and return their queue"""
+    start_job_workers()
+    return get_job_queue()
+
+# Page-wide styles; question fragments rerun without resending them
+APP_CSS = """
+<style>
+/* Import Google Fonts */
+@import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700&display=swap');
+
+/* Main app styling */
+.stApp {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    font-family: 'Poppins', sans-serif;
+}
+
+/* Remove default padding */
+.stApp > div:first-child > div:first-child > div:first-child {
+    padding-top: 1rem;
+}
+
+/* Container styling */
+.content-container {
+    background: rgba(255, 255, 255, 0.95);
+    padding: 2rem;
+    border-radius: 20px;
+    box-shadow: 0 20px 40px rgba(0, 0, 0, 0.1);
+    backdrop-filter: blur(10px);
+    margin: 1rem 0;
+    animation: fadeInUp 0.8s ease-out;
+}
+
+@keyframes fadeInUp {
+    from {
+        opacity: 0;
+        transform: translateY(30px);
     }
-    
-    .stButton > button:active {
+    to {
+        opacity: 1;
         transform: translateY(0);
     }
-    
-    /* Back button styling */
-    .back-button > button {
-        background: linear-gradient(45deg, #ff6b6b, #ffa726);
-        color: white;
-        border: none;
-        border-radius: 20px;
-        padding: 0.5rem 1.5rem;
-        font-size: 1rem;
-        font-weight: 500;
-        transition: all 0.3s ease;
-        box-shadow: 0 6px 20px rgba(255, 107, 107, 0.3);
-    }
-    
-    .back-button > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 8px 25px rgba(255, 107, 107, 0.4);
-    }
-    
-    /* Text area styling */
-    .stTextArea > div > div > textarea {
-        border-radius: 15px;
-        border: 2px solid #e9ecef !important;
-        padding: 1rem !important;
-        font-size: 1rem !important;
-        font-family: 'Poppins', sans-serif !important;
-        transition: all 0.3s ease;
-        background: white !important;
-        color: #2c3e50 !important;
-        line-height: 1.6 !important;
-    }
-    
-    .stTextArea > div > div > textarea:focus {
-        border-color: #667eea !important;
-        box-shadow: 0 0 20px rgba(102, 126, 234, 0.2) !important;
-        background: white !important;
-        color: #2c3e50 !important;
-    }
-    
-    .stTextArea > div > div > textarea::placeholder {
-        color: #7f8c8d !important;
-        opacity: 0.8 !important;
-    }
-    
-    /* Text area label styling */
-    .stTextArea > label {
-        color: #2c3e50 !important;
-        font-weight: 600 !important;
-        font-size: 1.1rem !important;
-        margin-bottom: 0.5rem !important;
-    }
-    
-    /* Text area container */
-    .stTextArea {
-        background: white;
-        padding: 1rem;
-        border-radius: 15px;
-        margin: 1rem 0;
-        box-shadow: 0 5px 15px rgba(0, 0, 0, 0.1);
-    }
-    
-    /* Progress and caption styling */
-    .stProgress > div > div {
-        background: linear-gradient(90deg, #667eea, #764ba2) !important;
-    }
-    
-    .stCaption {
-        color: #7f8c8d !important;
-        text-align: center;
-        font-weight: 500;
-    }
-    
-    /* Warning and success messages */
-    .stAlert {
-        border-radius: 15px;
-        animation: slideInLeft 0.5s ease-out;
+}
+
+@keyframes slideInDown {
+    from {
+        opacity: 0;
+        transform: translateY(-50px);
     }
-    
-    @keyframes slideInLeft {
-        from {
-            opacity: 0;
-            transform: translateX(-50px);
-        }
-        to {
-            opacity: 1;
-            transform: translateX(0);
-        }
+    to {
+        opacity: 1;
+        transform: translateY(0);
     }
-    
-    /* Spinner customization */
-    .stSpinner > div {
-        border-top-color: #667eea !important;
+}
+
+@keyframes fadeIn {
+    from { opacity: 0; }
+    to { opacity: 1; }
+}
+
+/* Button styling */
+.stButton > button {
+    background: linear-gradient(45deg, #667eea, #764ba2);
+    color: white;
+    border: none;
+    border-radius: 25px;
+    padding: 0.75rem 2rem;
+    font-size: 1.1rem;
+    font-weight: 600;
+    font-family: 'Poppins', sans-serif;
+    transition: all 0.3s ease;
+    box-shadow: 0 8px 25px rgba(102, 126, 234, 0.3);
+    text-transform: uppercase;
+    letter-spacing: 1px;
+}
+
+.stButton > button:hover {
+    transform: translateY(-2px);
+    box-shadow: 0 12px 35px rgba(102, 126, 234, 0.4);
+    background: linear-gradient(45deg, #764ba2, #667eea);
+}
+
+.stButton > button:active {
+    transform: translateY(0);
+}
+
+/* Back button styling */
+.back-button > button {
+    background: linear-gradient(45deg, #ff6b6b, #ffa726);
+    color: white;
+    border: none;
+    border-radius: 20px;
+    padding: 0.5rem 1.5rem;
+    font-size: 1rem;
+    font-weight: 500;
+    transition: all 0.3s ease;
+    box-shadow: 0 6px 20px rgba(255, 107, 107, 0.3);
+}
+
+.back-button > button:hover {
+    transform: translateY(-2px);
+    box-shadow: 0 8px 25px rgba(255, 107, 107, 0.4);
+}
+
+/* Text area styling */
+.stTextArea > div > div > textarea {
+    border-radius: 15px;
+    border: 2px solid #e9ecef !important;
+    padding: 1rem !important;
+    font-size: 1rem !important;
+    font-family: 'Poppins', sans-serif !important;
+    transition: all 0.3s ease;
+    background: white !important;
+    color: #2c3e50 !important;
+    line-height: 1.6 !important;
+}
+
+.stTextArea > div > div > textarea:focus {
+    border-color: #667eea !important;
+    box-shadow: 0 0 20px rgba(102, 126, 234, 0.2) !important;
+    background: white !important;
+    color: #2c3e50 !important;
+}
+
+.stTextArea > div > div > textarea::placeholder {
+    color: #7f8c8d !important;
+    opacity: 0.8 !important;
+}
+
+/* Text area label styling */
+.stTextArea > label {
+    color: #2c3e50 !important;
+    font-weight: 600 !important;
+    font-size: 1.1rem !important;
+    margin-bottom: 0.5rem !important;
+}
+
+/* Text area container */
+.stTextArea {
+    background: white;
+    padding: 1rem;
+    border-radius: 15px;
+    margin: 1rem 0;
+    box-shadow: 0 5px 15px rgba(0, 0, 0, 0.1);
+}
+
+/* Progress and caption styling */
+.stProgress > div > div {
+    background: linear-gradient(90deg, #667eea, #764ba2) !important;
+}
+
+.stCaption {
+    color: #7f8c8d !important;
+    text-align: center;
+    font-weight: 500;
+}
+
+/* Warning and success messages */
+.stAlert {
+    border-radius: 15px;
+    animation: slideInLeft 0.5s ease-out;
+}
+
+@keyframes slideInLeft {
+    from {
+        opacity: 0;
+        transform: translateX(-50px);
     }
-    
-    /* Hide Streamlit branding */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-    
-    /* Smooth transitions for all elements */
-    * {
-        transition: all 0.3s ease;
+    to {
+        opacity: 1;
+        transform: translateX(0);
     }
-    </style>
-    """, unsafe_allow_html=True)
+}
+
+/* Spinner customization */
+.stSpinner > div {
+    border-top-color: #667eea !important;
+}
+
+/* Hide Streamlit branding */
+#MainMenu {visibility: hidden;}
+footer {visibility: hidden;}
+header {visibility: hidden;}
+
+/* Smooth transitions for all elements */
+* {
+    transition: all 0.3s ease;
+}
+</style>
+"""
+
+def apply_custom_css():
+    st.markdown(APP_CSS, unsafe_allow_html=True)
+
+def reset_quiz():
+    """Forget the current job and quiz so the input form shows again"""
+    st.session_state.mcq_generated = False
+    st.session_state.mcq_text = ""
+    st.session_state.mcq_items = []
+    # Clear other session states
+    for key in ("job_id", "user_answers", "show_results", "correct_answers"):
+        if key in st.session_state:
+            del st.session_state[key]
+    st.query_params.pop("job", None)
+
+def show_back_button():
+    st.markdown('<div class="back-button">', unsafe_allow_html=True)
+    if st.button("← नयाँ पाठ राख्नुहोस्"):
+        reset_quiz()
+        st.rerun()
+    st.markdown('</div>', unsafe_allow_html=True)
+
+def job_questions(job_id, status):
+    """Each question of the job as it is saved, with ``status`` showing progress"""
+    shown = 0
+    # The workers run in this process, so every saved question wakes the watch at once
+    for job in job_queue().watch(job_id):
+        if job.status == QUEUED:
+            status.info(" लाइनमा पर्खँदै... कृपया पर्खनुहोस्।")
+        else:
+            status.info(f" MCQs बनाउँदै... ({len(job.mcqs)}/{job.max_questions})")
+        yield from job.mcqs[shown:]
+        shown = len(job.mcqs)
+
+def job_progress(job_id):
+    """Stream the job's questions until it finishes, then rerun into its result"""
+    status = st.empty()
+    # Drawn first: clicking it reruns the script, which stops the stream below
+    if st.button("रद्द गर्नुहोस्", key="cancel_job"):
+        job_queue().cancel(job_id)
+        st.rerun()
+    display_mcqs_stream(job_questions(job_id, status))
+    st.rerun()
+
+def show_job(job_id):
+    """Wait on a submitted job; its questions become the quiz once it is done"""
+    job = job_queue().get(job_id)
+    if job is None:
+        st.warning("यो काम भेटिएन। कृपया फेरि प्रयास गर्नुहोस्।")
+        show_back_button()
+    elif job.status == DONE and not job.mcqs:
+        st.warning("यो पाठबाट प्रश्न बन्न सकेनन्। कृपया अर्को पाठ प्रयास गर्नुहोस्।")
+        show_back_button()
+    elif job.status == DONE:
+        st.session_state.mcq_text = format_mcqs(job.mcqs)
+        # Parsed once per generation; reruns reuse the records
+        st.session_state.mcq_items = job.mcqs
+        st.session_state.mcq_generated = True
+        st.rerun()
+    elif job.status == FAILED:
+        st.error("API सेवामा समस्या भएको छ। कृपया API key जाँच गर्नुहोस् वा पछि प्रयास गर्नुहोस्।")
+        with st.expander("Error Details"):
+            st.text(f"❌ Error: {job.error}")
+        show_back_button()
+    elif job.status == CANCELLED:
+        st.info("प्रश्न बनाउने काम रद्द गरियो।")
+        show_back_button()
+    else:
+        job_progress(job_id)
 
 def main():
     st.set_page_config(
@@ -220,28 +309,25 @@ def main():
         st.session_state.mcq_generated = False
     if 'mcq_text' not in st.session_state:
         st.session_state.mcq_text = ""
+    if 'mcq_items' not in st.session_state:
+        st.session_state.mcq_items = []
+    
+    # A refreshed or reconnected page finds its job again through the URL
+    if 'job_id' not in st.session_state and "job" in st.query_params:
+        st.session_state.job_id = st.query_params["job"]
     
-    stopwords = load_stopwords()
+    load_stopwords()
+    warm_backend()
     
     # Check if MCQs are already generated
     if st.session_state.mcq_generated and st.session_state.mcq_text:
         # Show back button with custom styling
-        st.markdown('<div class="back-button">', unsafe_allow_html=True)
-        if st.button("← नयाँ पाठ राख्नुहोस्"):
-            st.session_state.mcq_generated = False
-            st.session_state.mcq_text = ""
-            # Clear other session states
-            if 'user_answers' in st.session_state:
-                del st.session_state.user_answers
-            if 'show_results' in st.session_state:
-                del st.session_state.show_results
-            if 'correct_answers' in st.session_state:
-                del st.session_state.correct_answers
-            st.rerun()
-        st.markdown('</div>', unsafe_allow_html=True)
+        show_back_button()
         
         # Display MCQs
-        display_mcqs(st.session_state.mcq_text)
+        display_mcqs(st.session_state.mcq_items)
+    elif 'job_id' in st.session_state:
+        show_job(st.session_state.job_id)
     else:
         # Show input form with enhanced styling in a white container
         st.markdown("""
@@ -279,15 +365,20 @@ def main():
                 st.success(f" तयार! {char_count} अक्षरहरू")
             st.markdown('</div>', unsafe_allow_html=True)
 
+        fast_mode = st.toggle(
+            "⚡ छिटो मोड (स्थानीय, API बिना)",
+            help="पाठबाटै खाली ठाउँ भर्ने प्रश्नहरू तुरुन्तै बनाउँछ",
+        )
+
         if st.button(" MCQ बनाउनुहोस्"):
             if not text or len(text) < 50:
                 st.warning(" कृपया ५० वा बढी अक्षरहरू भएको पाठ राख्नुहोस्।")
             else:
-                with st.spinner(" MCQs बनाउँदै... कृपया पर्खनुहोस्।"):
-                    mcq_text = generate_mcqs(text, stopwords, max_questions=5)
-                    st.session_state.mcq_text = mcq_text
-                    st.session_state.mcq_generated = True
-                    st.rerun()
+                # Generated by the job workers; this run only records the job id
+                job_id = job_queue().submit(text, max_questions=5, priority=UI_JOB_PRIORITY, fast=fast_mode)
+                st.session_state.job_id = job_id
+                st.query_params["job"] = job_id
+                st.rerun()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,53 @@
+"""Track the cold-start cost of importing the generation pipeline.
+
+Each module is imported in a fresh interpreter (so nothing is cached) and the
+best of several runs is reported, together with any heavy third-party
+packages the import dragged in.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_import
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["src.utils.text_processing", "src.mcq_parser", "src.api.openai_client", "src.local_generator", "src.mcq_generator"]
+HEAVY = ("streamlit", "google.generativeai", "nltk", "dotenv", "numpy")
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = sorted(name for name in {heavy!r} if name in sys.modules)
+print(elapsed, ",".join(heavy))
+"""
+
+
+def measure(module, runs=5):
+    """Best-of-``runs`` import time in seconds plus heavy modules pulled in"""
+    best = None
+    heavy = ""
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.split()
+        elapsed = float(out[0])
+        heavy = out[1] if len(out) > 1 else ""
+        best = elapsed if best is None else min(best, elapsed)
+    return best, heavy
+
+
+def main():
+    print(f"{'module':<28} {'import ms':>10}  heavy modules loaded")
+    for module in MODULES:
+        elapsed, heavy = measure(module)
+        print(f"{module:<28} {elapsed * 1e3:>10.1f}  {heavy or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Throughput of the Nepali normalizer against the original clean_text.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_normalizer
+"""
+
+import random
+import re
+import time
+
+from src.utils.normalizer import iter_normalized, normalize_text
+
+WORDS = ["नेपाल", "काठमाडौं", "हिमाल", "सगरमाथा", "क़लम", "विद्यालय", "२०८०", "1990", "को", "मा", "ले", "छ", "थियो"]
+NOISE = ["‍", "‌", "|", "  ", "\n", "abc", "(", ")", "।।"]
+
+
+def legacy_clean_text(text):
+    """clean_text as it was before the normalizer"""
+    text = re.sub(r'[^ऀ-ःक-हअ-औऔ-०-९\s।,.]', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def make_text(size, seed=0):
+    """Roughly ``size`` characters of noisy Nepali prose"""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS) if rng.random() > 0.1 else rng.choice(NOISE)
+        parts.append(word)
+        parts.append("। " if rng.random() < 0.1 else " ")
+        length += len(word) + 1
+    return "".join(parts)
+
+
+def throughput(func, text, runs=3):
+    """Best MB/s over ``runs`` calls"""
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(text.encode("utf-8")) / best / 1e6
+
+
+def main():
+    print(f"{'input':>8} {'legacy MB/s':>12} {'normalize MB/s':>15} {'streaming MB/s':>15}")
+    for size in (10_000, 1_000_000, 10_000_000):
+        text = make_text(size)
+        chunked = lambda t: "".join(iter_normalized(t[i:i + (1 << 20)] for i in range(0, len(t), 1 << 20)))
+        print(
+            f"{size // 1000:>6}KB {throughput(legacy_clean_text, text):>12.1f} "
+            f"{throughput(normalize_text, text):>15.1f} {throughput(chunked, text):>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Benchmark the single-pass MCQ parser against the old regex cascade.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_parser
+"""
+
+import re
+import timeit
+
+from src.mcq_parser import format_mcqs, parse_mcqs, MCQ
+
+
+def make_output(n_questions):
+    """Model-style output with ``n_questions`` numbered Nepali MCQs"""
+    mcqs = [
+        MCQ(
+            f"नेपालको इतिहासमा घटना नम्बर {i} कहिले भएको थियो?",
+            [f"विकल्प {i} क", f"विकल्प {i} ख", f"विकल्प {i} ग", f"विकल्प {i} घ"],
+            i % 4,
+            (0, 0),
+        )
+        for i in range(n_questions)
+    ]
+    return format_mcqs(mcqs)
+
+
+def legacy_parse(mcq_text):
+    """What display_mcqs used to do on every rerun (first cascade pattern only)"""
+    blocks = re.split(r'\n?\s*[१२३४५६७८९०]+\.\s*', mcq_text)
+    parsed = []
+    for block in [b.strip() for b in blocks if b.strip()]:
+        lines = [line.strip() for line in block.split('\n') if line.strip()]
+        question_idx = 0
+        for j, line in enumerate(lines):
+            if '?' in line or '।' in line or not re.match(r'^[कखगघ]\)', line):
+                question_idx = j
+                break
+        options = []
+        for line in lines[question_idx + 1:]:
+            match = re.match(r'^([कखगघ])\)?\s*(.+)', line.strip())
+            if match and not match.group(2).startswith('सही उत्तर'):
+                options.append(match.group(2).strip())
+        answer = block.split("सही उत्तर:")[1].strip().split('\n')[0].strip()
+        parsed.append((lines[question_idx], options, {'क': 0, 'ख': 1, 'ग': 2, 'घ': 3}.get(answer, 0)))
+    return parsed
+
+
+def main():
+    print(f"{'questions':>10} {'bytes':>9} {'legacy ms':>10} {'parser ms':>10} {'speedup':>8}")
+    for n in (50, 200, 500, 1000):
+        text = make_output(n)
+        assert len(parse_mcqs(text)) == n
+        runs = max(3, 2000 // n)
+        legacy = min(timeit.repeat(lambda: legacy_parse(text), number=runs, repeat=3)) / runs
+        parser = min(timeit.repeat(lambda: parse_mcqs(text), number=runs, repeat=3)) / runs
+        print(f"{n:>10} {len(text.encode('utf-8')):>9} {legacy * 1e3:>10.2f} {parser * 1e3:>10.2f} {legacy / parser:>7.1f}x")
+    # Since the parse now happens once per generation, a Streamlit rerun does none of this work
+
+
+if __name__ == "__main__":
+    main()
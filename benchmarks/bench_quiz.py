@@ -0,0 +1,80 @@
+"""Per-interaction latency of the quiz view.
+
+Renders a quiz of synthetic questions with Streamlit's ``AppTest`` and
+times what one click costs: a full script rerun (what every radio change
+and "check answer" click used to trigger) against rerunning a single
+question fragment plus the score panel (what they trigger now).
+
+Run from the repository root::
+
+    python -m benchmarks.bench_quiz --questions 50
+"""
+
+import argparse
+import statistics
+import time
+
+from streamlit.testing.v1 import AppTest
+
+
+def quiz_app(n_questions):
+    """The quiz page as ``app.py`` shows it after generation"""
+    import streamlit as st
+
+    from app import apply_custom_css
+    from benchmarks.synthetic import make_mcqs
+    from src.ui_components import display_mcqs
+
+    if "mcq_items" not in st.session_state:
+        st.session_state.mcq_items = make_mcqs(n_questions)
+    apply_custom_css()
+    display_mcqs(st.session_state.mcq_items)
+
+
+def question_app(n_questions):
+    """What a fragment rerun draws: one question and the score panel"""
+    import streamlit as st
+
+    from benchmarks.synthetic import make_mcqs
+    from src.ui_components import _question_fragment, show_score
+
+    if "mcq_items" not in st.session_state:
+        st.session_state.mcq_items = make_mcqs(n_questions)
+        st.session_state.user_answers = {}
+        st.session_state.show_results = {}
+        st.session_state.correct_answers = set()
+    i = n_questions // 2
+    score_slot = st.empty()
+    _question_fragment(i, st.session_state.mcq_items[i - 1], score_slot, n_questions)
+    show_score(score_slot, n_questions)
+
+
+def time_clicks(app, n_questions, clicks):
+    """Seconds per rerun caused by clicking the middle question's check button"""
+    at = AppTest.from_function(app, args=(n_questions,), default_timeout=60)
+    at.run()
+    key = f"btn{n_questions // 2}"
+    samples = []
+    for _ in range(clicks):
+        start = time.perf_counter()
+        at.button(key).click().run()
+        samples.append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--clicks", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    for label, app in (("full rerun", quiz_app), ("question fragment", question_app)):
+        samples = time_clicks(app, args.questions, args.clicks)
+        print(f"{label:>18}: median {statistics.median(samples) * 1e3:7.1f} ms  "
+              f"max {max(samples) * 1e3:7.1f} ms  ({args.clicks} clicks, {args.questions} questions)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Micro-benchmarks of text processing and parsing on synthetic input from 1 KB to 10 MB.
+
+Each case runs on deterministic text from ``benchmarks.synthetic``, the best
+of several timed runs is kept, and results are written as JSON. Save a
+baseline once, then compare later runs against it; cases that got slower
+than ``--threshold`` are listed and the exit status is 1::
+
+    python -m benchmarks.bench_suite --save-baseline
+    python -m benchmarks.bench_suite                      # compare with benchmarks/baseline.json
+    python -m benchmarks.bench_suite --max-size 1MB --only clean_text parse_mcqs -o run.json
+
+Baselines are machine-specific; compare runs from the same machine.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+from benchmarks.synthetic import SIZES, make_mcq_json, make_mcq_output, make_mcqs, make_text
+from src.mcq_parser import MCQParser, parse_mcqs
+from src.mcq_schema import parse_json_mcqs
+from src.utils.grounding import GroundingVerifier
+from src.utils.normalizer import iter_normalized
+from src.utils.text_processing import (
+    chunk_sentences,
+    clean_text,
+    get_tokenizer,
+    load_stopwords,
+    remove_stopwords,
+    split_sentences,
+    tokenize,
+)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# Keep repeating small cases until at least this much time has been measured
+MIN_MEASURE_SECONDS = 0.2
+STREAM_PIECE = 64
+GROUNDING_QUESTIONS = 100
+
+
+def _parse_streaming(text):
+    """The parser as ``stream_mcqs`` drives it, fed in small pieces"""
+    parser = MCQParser()
+    for i in range(0, len(text), STREAM_PIECE):
+        parser.feed(text[i:i + STREAM_PIECE])
+    return parser.close()
+
+
+def _cases():
+    """Name, input kind and function of every case"""
+    stopwords = load_stopwords()
+    # Shared, as in the app, so its word memo is warm after the first call
+    tokenizer = get_tokenizer(stopwords)
+    questions = make_mcqs(GROUNDING_QUESTIONS)
+    return [
+        ("clean_text", "raw", clean_text),
+        ("clean_text_chunked", "raw", lambda t: "".join(iter_normalized(
+            t[i:i + (1 << 16)] for i in range(0, len(t), 1 << 16)))),
+        ("split_sentences", "cleaned", split_sentences),
+        ("tokenize", "cleaned", tokenize),
+        ("remove_stopwords", "cleaned", lambda t: remove_stopwords(t, stopwords)),
+        # Per-sentence content words: the regex path against the streaming tokenizer
+        ("sentence_words_regex", "cleaned",
+         lambda t: [[w for w in tokenize(s) if w not in stopwords] for s in split_sentences(t)]),
+        ("sentence_terms", "cleaned", lambda t: [terms for _, terms in tokenizer.sentence_terms(t)]),
+        ("iter_tokens", "cleaned", lambda t: sum(1 for _ in tokenizer.iter_tokens(t))),
+        ("chunk_sentences", "sentences", lambda s: chunk_sentences(s, 2000)),
+        ("parse_mcqs", "mcq", parse_mcqs),
+        ("parse_mcqs_streaming", "mcq", _parse_streaming),
+        ("parse_json_mcqs", "mcq_json", parse_json_mcqs),
+        # Index the passage and check a full quiz against it, as every generation does
+        ("ground_mcqs", "cleaned", lambda t: GroundingVerifier(t, stopwords).verify(questions)),
+    ]
+
+
+def _inputs(kind, size, cache):
+    key = (kind, size)
+    if key not in cache:
+        if kind == "raw":
+            cache[key] = make_text(size)
+        elif kind == "cleaned":
+            cache[key] = clean_text(_inputs("raw", size, cache))
+        elif kind == "sentences":
+            cache[key] = split_sentences(_inputs("cleaned", size, cache))
+        elif kind == "mcq_json":
+            cache[key] = make_mcq_json(size)
+        else:
+            cache[key] = make_mcq_output(size)
+    return cache[key]
+
+
+def measure(func, arg, runs=5):
+    """Best seconds per call over ``runs`` rounds, each repeated until it is measurable"""
+    start = time.perf_counter()
+    func(arg)
+    once = time.perf_counter() - start
+    repeat = max(1, int(MIN_MEASURE_SECONDS / runs / max(once, 1e-9)))
+    best = once
+    for _ in range(runs - 1 if repeat == 1 else runs):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func(arg)
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best
+
+
+def run_suite(sizes=SIZES, only=None, runs=5, log=None):
+    """Results keyed ``"case/size"`` with seconds per call and input MB/s"""
+    results = {}
+    cache = {}
+    for name, kind, func in _cases():
+        if only and name not in only:
+            continue
+        for label, size in sizes.items():
+            arg = _inputs(kind, size, cache)
+            seconds = measure(func, arg, runs)
+            # Throughput is against the nominal size so every case of a size is comparable
+            results[f"{name}/{label}"] = {"seconds": seconds, "mb_per_s": size / seconds / 1e6}
+            if log:
+                print(f"{name + '/' + label:>32}: {seconds * 1e3:10.3f} ms  {size / seconds / 1e6:8.1f} MB/s",
+                      file=log)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """``(case, baseline seconds, new seconds, ratio)`` for every case in both runs, slowest change first"""
+    rows = []
+    for case, result in results.items():
+        before = baseline.get(case)
+        if before and before["seconds"]:
+            rows.append((case, before["seconds"], result["seconds"], result["seconds"] / before["seconds"]))
+    rows.sort(key=lambda row: row[3], reverse=True)
+    regressions = [row for row in rows if row[3] > 1 + threshold]
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", help="write this run's JSON here")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown ratio reported as a regression")
+    parser.add_argument("--max-size", default="10MB", choices=list(SIZES))
+    parser.add_argument("--only", nargs="+", help="case names to run")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    labels = list(SIZES)
+    sizes = {label: SIZES[label] for label in labels[:labels.index(args.max_size) + 1]}
+    results = run_suite(sizes, args.only, args.runs, log=sys.stderr)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline saved to {args.baseline}", file=sys.stderr)
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; rerun with --save-baseline", file=sys.stderr)
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    rows, regressions = compare(results, baseline, args.threshold)
+    print(f"{'case':>32} {'baseline ms':>12} {'now ms':>10} {'change':>8}")
+    for case, before, after, ratio in rows:
+        flag = "  <-- slower" if ratio > 1 + args.threshold else ""
+        print(f"{case:>32} {before * 1e3:12.3f} {after * 1e3:10.3f} {ratio - 1:+8.0%}{flag}")
+    if regressions:
+        print(f"{len(regressions)} case(s) more than {args.threshold:.0%} slower than the baseline", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
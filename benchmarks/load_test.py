@@ -0,0 +1,150 @@
+"""Throughput and tail latency of the generation pipeline against a fake model.
+
+Everything except the real model runs: cleaning, the response cache (off by
+default), the client's concurrency limit, rate limiter and retries, and
+parsing. Use the in-process fake or start the HTTP stand-in for a run that
+also crosses a socket::
+
+    python -m benchmarks.load_test --requests 500 --concurrency 50
+    python -m benchmarks.load_test --http --error-rate 0.05 --stream
+    python -m benchmarks.load_test --json --invalid-item-rate 0.1
+    python -m benchmarks.load_test --pool 3 --degraded --stream
+"""
+
+import argparse
+import asyncio
+import time
+
+from src.api.backends import set_backend
+from src.api.exceptions import MCQGenerationError
+from src.api.fake_backend import FakeBackend, FakeBehaviour, FakeModel
+from src.api.fake_server import http_backend, start_server
+from src.api.pool import BackendPool, Endpoint
+from src.mcq_generator import agenerate_mcqs
+from src.mcq_parser import MCQParser, parse_mcqs
+from src.utils.metrics import snapshot, stage_summary
+from src.utils.text_processing import clean_text
+
+PASSAGE = (
+    "सगरमाथा संसारको सबैभन्दा अग्लो हिमाल हो। यो नेपालको सोलुखुम्बु जिल्लामा पर्छ। "
+    "तेन्जिङ नोर्गे शेर्पा र एडमन्ड हिलारीले सन् १९५३ मा पहिलो पटक सगरमाथा आरोहण गरेका थिए। "
+    "नेपालमा आठ हजार मिटरभन्दा अग्ला आठ वटा हिमाल छन्। "
+)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+async def one_request(backend, i, stream, max_questions):
+    """Latency until the first and the last question of one generation"""
+    text = clean_text(PASSAGE + f" पाठ {i}।")
+    start = time.perf_counter()
+    if not stream:
+        mcqs = parse_mcqs(await agenerate_mcqs(text, max_questions, use_cache=False, fallback=False, use_bank=False))
+        elapsed = time.perf_counter() - start
+        return elapsed, elapsed, len(mcqs)
+    parser = MCQParser()
+    first = None
+    count = 0
+    async for piece in backend.stream(text, max_questions):
+        count += len(parser.feed(piece))
+        if count and first is None:
+            first = time.perf_counter() - start
+    count += len(parser.close())
+    elapsed = time.perf_counter() - start
+    return first or elapsed, elapsed, count
+
+
+async def run(backend, requests, concurrency, stream, max_questions):
+    slots = asyncio.Semaphore(concurrency)
+    firsts, totals, failures = [], [], 0
+
+    async def worker(i):
+        nonlocal failures
+        async with slots:
+            try:
+                first, total, _ = await one_request(backend, i, stream, max_questions)
+            except MCQGenerationError:
+                failures += 1
+                return
+        firsts.append(first)
+        totals.append(total)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(requests)))
+    return time.perf_counter() - start, firsts, totals, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--max-questions", type=int, default=5)
+    parser.add_argument("--latency-median", type=float, default=0.3)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--stream", action="store_true", help="measure time to first question too")
+    parser.add_argument("--http", action="store_true", help="go through the local HTTP stand-in")
+    parser.add_argument("--json", action="store_true", help="use JSON output mode with partial repair")
+    parser.add_argument("--invalid-item-rate", type=float, default=0.0, help="malformed JSON items")
+    parser.add_argument("--pool", type=int, default=0, help="spread calls over this many fake endpoints")
+    parser.add_argument("--degraded", action="store_true", help="make the first pool endpoint slow and flaky")
+    parser.add_argument("--no-hedge", action="store_true", help="pool without hedged requests")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    def make_backend(number=0):
+        degraded = args.degraded and number == 0
+        behaviour = FakeBehaviour(
+            latency_median=args.latency_median * (4 if degraded else 1),
+            latency_sigma=args.latency_sigma,
+            error_rate=0.3 if degraded else args.error_rate,
+            seed=args.seed + number,
+            invalid_item_rate=args.invalid_item_rate,
+        )
+        if args.http:
+            server = start_server(behaviour=behaviour)
+            return http_backend(f"http://127.0.0.1:{server.server_address[1]}", output_format=output_format,
+                                max_retries=1 if args.pool else 4)
+        # Pool endpoints fail over instead of retrying, as in client_for
+        return FakeBackend(FakeModel(behaviour), output_format=output_format, max_retries=1 if args.pool else 4)
+
+    output_format = "json" if args.json else "text"
+    if args.pool:
+        endpoints = [Endpoint(f"fake-{i}", make_backend(i)) for i in range(args.pool)]
+        backend = BackendPool(endpoints, hedge=not args.no_hedge)
+    else:
+        backend = make_backend()
+    set_backend(backend)
+
+    elapsed, firsts, totals, failures = backend.run(
+        run(backend, args.requests, args.concurrency, args.stream, args.max_questions)
+    )
+    print(f"{len(totals)} ok, {failures} failed in {elapsed:.2f}s "
+          f"({len(totals) / elapsed:.1f} req/s, concurrency {args.concurrency})")
+    if totals:
+        for label, values in (("first question", firsts), ("full response", totals)):
+            print(f"{label:>15}: p50 {percentile(values, 50) * 1e3:.0f} ms  "
+                  f"p95 {percentile(values, 95) * 1e3:.0f} ms  p99 {percentile(values, 99) * 1e3:.0f} ms")
+    if args.json:
+        counts = {"valid": 0, "invalid": 0, "repairs": 0}
+        for counter in snapshot()["counters"]:
+            if counter["name"] == "mcq_json_items_total":
+                counts[counter["labels"]["result"]] += counter["value"]
+            elif counter["name"] == "mcq_json_repairs_total":
+                counts["repairs"] += counter["value"]
+        print(f"JSON items: {counts['valid']} valid, {counts['invalid']} invalid, {counts['repairs']} repair calls")
+    if args.pool:
+        for stats in backend.stats():
+            print(f"{stats['endpoint']:>15}: {stats['calls']} calls, {stats['error_rate']:.0%} errors, "
+                  f"{stats['state']}, {stats['hedges']} hedges ({stats['hedge_wins']} won), "
+                  f"p50 {stats['generate_p50_ms'] or stats['stream_p50_ms']} ms  "
+                  f"p99 {stats['generate_p99_ms'] or stats['stream_p99_ms']} ms")
+    for stage, summary in stage_summary().items():
+        print(f"{stage:>15}: {summary['count']} spans, mean {summary['mean_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
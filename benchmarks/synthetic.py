@@ -0,0 +1,122 @@
+"""Deterministic synthetic Nepali text and model output for benchmarks.
+
+Words are built from Devanagari syllables (consonant, optional conjunct with
+virama, vowel sign, occasional anusvara/chandrabindu) followed by common
+postpositions, so the character mix, word lengths and punctuation resemble
+real prose. A small share of noise (zero-width joiners, nukta letters, Latin
+runs, Arabic digits, stray brackets) keeps the normalizer honest. The same
+``size`` and ``seed`` always give the same string, on any machine.
+"""
+
+import json
+import random
+
+from src.mcq_parser import MCQ, OPTION_LETTERS, format_mcqs
+
+CONSONANTS = "कखगघचछजझटठडढणतथदधनपफबभमयरलवशषसह"
+VOWELS = "अआइईउएओ"
+VOWEL_SIGNS = ["", "", "ा", "ि", "ी", "ु", "ू", "े", "ै", "ो", "ौ"]
+VIRAMA = "्"
+MARKS = ["ं", "ँ"]
+POSTPOSITIONS = ["को", "का", "की", "मा", "ले", "लाई", "बाट", "देखि", "सम्म", "सँग", "भन्दा"]
+VERBS = ["छ", "हो", "थियो", "छन्", "गरेका थिए", "भएको छ", "गरिन्छ", "पर्छ"]
+NOISE = ["‍", "‌", "क़", "ज़", "abc", "(", ")", "1990", "२०८०", "  ", "\n", "|"]
+
+SIZES = {"1KB": 1_000, "10KB": 10_000, "100KB": 100_000, "1MB": 1_000_000, "10MB": 10_000_000}
+
+
+def make_word(rng):
+    """One to four syllables of Devanagari"""
+    parts = []
+    for i in range(rng.choice((1, 2, 2, 3, 3, 4))):
+        if i == 0 and rng.random() < 0.15:
+            parts.append(rng.choice(VOWELS))
+            continue
+        parts.append(rng.choice(CONSONANTS))
+        if rng.random() < 0.12:
+            parts.append(VIRAMA + rng.choice(CONSONANTS))
+        parts.append(rng.choice(VOWEL_SIGNS))
+        if rng.random() < 0.05:
+            parts.append(rng.choice(MARKS))
+    return "".join(parts)
+
+
+def make_vocabulary(size=5000, seed=0):
+    """``size`` distinct-ish words; a small vocabulary gives realistic repetition"""
+    rng = random.Random(seed)
+    return [make_word(rng) for _ in range(size)]
+
+
+def make_sentence(rng, vocabulary):
+    words = []
+    for _ in range(rng.randint(5, 18)):
+        # Zipf-like: low indexes are much more frequent
+        word = vocabulary[min(int(rng.paretovariate(1.1)) - 1, len(vocabulary) - 1)]
+        if rng.random() < 0.3:
+            word += rng.choice(POSTPOSITIONS)
+        words.append(word)
+        if rng.random() < 0.03:
+            words.append(rng.choice(NOISE))
+    words.append(rng.choice(VERBS))
+    return " ".join(words) + ("?" if rng.random() < 0.05 else "।")
+
+
+def make_text(size, seed=0):
+    """About ``size`` UTF-8 bytes of noisy Nepali prose, in paragraphs"""
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(seed=seed)
+    parts = []
+    length = 0
+    while length < size:
+        sentence = make_sentence(rng, vocabulary)
+        parts.append(sentence)
+        parts.append("\n\n" if rng.random() < 0.1 else " ")
+        length += len(sentence.encode("utf-8")) + 1
+    return "".join(parts)
+
+
+def make_mcqs(n_questions, seed=0):
+    """``n_questions`` MCQ records with synthetic Nepali questions and options"""
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(seed=seed)
+    mcqs = []
+    for _ in range(n_questions):
+        question = make_sentence(rng, vocabulary).rstrip("।?") + " के हो?"
+        options = [" ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, 3))) for _ in OPTION_LETTERS]
+        mcqs.append(MCQ(question, options, rng.randrange(len(options)), (0, 0)))
+    return mcqs
+
+
+def make_mcq_output(size, seed=0):
+    """About ``size`` bytes of model-style MCQ text, with some of the markup models add"""
+    rng = random.Random(seed)
+    blocks = []
+    length = 0
+    batch = 0
+    while length < size:
+        block = format_mcqs(make_mcqs(20, seed + batch))
+        batch += 1
+        if rng.random() < 0.3:
+            # Markdown bold and "प्रश्न" prefixes, as models sometimes write them
+            block = block.replace("सही उत्तर:", "**सही उत्तर:**").replace("\n\n", "\n\nप्रश्न ")
+        blocks.append(block)
+        length += len(block.encode("utf-8")) + 2
+    return "\n\n".join(blocks)
+
+
+def make_mcq_json(size, seed=0):
+    """About ``size`` bytes of a JSON-mode answer, the same questions as ``make_mcq_output``"""
+    rng = random.Random(seed)
+    items = []
+    length = 2
+    batch = 0
+    while length < size:
+        for mcq in make_mcqs(20, seed + batch):
+            item = {"question": mcq.question, "options": mcq.options, "answer": OPTION_LETTERS[mcq.correct_index]}
+            if rng.random() < 0.02:
+                # A dropped option, as models occasionally send
+                item["options"] = mcq.options[:3]
+            items.append(item)
+            length += len(json.dumps(item, ensure_ascii=False).encode("utf-8")) + 2
+        batch += 1
+    return json.dumps(items, ensure_ascii=False, indent=1)
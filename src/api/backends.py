@@ -0,0 +1,159 @@
+import asyncio
+import os
+import queue
+import threading
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _ensure_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_loop.run_forever, name="mcq-backend-loop", daemon=True)
+            thread.start()
+        return _loop
+
+
+def run_coroutine(coro):
+    """Run a coroutine on the process-wide backend loop and wait for its result.
+
+    Streamlit sessions each run in their own thread; sending every call
+    through one loop is what lets concurrency and rate limits hold across
+    sessions.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _ensure_loop()).result()
+
+
+def iter_async(agen):
+    """Iterate an async generator on the backend loop from synchronous code"""
+    items = queue.Queue()
+    finished = object()
+
+    async def pump():
+        try:
+            async for item in agen:
+                items.put(item)
+        finally:
+            items.put(finished)
+
+    future = asyncio.run_coroutine_threadsafe(pump(), _ensure_loop())
+    try:
+        while True:
+            item = items.get()
+            if item is finished:
+                break
+            yield item
+        # Re-raises whatever ended the stream early
+        future.result()
+    finally:
+        future.cancel()
+
+
+class GenerationBackend:
+    """Interface for anything that turns a cleaned passage into MCQ text.
+
+    Subclasses implement ``generate`` and may override ``stream``; failures
+    are raised as ``MCQGenerationError`` subclasses. ``model_name`` and
+    ``output_format`` (the prompt variant, "text" or "json") are part of the
+    response-cache key, so backends must not share them unless their output
+    is interchangeable. Backends with ``stores_questions`` unset
+    (stand-ins, the local generator) never add to the question bank.
+    """
+
+    name = "base"
+    model_name = "base"
+    output_format = "text"
+    stores_questions = True
+
+    async def generate(self, text, max_questions=5, timeout=None):
+        raise NotImplementedError
+
+    async def stream(self, text, max_questions=5, timeout=None):
+        """Yield the MCQ text in pieces; backends without streaming yield it whole"""
+        yield await self.generate(text, max_questions, timeout)
+
+    def run(self, coro):
+        return run_coroutine(coro)
+
+    def iter_sync(self, agen):
+        return iter_async(agen)
+
+    def generate_sync(self, text, max_questions=5, timeout=None):
+        """Blocking wrapper around ``generate`` for synchronous callers"""
+        return run_coroutine(self.generate(text, max_questions, timeout))
+
+    def stream_sync(self, text, max_questions=5, timeout=None):
+        """Blocking iterator over ``stream`` for synchronous callers"""
+        return iter_async(self.stream(text, max_questions, timeout))
+
+
+def _gemini_backend(spec):
+    from src.api.openai_client import get_client
+    return get_client()
+
+
+def _fake_backend(spec):
+    from src.api.fake_backend import FakeBackend
+    return FakeBackend(output_format=os.getenv("GEMINI_OUTPUT_FORMAT", "text"))
+
+
+def _local_backend(spec):
+    from src.api.local_backend import get_local_backend
+    return get_local_backend()
+
+
+def _pool_backend(spec):
+    from src.api.pool import gemini_pool
+    return gemini_pool()
+
+
+def _http_backend(spec):
+    from src.api.fake_server import http_backend
+    return http_backend(spec, output_format=os.getenv("GEMINI_OUTPUT_FORMAT", "text"))
+
+
+# MCQ_BACKEND values; anything starting with http:// is a stand-in server URL,
+# "pool:SPEC,SPEC,..." a pool over other specs
+BACKEND_FACTORIES = {
+    "gemini": _gemini_backend,
+    "fake": _fake_backend,
+    "local": _local_backend,
+    "pool": _pool_backend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(spec):
+    """Build a backend from an ``MCQ_BACKEND`` style spec"""
+    if spec.startswith(("http://", "https://")):
+        return _http_backend(spec)
+    if spec.startswith("pool:"):
+        from src.api.pool import create_pool
+        return create_pool(spec[len("pool:"):].split(","))
+    try:
+        factory = BACKEND_FACTORIES[spec]
+    except KeyError:
+        raise ValueError(f"Unknown MCQ backend {spec!r}; expected one of {sorted(BACKEND_FACTORIES)} or a URL")
+    return factory(spec)
+
+
+def get_backend():
+    """Return the process-wide generation backend (``MCQ_BACKEND``, default Gemini)"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend(os.getenv("MCQ_BACKEND", "gemini"))
+        return _backend
+
+
+def set_backend(backend):
+    """Replace the process-wide backend (load tests, tools); returns the previous one"""
+    global _backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+    return previous
@@ -0,0 +1,30 @@
+class MCQGenerationError(Exception):
+    """Base class for every failure while generating MCQs"""
+
+
+class ConfigurationError(MCQGenerationError):
+    """The backend is not configured (for example a missing API key)"""
+
+
+class RateLimitError(MCQGenerationError):
+    """The API kept rejecting requests with 429 after all retries"""
+
+
+class GenerationTimeoutError(MCQGenerationError):
+    """The call did not finish within its deadline"""
+
+
+class EmptyResponseError(MCQGenerationError):
+    """The model returned no usable text (for example a blocked response)"""
+
+
+class APIError(MCQGenerationError):
+    """Any other error reported by the model API"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class CircuitOpenError(MCQGenerationError):
+    """Every endpoint of a backend pool is cut off after repeated failures"""
@@ -0,0 +1,186 @@
+"""Offline stand-ins for the Gemini model, for load tests and local development.
+
+``FakeModel`` speaks the subset of the ``GenerativeModel`` API the client uses
+(``generate_content_async`` with and without ``stream=True``) and answers with
+well-formed Nepali MCQ text built from the passage in the prompt. Latency
+follows a log-normal distribution, a configurable fraction of calls fail with
+429/503 and streaming delivers the answer in small pieces, all driven by a
+seeded RNG so runs are reproducible. JSON-mode prompts are answered with a
+JSON array, a configurable fraction of whose items are malformed.
+``FakeBackend`` wraps it in the normal ``AsyncGeminiClient`` so retries,
+rate limiting and concurrency limits are exercised exactly as in production.
+"""
+
+import asyncio
+import json
+import math
+import random
+import re
+import zlib
+
+from src.api.openai_client import AsyncGeminiClient
+from src.mcq_parser import OPTION_LETTERS
+
+PASSAGE_RE = re.compile(r'अनुच्छेद:\n(.*?)\n\nआउटपुटको ढाँचा', re.S)
+COUNT_RE = re.compile(r'(\d+) वटा MCQs')
+# Only the JSON-mode prompt shows this key in its output format
+JSON_PROMPT_MARKER = '"options"'
+NEPALI_DIGITS = str.maketrans("0123456789", "०१२३४५६७८९")
+
+
+class FakeAPIError(Exception):
+    """Error carrying an HTTP status the way google.api_core errors do"""
+
+    def __init__(self, code, message=None):
+        super().__init__(message or f"fake backend returned {code}")
+        self.code = code
+
+
+def _fake_items(prompt, seed):
+    """``(question, options, correct index)`` per question the prompt asks for"""
+    match = PASSAGE_RE.search(prompt)
+    passage = match.group(1) if match else prompt
+    count = COUNT_RE.search(prompt)
+    max_questions = int(count.group(1)) if count else 5
+
+    rng = random.Random(zlib.crc32(passage.encode("utf-8")) ^ seed)
+    sentences = [s.strip() for s in re.split(r'[।॥?\n]', passage) if len(s.split()) >= 3]
+    vocabulary = sorted({w for w in passage.split() if len(w) > 2}) or ["नेपाल", "हिमाल", "नदी", "पहाड"]
+    if not sentences:
+        sentences = ["नेपाल एक सुन्दर देश हो"]
+
+    items = []
+    for i in range(max_questions):
+        words = sentences[i % len(sentences)].split()
+        answer = max(words, key=len)
+        stem = " ".join("______" if w == answer else w for w in words)
+        distractors = [w for w in rng.sample(vocabulary, min(len(vocabulary), 6)) if w != answer][:3]
+        while len(distractors) < 3:
+            distractors.append(f"{answer}{len(distractors) + 1}")
+        options = distractors + [answer]
+        rng.shuffle(options)
+        items.append((f"खाली ठाउँमा के पर्छ: {stem}?", options, options.index(answer)))
+    return items
+
+
+def fake_mcq_text(prompt, seed=0):
+    """Deterministic, well-formed MCQ answer for a generation prompt"""
+    blocks = []
+    for i, (question, options, correct) in enumerate(_fake_items(prompt, seed)):
+        lines = [f"{str(i + 1).translate(NEPALI_DIGITS)}. {question}"]
+        lines.extend(f"{letter}) {option}" for letter, option in zip(OPTION_LETTERS, options))
+        lines.append(f"सही उत्तर: {OPTION_LETTERS[correct]}")
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
+
+def fake_mcq_json(prompt, seed=0, invalid_rate=0.0, rng=None):
+    """JSON-mode answer for a prompt; about ``invalid_rate`` of the items lose an option"""
+    rng = rng or random.Random(seed)
+    items = []
+    for question, options, correct in _fake_items(prompt, seed):
+        item = {"question": question, "options": options, "answer": OPTION_LETTERS[correct]}
+        if invalid_rate and rng.random() < invalid_rate:
+            item["options"] = options[:2]
+        items.append(item)
+    return json.dumps(items, ensure_ascii=False, indent=1)
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeBehaviour:
+    """Latency, error and streaming knobs shared by the in-process and HTTP fakes"""
+
+    def __init__(self, latency_median=0.5, latency_sigma=0.4, error_rate=0.0,
+                 error_codes=(429, 503), stream_chunk_chars=40, first_chunk_fraction=0.2, seed=0,
+                 invalid_item_rate=0.0):
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.error_codes = error_codes
+        self.stream_chunk_chars = stream_chunk_chars
+        self.first_chunk_fraction = first_chunk_fraction
+        self.seed = seed
+        self.invalid_item_rate = invalid_item_rate
+        self._rng = random.Random(seed)
+
+    def sample_latency(self):
+        if self.latency_median <= 0:
+            return 0.0
+        return self._rng.lognormvariate(math.log(self.latency_median), self.latency_sigma)
+
+    def sample_error(self):
+        """HTTP status to fail this call with, or None"""
+        if self.error_rate and self._rng.random() < self.error_rate:
+            return self._rng.choice(self.error_codes)
+        return None
+
+    def plan(self, prompt):
+        """Decide one call: (error status or None, total latency, answer pieces)"""
+        if JSON_PROMPT_MARKER in prompt:
+            text = fake_mcq_json(prompt, self.seed, self.invalid_item_rate, self._rng)
+        else:
+            text = fake_mcq_text(prompt, self.seed)
+        size = self.stream_chunk_chars
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        return self.sample_error(), self.sample_latency(), pieces
+
+
+class FakeModel:
+    """In-process stand-in for ``genai.GenerativeModel``"""
+
+    def __init__(self, behaviour=None, **knobs):
+        self.behaviour = behaviour or FakeBehaviour(**knobs)
+        self.calls = 0
+
+    async def generate_content_async(self, prompt, stream=False, generation_config=None):
+        # The prompt alone decides between text and JSON answers
+        self.calls += 1
+        error, latency, pieces = self.behaviour.plan(prompt)
+        if not stream:
+            await asyncio.sleep(latency)
+            if error:
+                raise FakeAPIError(error)
+            return FakeResponse("".join(pieces))
+
+        first = latency * self.behaviour.first_chunk_fraction
+        await asyncio.sleep(first)
+        if error:
+            raise FakeAPIError(error)
+        return self._stream(pieces, (latency - first) / max(1, len(pieces) - 1))
+
+    async def _stream(self, pieces, gap):
+        for i, piece in enumerate(pieces):
+            if i:
+                await asyncio.sleep(gap)
+            yield FakeResponse(piece)
+
+
+class FakeBackend(AsyncGeminiClient):
+    """The production client wrapped around a ``FakeModel``.
+
+    Defaults are generous enough not to throttle load tests; pass
+    ``requests_per_minute`` etc. to study the limiter itself.
+    """
+
+    name = "fake"
+    stores_questions = False
+
+    def __init__(self, model=None, max_concurrency=64, requests_per_minute=None,
+                 tokens_per_minute=None, max_retries=4, base_delay=0.05, timeout=30.0,
+                 output_format="text", repair_rounds=1, **knobs):
+        super().__init__(
+            model or FakeModel(**knobs),
+            max_concurrency=max_concurrency,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            max_retries=max_retries,
+            base_delay=base_delay,
+            timeout=timeout,
+            model_name="fake",
+            output_format=output_format,
+            repair_rounds=repair_rounds,
+        )
@@ -0,0 +1,187 @@
+"""Local HTTP stand-in for the generation API.
+
+Start it with::
+
+    python -m src.api.fake_server --port 8765 --latency-median 0.8 --error-rate 0.05
+
+and point the app (or ``python -m src.batch``) at it with
+``MCQ_BACKEND=http://127.0.0.1:8765``. ``POST /v1/generate`` takes
+``{"prompt": ..., "stream": false}`` and answers with MCQ text from
+``fake_mcq_text``; with ``"stream": true`` the text is sent with chunked
+transfer encoding as it is "generated". Injected failures come back as
+429/503 with a JSON body, just like a throttled or overloaded API.
+"""
+
+import argparse
+import asyncio
+import codecs
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.api.fake_backend import FakeAPIError, FakeBehaviour, FakeResponse
+from src.api.openai_client import AsyncGeminiClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if self.path != "/v1/generate":
+            self._json(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+            prompt = request["prompt"]
+        except (ValueError, KeyError):
+            self._json(400, {"error": "expected JSON with a prompt"})
+            return
+
+        with self.server.lock:
+            error, latency, pieces = self.server.behaviour.plan(prompt)
+
+        if not request.get("stream"):
+            time.sleep(latency)
+            if error:
+                self._json(error, {"error": f"injected {error}"})
+                return
+            body = "".join(pieces).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        first = latency * self.server.behaviour.first_chunk_fraction
+        time.sleep(first)
+        if error:
+            self._json(error, {"error": f"injected {error}"})
+            return
+        gap = (latency - first) / max(1, len(pieces) - 1)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for i, piece in enumerate(pieces):
+                if i:
+                    time.sleep(gap)
+                data = piece.encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading (a cancelled or hedged call)
+            self.close_connection = True
+
+    def _json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status in (429, 503):
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_server(host="127.0.0.1", port=0, behaviour=None):
+    """Create (but do not start) a stand-in server; port 0 picks a free port"""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.behaviour = behaviour or FakeBehaviour()
+    server.lock = threading.Lock()
+    return server
+
+
+def start_server(host="127.0.0.1", port=0, behaviour=None):
+    """Start a stand-in server on a background thread and return it"""
+    server = make_server(host, port, behaviour)
+    threading.Thread(target=server.serve_forever, name="fake-generation-server", daemon=True).start()
+    return server
+
+
+class HTTPModel:
+    """Gemini-model lookalike that calls a stand-in server over HTTP"""
+
+    def __init__(self, base_url, timeout=60.0):
+        self.url = base_url.rstrip("/") + "/v1/generate"
+        self.timeout = timeout
+
+    def _open(self, prompt, stream):
+        body = json.dumps({"prompt": prompt, "stream": stream}).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        try:
+            return urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            raise FakeAPIError(e.code, e.read().decode("utf-8", "replace")) from e
+
+    async def generate_content_async(self, prompt, stream=False, generation_config=None):
+        response = await asyncio.to_thread(self._open, prompt, stream)
+        if not stream:
+            with response:
+                return FakeResponse((await asyncio.to_thread(response.read)).decode("utf-8"))
+        return self._stream(response)
+
+    async def _stream(self, response):
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        with response:
+            while True:
+                data = await asyncio.to_thread(response.read1, 4096)
+                if not data:
+                    break
+                text = decoder.decode(data)
+                if text:
+                    yield FakeResponse(text)
+
+
+def http_backend(base_url, **limits):
+    """Production client pointed at a stand-in server"""
+    limits.setdefault("max_concurrency", 64)
+    limits.setdefault("requests_per_minute", None)
+    limits.setdefault("tokens_per_minute", None)
+    limits.setdefault("base_delay", 0.05)
+    backend = AsyncGeminiClient(HTTPModel(base_url), model_name="fake", **limits)
+    backend.name = "http"
+    backend.stores_questions = False
+    return backend
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline stand-in for the MCQ generation API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-median", type=float, default=0.5, help="seconds")
+    parser.add_argument("--latency-sigma", type=float, default=0.4, help="log-normal shape")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--stream-chunk-chars", type=int, default=40)
+    parser.add_argument("--invalid-item-rate", type=float, default=0.0, help="malformed items in JSON answers")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    behaviour = FakeBehaviour(
+        latency_median=args.latency_median,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        stream_chunk_chars=args.stream_chunk_chars,
+        seed=args.seed,
+        invalid_item_rate=args.invalid_item_rate,
+    )
+    server = make_server(args.host, args.port, behaviour)
+    print(f"Fake generation server on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Backend answering from the rule-based cloze generator in ``src.local_generator``.
+
+Used as the fast mode (``MCQ_BACKEND=local`` or the app's toggle) and as the
+fallback when the model backend fails. Generation is CPU-bound and takes
+milliseconds, so it runs inline on the backend loop.
+"""
+
+from src.api.backends import GenerationBackend
+from src.api.exceptions import EmptyResponseError
+
+
+class LocalBackend(GenerationBackend):
+    name = "local"
+    # Bump when the generator's output changes so cached sets are not reused
+    model_name = "local-cloze-1"
+    stores_questions = False
+
+    def __init__(self, generator=None):
+        self._generator = generator
+
+    @property
+    def generator(self):
+        if self._generator is None:
+            from src.local_generator import get_local_generator
+            self._generator = get_local_generator()
+        return self._generator
+
+    async def generate(self, text, max_questions=5, timeout=None):
+        mcq_text = self.generator.generate_text(text, max_questions)
+        if not mcq_text:
+            raise EmptyResponseError("Passage is too short for local MCQ generation")
+        return mcq_text
+
+
+_local_backend = None
+
+
+def get_local_backend():
+    """Return the process-wide local backend"""
+    global _local_backend
+    if _local_backend is None:
+        _local_backend = LocalBackend()
+    return _local_backend
@@ -1,32 +1,81 @@
+import asyncio
+import contextlib
+import logging
 import os
-import streamlit as st
-import google.generativeai as genai
-from dotenv import load_dotenv
-
-# Load API key from secrets in Streamlit
-import streamlit as st
-api_key = st.secrets["GEMINI_API_KEY"]
-
-#for local 
-# load_dotenv()  # Uncomment if using local .env file
-# api_key = os.getenv("GEMINI_API_KEY")  # Uncomment if using local
-
-
-# Configure Gemini AI
-if api_key:
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel('gemini-2.0-flash-exp')
-else:
-    print("WARNING: No Gemini API key found in .env file")
-    model = None
-
-def generate_mcqs_from_text(text, max_questions=5):
-    """Generate MCQs using Gemini 2.5 based on input text content"""
-    
-    if not model:
-        return "❌ Error: Gemini API key not configured. Please add GEMINI_API_KEY to your .env file."
-    
-    prompt = f"""
+import random
+import threading
+import time
+
+from src.api.backends import GenerationBackend
+from src.api.exceptions import (
+    APIError,
+    ConfigurationError,
+    EmptyResponseError,
+    GenerationTimeoutError,
+    MCQGenerationError,
+    RateLimitError,
+)
+from src.api.rate_limit import RateLimiter
+from src.mcq_parser import format_mcqs
+from src.mcq_schema import JSONMCQParser
+from src.utils.metrics import SIZE_BUCKETS, incr, log_event, observe, span
+from src.utils.text_processing import estimate_tokens
+
+MODEL_NAME = os.getenv("GEMINI_MODEL", 'gemini-2.0-flash-exp')
+# Bump whenever the prompt below changes so cached responses are not reused
+PROMPT_VERSION = "2"
+# "text" asks for the numbered free-text format, "json" for MCQ_SCHEMA objects
+OUTPUT_FORMATS = ("text", "json")
+# The schema itself is spelled out in the prompt and enforced by validate_item
+JSON_GENERATION_CONFIG = {"response_mime_type": "application/json"}
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def load_api_key():
+    """Find the Gemini API key: environment first, then a local .env, then Streamlit secrets"""
+    api_key = os.getenv("GEMINI_API_KEY")
+    if api_key:
+        return api_key
+
+    # for local runs
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        pass
+    else:
+        load_dotenv()
+        api_key = os.getenv("GEMINI_API_KEY")
+        if api_key:
+            return api_key
+
+    # Streamlit Cloud deployments keep it in st.secrets
+    try:
+        import streamlit as st
+        return st.secrets.get("GEMINI_API_KEY")
+    except Exception:
+        return None
+
+
+def get_model():
+    """Return the configured Gemini model, building it on first use (None without a key)"""
+    global _model
+    with _model_lock:
+        if _model is None:
+            api_key = load_api_key()
+            if not api_key:
+                log_event("missing_api_key", level=logging.WARNING, sample=1)
+                return None
+            # Deferred so importing this module stays cheap for tools and tests
+            import google.generativeai as genai
+            genai.configure(api_key=api_key)
+            _model = genai.GenerativeModel(MODEL_NAME)
+        return _model
+
+def build_prompt(text, max_questions=5):
+    """Build the Nepali MCQ prompt for the given passage"""
+    return f"""
 तपाईं एक शिक्षाविद् हुनुहुन्छ जसको काम शिक्षात्मक उद्देश्यका लागि तथ्यमा आधारित बहुविकल्पीय प्रश्नहरू (MCQs) तयार गर्नु हो।
 
 कृपया तलको अनुच्छेदको आधारमा {max_questions} वटा MCQs नेपाली भाषामा तयार गर्नुहोस्। निम्न निर्देशनहरू पालना गर्नुहोस्:
@@ -60,21 +109,365 @@ def generate_mcqs_from_text(text, max_questions=5):
 केवल MCQs फिर्ता गर्नुहोस्, अन्य कुनै पाठ नदिनुहोस्।
 """
 
+def build_json_prompt(text, max_questions=5, avoid=()):
+    """Build the JSON-mode prompt; ``avoid`` lists questions that already exist and must not be repeated"""
+    avoid_note = ""
+    if avoid:
+        listed = "\n".join(f"- {question}" for question in avoid)
+        avoid_note = f"🔹 यी प्रश्नहरू पहिले नै बनिसकेका छन्, यिनलाई नदोहोर्याउनुहोस्:\n{listed}\n"
+    return f"""
+तपाईं एक शिक्षाविद् हुनुहुन्छ जसको काम शिक्षात्मक उद्देश्यका लागि तथ्यमा आधारित बहुविकल्पीय प्रश्नहरू (MCQs) तयार गर्नु हो।
+
+कृपया तलको अनुच्छेदको आधारमा {max_questions} वटा MCQs नेपाली भाषामा तयार गर्नुहोस्। निम्न निर्देशनहरू पालना गर्नुहोस्:
+
+🔹 अनुच्छेदमा उल्लेखित तथ्यहरूमा आधारित प्रश्नहरू मात्र बनाउनुहोस्।
+🔹 हरेक प्रश्नमा चार फरक विकल्पहरू राख्नुहोस्, विकल्पको अगाडि क, ख जस्ता अक्षर नलेख्नुहोस्।
+🔹 एक मात्र सही उत्तर हुनु पर्नेछ।
+🔹 "answer" मा सही विकल्पको अक्षर (क, ख, ग वा घ) मात्र लेख्नुहोस्।
+🔹 अनुच्छेदमा नभएका कुराहरूको बारेमा प्रश्न नगर्नुहोस्।
+{avoid_note}
+अनुच्छेद:
+{text}
+
+आउटपुटको ढाँचा:
+[
+  {{"question": "प्रश्न?", "options": ["विकल्प A", "विकल्प B", "विकल्प C", "विकल्प D"], "answer": "ख"}}
+]
+
+केवल JSON array फिर्ता गर्नुहोस्, अन्य कुनै पाठ नदिनुहोस्।
+"""
+
+# Rough size of the generated answer per question, used for token-per-minute budgeting
+OUTPUT_TOKENS_PER_QUESTION = 80
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def _status_of(exc):
+    """HTTP status carried by a google.api_core error, if any"""
+    code = getattr(exc, "code", None)
     try:
-        print(f"DEBUG: Generating MCQs using Gemini for text: {text[:100]}...")
-        
-        response = model.generate_content(prompt)
-        result = response.text.strip()
-        
-        print("DEBUG: Successfully generated MCQ content from Gemini:")
-        print(result[:200] + "..." if len(result) > 200 else result)
-        print("=" * 50)
-        
+        return int(code)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(exc):
+    """True for throttling, transient server errors and dropped connections"""
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    return _status_of(exc) in RETRYABLE_STATUS
+
+
+class AsyncGeminiClient(GenerationBackend):
+    """Async Gemini client with bounded concurrency, rate limiting and retries.
+
+    Every call waits for a concurrency slot and for request/token budget from
+    the rate limiter, then retries throttling and transient errors with
+    exponential backoff and full jitter until its deadline runs out. Failures
+    are raised as ``MCQGenerationError`` subclasses.
+
+    ``model`` is anything with Gemini's ``generate_content_async`` method, so
+    the fake models in ``src.api.fake_backend`` get the same limits and retries.
+    ``model_loader`` builds the model on first use when ``model`` is None.
+
+    With ``output_format="json"`` the model is asked for JSON objects instead
+    of free text. Items that fail validation are dropped, and up to
+    ``repair_rounds`` follow-up calls ask for only the missing questions. The
+    result is still returned in the numbered text format, so callers, the
+    cache and the question bank work the same in both modes.
+    """
+
+    name = "gemini"
+
+    def __init__(self, model, max_concurrency=4, requests_per_minute=15,
+                 tokens_per_minute=1_000_000, max_retries=4, base_delay=1.0,
+                 max_delay=30.0, timeout=60.0, model_name=MODEL_NAME,
+                 output_format="text", repair_rounds=1, model_loader=None):
+        if output_format not in OUTPUT_FORMATS:
+            raise ConfigurationError(f"Unknown output format {output_format!r}; expected one of {OUTPUT_FORMATS}")
+        self.model = model
+        # Called until it returns a model, so a key configured later still takes effect
+        self.model_loader = model_loader
+        self.model_name = model_name
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.output_format = output_format
+        self.repair_rounds = repair_rounds
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def _backoff(self, attempt):
+        # Full jitter keeps many throttled sessions from retrying in lockstep
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _prepare(self, text, max_questions, timeout):
+        if not self.model and self.model_loader is not None:
+            self.model = self.model_loader()
+        if not self.model:
+            raise ConfigurationError("Gemini API key not configured. Set GEMINI_API_KEY in the environment, a .env file or Streamlit secrets.")
+        with span("prompt"):
+            if self.output_format == "json":
+                prompt = build_json_prompt(text, max_questions)
+            else:
+                prompt = build_prompt(text, max_questions)
+        tokens = estimate_tokens(prompt) + OUTPUT_TOKENS_PER_QUESTION * max_questions
+        deadline = asyncio.get_running_loop().time() + (timeout or self.timeout)
+        return prompt, tokens, deadline
+
+    def _call(self, prompt, stream):
+        if self.output_format == "json":
+            return self.model.generate_content_async(prompt, stream=stream, generation_config=JSON_GENERATION_CONFIG)
+        if stream:
+            return self.model.generate_content_async(prompt, stream=True)
+        return self.model.generate_content_async(prompt)
+
+    async def _open(self, prompt, tokens, deadline, stream=False):
+        """Start a model call, retrying retryable failures until ``deadline``.
+
+        On success the concurrency slot is still held and the caller must
+        release ``self._semaphore`` once it is done with the response; the slot
+        is given back while backing off so waiting retries don't block others.
+        """
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise GenerationTimeoutError("No response from Gemini before the call deadline")
+            await self._semaphore.acquire()
+            try:
+                await asyncio.wait_for(self.limiter.acquire(tokens), remaining)
+                return await asyncio.wait_for(self._call(prompt, stream), deadline - loop.time())
+            except Exception as e:
+                self._semaphore.release()
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    raise self._translate(e) from e
+                delay = self._backoff(attempt)
+                attempt += 1
+                if loop.time() + delay >= deadline:
+                    raise self._translate(e) from e
+                incr("mcq_retries_total", backend=self.name, status=str(_status_of(e)))
+                log_event("retry", level=logging.WARNING, backend=self.name, error=repr(e), attempt=attempt, delay=delay)
+                await asyncio.sleep(delay)
+            except BaseException:
+                self._semaphore.release()
+                raise
+
+    async def _complete(self, prompt, tokens, deadline):
+        """Text of one non-streaming call"""
+        response = await self._open(prompt, tokens, deadline)
+        self._semaphore.release()
+        try:
+            result = response.text.strip()
+        except ValueError as e:
+            # Blocked or empty candidates make .text raise
+            raise EmptyResponseError(f"Gemini returned no text: {e}") from e
+        if not result:
+            raise EmptyResponseError("Gemini returned an empty response")
         return result
-        
-    except Exception as e:
-        error_msg = f"❌ Error generating MCQs: {str(e)}"
-        print(f"DEBUG: Gemini API Error: {error_msg}")
-        return error_msg
 
+    async def generate(self, text, max_questions=5, timeout=None):
+        """Generate MCQ text for ``text``, raising MCQGenerationError on failure"""
+        prompt, tokens, deadline = self._prepare(text, max_questions, timeout)
+
+        # Covers queueing for a concurrency slot and the rate limiter as well
+        with span("api", backend=self.name):
+            result = await self._complete(prompt, tokens, deadline)
+            if self.output_format == "json":
+                parser = JSONMCQParser()
+                mcqs = parser.feed(result)
+                parser.close()
+                self._count_items(mcqs, parser)
+                mcqs += await self._repair(text, mcqs, max_questions, deadline)
+                result = format_mcqs(mcqs)
+                if not result:
+                    raise EmptyResponseError("Gemini returned no valid MCQs")
+
+        observe("mcq_output_chars", len(result), SIZE_BUCKETS, backend=self.name)
+        log_event("generated", backend=self.name, input_chars=len(text), output_chars=len(result))
+        return result
+
+    async def stream(self, text, max_questions=5, timeout=None):
+        """Yield pieces of the MCQ text as Gemini streams them.
+
+        Opening the stream is retried like ``generate``; once text has started
+        arriving a failure is raised rather than retried, since the caller may
+        already have shown part of the answer.
+        """
+        prompt, tokens, deadline = self._prepare(text, max_questions, timeout)
+        started = time.perf_counter()
+        with span("api", backend=self.name, streaming="1"):
+            # aclosing gives the slot back as soon as the consumer stops early
+            async with contextlib.aclosing(self._stream(prompt, tokens, deadline, started)) as pieces:
+                if self.output_format == "json":
+                    pieces = self._json_pieces(pieces, text, max_questions, deadline)
+                async for piece in pieces:
+                    yield piece
+
+    async def _json_pieces(self, pieces, text, max_questions, deadline):
+        """Re-render a streamed JSON answer as numbered text, one question at a time"""
+        parser = JSONMCQParser()
+        mcqs = []
+        async for piece in pieces:
+            for mcq in parser.feed(piece):
+                mcqs.append(mcq)
+                yield format_mcqs([mcq], start=len(mcqs)) + "\n\n"
+        parser.close()
+        self._count_items(mcqs, parser)
+        for mcq in await self._repair(text, mcqs, max_questions, deadline):
+            mcqs.append(mcq)
+            yield format_mcqs([mcq], start=len(mcqs)) + "\n\n"
+        if not mcqs:
+            raise EmptyResponseError("Gemini returned no valid MCQs")
+
+    def _count_items(self, mcqs, parser):
+        incr("mcq_json_items_total", len(mcqs), backend=self.name, result="valid")
+        if parser.invalid:
+            incr("mcq_json_items_total", parser.invalid, backend=self.name, result="invalid")
+
+    async def _repair(self, text, mcqs, max_questions, deadline):
+        """Questions to make up for items that were invalid or missing from a JSON answer.
+
+        Only the shortfall is requested, with the existing questions listed so
+        they are not repeated; this costs a fraction of regenerating the set.
+        A failed repair keeps what is already valid rather than raising.
+        """
+        extra = []
+        for _ in range(self.repair_rounds):
+            missing = max_questions - len(mcqs) - len(extra)
+            if missing <= 0:
+                break
+            prompt = build_json_prompt(text, missing, [mcq.question for mcq in mcqs + extra])
+            tokens = estimate_tokens(prompt) + OUTPUT_TOKENS_PER_QUESTION * missing
+            incr("mcq_json_repairs_total", backend=self.name)
+            log_event("json_repair", backend=self.name, missing=missing, valid=len(mcqs) + len(extra))
+            try:
+                result = await self._complete(prompt, tokens, deadline)
+            except MCQGenerationError as e:
+                if not mcqs and not extra:
+                    raise
+                log_event("json_repair_failed", level=logging.WARNING, backend=self.name, error=repr(e))
+                break
+            parser = JSONMCQParser()
+            repaired = parser.feed(result)[:missing]
+            parser.close()
+            self._count_items(repaired, parser)
+            extra += repaired
+        return extra
+
+    async def _stream(self, prompt, tokens, deadline, started):
+        loop = asyncio.get_running_loop()
+        response = await self._open(prompt, tokens, deadline, stream=True)
+        output_chars = 0
+        try:
+            chunks = response.__aiter__()
+            received = False
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), deadline - loop.time())
+                except StopAsyncIteration:
+                    break
+                except Exception as e:
+                    raise self._translate(e) from e
+                try:
+                    piece = chunk.text
+                except ValueError as e:
+                    raise EmptyResponseError(f"Gemini returned no text: {e}") from e
+                if piece:
+                    if not received:
+                        observe("mcq_first_chunk_seconds", time.perf_counter() - started, backend=self.name)
+                    received = True
+                    output_chars += len(piece)
+                    yield piece
+            if not received:
+                raise EmptyResponseError("Gemini returned an empty response")
+            observe("mcq_output_chars", output_chars, SIZE_BUCKETS, backend=self.name)
+        finally:
+            self._semaphore.release()
+
+    def _translate(self, exc):
+        if isinstance(exc, MCQGenerationError):
+            return exc
+        if isinstance(exc, asyncio.TimeoutError):
+            return GenerationTimeoutError("Gemini call exceeded its deadline")
+        status = _status_of(exc)
+        if status == 429:
+            return RateLimitError(f"Gemini rate limit exceeded: {exc}")
+        return APIError(f"Error generating MCQs: {exc}", status=status)
+
+
+class KeyedModel:
+    """A ``GenerativeModel`` that calls with its own API key instead of the process-wide one"""
+
+    def __init__(self, api_key, model_name):
+        import google.generativeai as genai
+        # The SDK only exposes one global key; a private client manager per key
+        # avoids it. This class is the only place that touches SDK internals;
+        # tests/test_keyed_model.py fails if the pinned SDK stops honouring them
+        try:
+            from google.generativeai.client import _ClientManager
+        except ImportError as e:
+            raise ConfigurationError(
+                "Per-key Gemini clients need google-generativeai 0.8.x (see requirements.txt)"
+            ) from e
+
+        self._model = genai.GenerativeModel(model_name)
+        if not hasattr(self._model, "_async_client"):
+            raise ConfigurationError("Per-key Gemini clients need google-generativeai 0.8.x (see requirements.txt)")
+        self._clients = _ClientManager()
+        self._clients.configure(api_key=api_key)
+
+    async def generate_content_async(self, prompt, **kwargs):
+        if self._model._async_client is None:
+            # Built on the loop that uses it, as the SDK does for its default client
+            self._model._async_client = self._clients.make_client("generative_async")
+        return await self._model.generate_content_async(prompt, **kwargs)
+
+
+def _client_settings():
+    """Client limits and output options from the environment; limits apply per key"""
+    return dict(
+        max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")),
+        requests_per_minute=int(os.getenv("GEMINI_RPM", "15")),
+        tokens_per_minute=int(os.getenv("GEMINI_TPM", "1000000")),
+        max_retries=int(os.getenv("GEMINI_MAX_RETRIES", "4")),
+        timeout=float(os.getenv("GEMINI_TIMEOUT", "60")),
+        output_format=os.getenv("GEMINI_OUTPUT_FORMAT", "text"),
+        repair_rounds=int(os.getenv("GEMINI_JSON_REPAIR_ROUNDS", "1")),
+    )
+
+
+def client_for(api_key, model_name=MODEL_NAME):
+    """A client for one key and model, as used by each endpoint of a backend pool"""
+    settings = _client_settings()
+    # In a pool, failing over to another endpoint beats retrying this one
+    settings["max_retries"] = int(os.getenv("GEMINI_POOL_MAX_RETRIES", "1"))
+    model = KeyedModel(api_key, model_name) if api_key else None
+    return AsyncGeminiClient(model, model_name=model_name, **settings)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Return the process-wide Gemini client, tuned through environment variables"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            # Without a key the model is resolved on each call until one is set
+            _client = AsyncGeminiClient(get_model(), model_loader=get_model, **_client_settings())
+        return _client
+
+
+def generate_mcqs_from_text(text, max_questions=5, timeout=None):
+    """Generate MCQ text for ``text`` with the Gemini model named by ``GEMINI_MODEL``.
+
+    Always calls Gemini through the process-wide client; callers that should
+    honour ``MCQ_BACKEND`` (pools, local stand-ins) use
+    ``src.api.backends.get_backend()`` instead.
 
+    Raises ``MCQGenerationError`` (or a subclass) when generation fails.
+    """
+    return get_client().generate_sync(text, max_questions, timeout)
@@ -0,0 +1,413 @@
+"""Pool of generation endpoints with health scoring, circuit breakers and hedging.
+
+One API key on one model makes that endpoint's slowest moments everyone's
+p99. ``BackendPool`` spreads calls over several endpoints (API keys and/or
+models, or local stand-ins) and:
+
+- sends each call to the healthiest endpoint, scored by its recent latency,
+  error rate and calls in flight;
+- cuts an endpoint off for ``reset_seconds`` after ``failure_threshold``
+  failures in a row (circuit breaker), then lets a single probe call through
+  before trusting it again;
+- fails over to the next endpoint when a call fails before producing output;
+  only failures that point at the endpoint (throttling, timeouts, server
+  and connection errors, a rejected key) count against it and fail over,
+  while errors about the request itself (blocked or empty content) are
+  raised at once;
+- hedges: when a call has not answered within the pool's recent
+  ``hedge_percentile`` latency, the same call goes to a second endpoint and
+  whichever answers first wins; the other is cancelled. Hedges are capped
+  at ``hedge_ratio`` of all calls so a slow patch cannot double the load.
+
+For streams, hedging and failover apply up to the first piece of text; after
+that the stream stays with its endpoint.
+
+Configure with ``MCQ_BACKEND=pool`` (Gemini: every key in ``GEMINI_API_KEYS``
+times every model in ``GEMINI_MODELS``) or ``MCQ_BACKEND=pool:SPEC,SPEC,...``
+over other backend specs, for example two local stand-ins::
+
+    MCQ_BACKEND=pool:http://127.0.0.1:8765,http://127.0.0.1:8766
+
+``pool.stats()`` reports per-endpoint latency percentiles, error rates,
+breaker state and hedge counts; the same numbers are exported as metrics.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+
+from src.api.backends import GenerationBackend
+from src.api.exceptions import (
+    APIError,
+    CircuitOpenError,
+    ConfigurationError,
+    EmptyResponseError,
+    GenerationTimeoutError,
+    RateLimitError,
+)
+from src.utils.metrics import incr, log_event, observe
+
+# Latency samples kept per endpoint and call kind
+WINDOW = 200
+# Percentiles are trusted only once an endpoint has this many samples
+MIN_SAMPLES = 20
+# Hedge delay (seconds) until an endpoint has enough samples
+DEFAULT_HEDGE_DELAY = 2.0
+# Smoothing of the latency average used for scoring
+EWMA_ALPHA = 0.2
+# API statuses that say the endpoint (or its key) is unhealthy rather than the request
+ENDPOINT_FAULT_STATUS = {401, 403, 429, 500, 502, 503, 504}
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_endpoint_fault(error):
+    """Whether ``error`` reflects on the endpoint, so it should count and fail over"""
+    if isinstance(error, (RateLimitError, GenerationTimeoutError, CircuitOpenError)):
+        return True
+    if isinstance(error, APIError):
+        return error.status is None or error.status in ENDPOINT_FAULT_STATUS
+    # Blocked or empty content and bad requests would fail the same way anywhere
+    return not isinstance(error, (EmptyResponseError, ConfigurationError))
+
+
+class CircuitBreaker:
+    """Closed until ``failure_threshold`` failures in a row, then open for ``reset_seconds``.
+
+    After that one probe call is let through (half open): success closes
+    the breaker again, failure reopens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_seconds=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return CLOSED
+        if self.clock() - self._opened_at >= self.reset_seconds:
+            return HALF_OPEN
+        return OPEN
+
+    def available(self):
+        """Whether a call could be let through now, without claiming the probe"""
+        state = self.state
+        return state == CLOSED or (state == HALF_OPEN and not self._probing)
+
+    def allow(self):
+        """Let a call through; in the half-open state only the first caller gets the probe"""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        """Count a failure; returns True if it opened the breaker"""
+        self.failures += 1
+        self._probing = False
+        if self._opened_at is not None or self.failures >= self.failure_threshold:
+            self._opened_at = self.clock()
+            return True
+        return False
+
+    def release(self):
+        """Give the probe back when a probing call was cancelled without an outcome"""
+        self._probing = False
+
+
+class LatencyWindow:
+    """Recent latencies of one endpoint for one kind of call"""
+
+    __slots__ = ("samples", "ewma")
+
+    def __init__(self, size=WINDOW):
+        self.samples = deque(maxlen=size)
+        self.ewma = None
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.ewma = seconds if self.ewma is None else self.ewma + EWMA_ALPHA * (seconds - self.ewma)
+
+    def percentile(self, q):
+        """``q``-th percentile in seconds, or None with too few samples"""
+        if len(self.samples) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class Endpoint:
+    """One backend in the pool with its latency, error and hedge record"""
+
+    def __init__(self, name, backend, breaker=None):
+        self.name = name
+        self.backend = backend
+        self.breaker = breaker or CircuitBreaker()
+        # Time to the whole answer for generate, to the first piece for stream
+        self.latency = {"generate": LatencyWindow(), "stream": LatencyWindow()}
+        self.outcomes = deque(maxlen=WINDOW)
+        self.in_flight = 0
+        self.calls = 0
+        self.errors = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def error_rate(self):
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def score(self, kind):
+        """Expected cost of sending the next call here; lower is better"""
+        if self.calls < MIN_SAMPLES:
+            # Exploring: endpoints with fewer calls come first, round-robin,
+            # ahead of any measured one, so every endpoint gets measured
+            return self.calls * 1e-9
+        ewma = self.latency[kind].ewma
+        expected = DEFAULT_HEDGE_DELAY / 4 if ewma is None else ewma
+        return expected * (1 + self.in_flight) * (1 + 4 * self.error_rate())
+
+    def stats(self):
+        stats = {
+            "endpoint": self.name,
+            "model": self.backend.model_name,
+            "state": self.breaker.state,
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate(), 4),
+            "in_flight": self.in_flight,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+        }
+        for kind, window in self.latency.items():
+            for q in (50, 95, 99):
+                value = window.percentile(q)
+                stats[f"{kind}_p{q}_ms"] = None if value is None else round(value * 1e3, 1)
+        return stats
+
+
+class BackendPool(GenerationBackend):
+    """Generation backend that routes, fails over and hedges across ``endpoints``"""
+
+    name = "pool"
+
+    def __init__(self, endpoints, hedge_percentile=95, hedge_ratio=0.1, hedge=True):
+        if not endpoints:
+            raise ValueError("A backend pool needs at least one endpoint")
+        self.endpoints = list(endpoints)
+        self.hedge_percentile = hedge_percentile
+        self.hedge_ratio = hedge_ratio
+        self.hedge = hedge and len(self.endpoints) > 1
+        # Part of the cache key: answers from different models are not interchangeable
+        self.model_name = "pool:" + "+".join(sorted({e.backend.model_name for e in self.endpoints}))
+        self.output_format = "+".join(sorted({e.backend.output_format for e in self.endpoints}))
+        self.stores_questions = all(e.backend.stores_questions for e in self.endpoints)
+        self._calls = 0
+        self._hedges = 0
+        # Pool-wide, so a call stuck on a slow endpoint is hedged at the pool's pace
+        self.latency = {"generate": LatencyWindow(), "stream": LatencyWindow()}
+
+    def stats(self):
+        """Per-endpoint latency percentiles, error rates, breaker states and hedge counts"""
+        return [endpoint.stats() for endpoint in self.endpoints]
+
+    def _pick(self, kind, exclude):
+        """Healthiest endpoint not in ``exclude`` whose breaker lets a call through, or None"""
+        candidates = [e for e in self.endpoints if e not in exclude and e.breaker.available()]
+        for endpoint in sorted(candidates, key=lambda e: e.score(kind)):
+            if endpoint.breaker.allow():
+                return endpoint
+        return None
+
+    def hedge_delay(self, kind):
+        return self.latency[kind].percentile(self.hedge_percentile) or DEFAULT_HEDGE_DELAY
+
+    def _may_hedge(self):
+        # One hedge per call at most, and no more than hedge_ratio of calls overall
+        return self.hedge and self._hedges < self.hedge_ratio * self._calls + 1
+
+    async def _attempt(self, endpoint, kind, call):
+        """Run ``call`` on ``endpoint``, recording its latency and outcome"""
+        endpoint.in_flight += 1
+        endpoint.calls += 1
+        started = time.perf_counter()
+        try:
+            result = await call(endpoint.backend)
+        except asyncio.CancelledError:
+            # A hedge loser: no verdict on the endpoint's health
+            endpoint.breaker.release()
+            incr("mcq_endpoint_calls_total", endpoint=endpoint.name, result="cancelled")
+            raise
+        except Exception as e:
+            if not is_endpoint_fault(e):
+                # The endpoint answered; the request itself was the problem
+                endpoint.breaker.record_success()
+                incr("mcq_endpoint_calls_total", endpoint=endpoint.name, result="rejected")
+                raise
+            endpoint.errors += 1
+            endpoint.outcomes.append(False)
+            incr("mcq_endpoint_calls_total", endpoint=endpoint.name, result="error")
+            if endpoint.breaker.record_failure():
+                incr("mcq_circuit_opened_total", endpoint=endpoint.name)
+                log_event("circuit_open", level=logging.WARNING, sample=1, endpoint=endpoint.name, error=repr(e))
+            raise
+        finally:
+            endpoint.in_flight -= 1
+        seconds = time.perf_counter() - started
+        endpoint.latency[kind].add(seconds)
+        self.latency[kind].add(seconds)
+        endpoint.outcomes.append(True)
+        endpoint.breaker.record_success()
+        observe("mcq_endpoint_seconds", seconds, endpoint=endpoint.name, kind=kind)
+        incr("mcq_endpoint_calls_total", endpoint=endpoint.name, result="ok")
+        return result
+
+    async def _race(self, kind, call, discard=None):
+        """``call(backend)`` on the best endpoint, with failover and one hedge.
+
+        Returns the first successful result; the other attempt is cancelled,
+        or handed to ``discard`` if it succeeded at the same moment.
+        """
+        self._calls += 1
+        tried = set()
+        attempts = {}
+        errors = []
+        hedged = False
+
+        def launch(endpoint):
+            tried.add(endpoint)
+            task = asyncio.ensure_future(self._attempt(endpoint, kind, call))
+            attempts[task] = endpoint
+
+        first = self._pick(kind, tried)
+        if first is None:
+            raise CircuitOpenError("Every endpoint in the pool is unavailable after repeated failures")
+        launch(first)
+        try:
+            while attempts:
+                delay = None
+                if not hedged and self._may_hedge():
+                    delay = self.hedge_delay(kind)
+                done, _ = await asyncio.wait(attempts, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    second = self._pick(kind, tried)
+                    if second is not None:
+                        self._hedges += 1
+                        second.hedges += 1
+                        incr("mcq_hedges_total", endpoint=second.name)
+                        launch(second)
+                    continue
+
+                winner = None
+                rejected = None
+                for task in done:
+                    endpoint = attempts.pop(task)
+                    error = task.exception()
+                    if error is not None:
+                        if is_endpoint_fault(error):
+                            errors.append(error)
+                        elif rejected is None:
+                            rejected = error
+                    elif winner is None:
+                        winner = endpoint, task.result()
+                    elif discard is not None:
+                        await discard(task.result())
+                if winner is not None:
+                    # A success finishing alongside a rejection still answers the call
+                    endpoint, result = winner
+                    if hedged and endpoint is not first:
+                        endpoint.hedge_wins += 1
+                        incr("mcq_hedge_wins_total", endpoint=endpoint.name)
+                    return result
+                if rejected is not None:
+                    # Another endpoint would only fail the same way
+                    raise rejected
+                if not attempts:
+                    # Fail over straight away rather than wait for a hedge timer
+                    following = self._pick(kind, tried)
+                    if following is not None:
+                        incr("mcq_failovers_total", endpoint=following.name)
+                        launch(following)
+            raise errors[-1]
+        finally:
+            for task in attempts:
+                task.cancel()
+            if attempts:
+                await asyncio.gather(*attempts, return_exceptions=True)
+
+    async def generate(self, text, max_questions=5, timeout=None):
+        return await self._race("generate", lambda backend: backend.generate(text, max_questions, timeout))
+
+    async def stream(self, text, max_questions=5, timeout=None):
+        """Stream from whichever endpoint sends the first piece; failures after that are raised"""
+
+        async def open_stream(backend):
+            pieces = backend.stream(text, max_questions, timeout)
+            try:
+                first = await anext(pieces)
+            except StopAsyncIteration:
+                await pieces.aclose()
+                raise EmptyResponseError("Endpoint returned an empty stream")
+            except BaseException:
+                await pieces.aclose()
+                raise
+            return pieces, first
+
+        async def discard(opened):
+            await opened[0].aclose()
+
+        pieces, first = await self._race("stream", open_stream, discard)
+        try:
+            yield first
+            async for piece in pieces:
+                yield piece
+        finally:
+            await pieces.aclose()
+
+
+def create_pool(specs, **options):
+    """Pool over backends given as ``MCQ_BACKEND`` style specs ("fake", URLs, ...)"""
+    from src.api.backends import create_backend
+
+    endpoints = []
+    for i, spec in enumerate(specs):
+        backend = create_backend(spec)
+        endpoints.append(Endpoint(f"{backend.name}-{i}", backend))
+    return BackendPool(endpoints, **options)
+
+
+def gemini_pool(**options):
+    """Pool over every key in ``GEMINI_API_KEYS`` and model in ``GEMINI_MODELS``.
+
+    Falls back to the single key and model of the plain client. Endpoint
+    names carry the model and the key's position, never the key itself.
+    """
+    from src.api.openai_client import MODEL_NAME, client_for, load_api_key
+
+    keys = [k.strip() for k in os.getenv("GEMINI_API_KEYS", "").split(",") if k.strip()]
+    keys = keys or [load_api_key()]
+    models = [m.strip() for m in os.getenv("GEMINI_MODELS", "").split(",") if m.strip()] or [MODEL_NAME]
+    endpoints = [
+        Endpoint(f"{model}#{number}", client_for(key, model))
+        for number, key in enumerate(keys)
+        for model in models
+    ]
+    options.setdefault("hedge_percentile", float(os.getenv("MCQ_HEDGE_PERCENTILE", "95")))
+    options.setdefault("hedge_ratio", float(os.getenv("MCQ_HEDGE_RATIO", "0.1")))
+    return BackendPool(endpoints, **options)
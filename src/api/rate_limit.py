@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at ``rate_per_minute``.
+
+    Waiters are served in arrival order: the lock is held while a caller sleeps
+    for its tokens, so a large request cannot be starved by a stream of small
+    ones.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount=1):
+        """Wait until ``amount`` tokens are available and take them"""
+        # A request larger than the bucket could never be served otherwise
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self._tokens < amount:
+                await asyncio.sleep((amount - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= amount
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits for one API key"""
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    async def acquire(self, tokens=0):
+        if self.requests is not None:
+            await self.requests.acquire(1)
+        if self.tokens is not None and tokens:
+            await self.tokens.acquire(tokens)
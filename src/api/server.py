@@ -0,0 +1,446 @@
+"""Headless HTTP API for MCQ generation.
+
+Start it with::
+
+    python -m src.api.server --port 8080 --workers 8 --queue-size 64
+    MCQ_BACKEND=fake python -m src.api.server      # no API key needed
+
+Endpoints (JSON in, JSON out):
+
+- ``POST /v1/mcqs`` with ``{"text": ..., "max_questions": 5}`` returns
+  ``{"mcqs": [...]}``. Add ``"stream": true`` to get server-sent events:
+  one ``mcq`` event per question as it is generated, then ``done``.
+- ``POST /v1/mcqs/batch`` with ``{"passages": [{"id": ..., "text": ...}, ...]}``
+  returns ``{"results": [...]}`` in input order, each ``{"id", "ok", "mcqs"}``
+  or ``{"id", "ok": false, "error"}``. With ``"stream": true`` every result
+  is a ``result`` event sent as soon as its passage is done.
+- ``GET /healthz`` reports queue depth; ``GET /metrics`` is the Prometheus
+  text from ``src.utils.metrics``.
+
+Requests wait in a bounded queue for one of ``--workers`` generation
+slots. When the queue cannot take a request (a batch needs room for all its
+passages) the server answers 503 with ``Retry-After`` instead of letting
+latency grow without bound; a batch larger than the whole queue gets 413.
+A request that is not fully received within ``READ_TIMEOUT_SECONDS`` gets 408.
+The server runs on the shared backend loop, so the client's concurrency and
+rate limits apply to everything it does.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import math
+import os
+import sys
+import time
+
+from src.api.backends import create_backend, get_backend, run_coroutine, set_backend
+from src.api.exceptions import MCQGenerationError
+from src.mcq_generator import agenerate_mcqs, astream_mcqs, ground_mcq_list, new_verifier
+from src.mcq_parser import parse_mcqs
+from src.utils.metrics import incr, log_event, observe, render_prometheus
+from src.utils.text_processing import clean_text
+
+DEFAULT_WORKERS = 8
+DEFAULT_QUEUE_SIZE = 64
+MAX_BODY_BYTES = 10 * 1024 * 1024
+MAX_QUESTIONS = 20
+# A client must send its whole request within this many seconds, so slow
+# senders cannot hold connections open indefinitely
+READ_TIMEOUT_SECONDS = 30
+# Longer passages are cleaned on a thread so the loop keeps serving
+INLINE_CLEAN_CHARS = 20_000
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           408: "Request Timeout", 413: "Payload Too Large", 502: "Bad Gateway", 503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class Request:
+    __slots__ = ("method", "path", "headers", "body")
+
+    def __init__(self, method, path, headers, body):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        try:
+            payload = json.loads(self.body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "body is not valid JSON")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "expected a JSON object")
+        return payload
+
+
+async def read_request(reader, timeout=None):
+    """Parse one HTTP/1.1 request; None if the client closed the connection first.
+
+    Raises a 408 ``HTTPError`` when headers and body take longer than
+    ``timeout`` seconds (``READ_TIMEOUT_SECONDS`` by default) to arrive.
+    """
+    try:
+        return await asyncio.wait_for(_read_request(reader), timeout or READ_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPError(408, "request not received in time")
+
+
+async def _read_request(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPError(400, "malformed Content-Length")
+    if length < 0:
+        raise HTTPError(400, "malformed Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, f"body over {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return Request(method.upper(), target.split("?", 1)[0], headers, body)
+
+
+def _head(status, content_type, extra=None, length=None):
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", f"Content-Type: {content_type}", "Connection: close"]
+    if length is not None:
+        lines.append(f"Content-Length: {length}")
+    lines.extend(f"{name}: {value}" for name, value in (extra or {}).items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def send_json(writer, status, payload, headers=None):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    writer.write(_head(status, "application/json; charset=utf-8", headers, len(body)) + body)
+    await writer.drain()
+
+
+def sse(event, payload):
+    """One server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+def _error_payload(error):
+    return {"error": str(error), "type": type(error).__name__}
+
+
+class WorkerPool:
+    """Bounded queue of generation jobs served by a fixed number of worker tasks"""
+
+    def __init__(self, workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE):
+        self.workers = workers
+        self.queue = asyncio.Queue(queue_size)
+        self.busy = 0
+        # Smoothed seconds per job, for Retry-After
+        self.job_seconds = 1.0
+        self._tasks = []
+
+    def start(self):
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def retry_after(self):
+        """Seconds until a queue slot is likely to free up"""
+        backlog = self.queue.qsize() + self.busy
+        return max(1, math.ceil(self.job_seconds * backlog / self.workers))
+
+    def submit_all(self, jobs):
+        """Queue every job (async callables) or none; returns their futures.
+
+        Raises a 503 ``HTTPError`` when the queue cannot take all of them
+        right now, and a 413 when it never could (more jobs than queue slots),
+        since retrying that would fail forever.
+        """
+        # maxsize 0 is an unbounded queue
+        limit = self.queue.maxsize
+        if limit and len(jobs) > limit:
+            raise HTTPError(413, f"at most {limit} passages per request; split the batch")
+        if limit and limit - self.queue.qsize() < len(jobs):
+            incr("mcq_api_rejected_total")
+            raise HTTPError(503, "server busy, retry later", {"Retry-After": str(self.retry_after())})
+        loop = asyncio.get_running_loop()
+        futures = []
+        for job in jobs:
+            future = loop.create_future()
+            self.queue.put_nowait((job, future))
+            futures.append(future)
+        return futures
+
+    async def _work(self):
+        while True:
+            job, future = await self.queue.get()
+            if future.cancelled():
+                continue
+            self.busy += 1
+            started = time.perf_counter()
+            # Its own task, so a caller that goes away (cancelling the future) stops the job
+            task = asyncio.ensure_future(job())
+            future.add_done_callback(lambda f, task=task: f.cancelled() and task.cancel())
+            try:
+                await asyncio.wait([task])
+            except asyncio.CancelledError:
+                task.cancel()
+                future.cancel()
+                raise
+            else:
+                if not future.done() and not task.cancelled():
+                    if task.exception() is not None:
+                        future.set_exception(task.exception())
+                    else:
+                        future.set_result(task.result())
+            finally:
+                self.busy -= 1
+                elapsed = time.perf_counter() - started
+                self.job_seconds = 0.8 * self.job_seconds + 0.2 * elapsed
+                observe("mcq_api_job_seconds", elapsed)
+
+
+class MCQServer:
+    """Routes requests to the generation pipeline through a ``WorkerPool``"""
+
+    def __init__(self, workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE, backend=None):
+        self.pool = WorkerPool(workers, queue_size)
+        self.backend = backend
+        self._server = None
+
+    async def start(self, host="127.0.0.1", port=8080):
+        self.pool.start()
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+        await self.pool.stop()
+
+    async def _handle(self, reader, writer):
+        status = 500
+        started = time.perf_counter()
+        try:
+            request = await read_request(reader)
+            if request is None:
+                return
+            status = await self._route(request, writer)
+        except HTTPError as e:
+            status = e.status
+            await send_json(writer, e.status, {"error": str(e)}, e.headers)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            log_event("api_error", level=logging.ERROR, sample=1, error=repr(e))
+            with contextlib.suppress(ConnectionError):
+                await send_json(writer, 500, {"error": "internal error"})
+        finally:
+            incr("mcq_api_requests_total", status=str(status))
+            observe("mcq_api_request_seconds", time.perf_counter() - started)
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _route(self, request, writer):
+        routes = {
+            ("GET", "/healthz"): self._health,
+            ("GET", "/metrics"): self._metrics,
+            ("POST", "/v1/mcqs"): self._generate,
+            ("POST", "/v1/mcqs/batch"): self._batch,
+        }
+        handler = routes.get((request.method, request.path))
+        if handler is None:
+            if any(path == request.path for _, path in routes):
+                raise HTTPError(405, "method not allowed")
+            raise HTTPError(404, "not found")
+        return await handler(request, writer)
+
+    async def _health(self, request, writer):
+        await send_json(writer, 200, {
+            "status": "ok",
+            "queued": self.pool.queue.qsize(),
+            "busy": self.pool.busy,
+            "workers": self.pool.workers,
+        })
+        return 200
+
+    async def _metrics(self, request, writer):
+        body = render_prometheus().encode("utf-8")
+        writer.write(_head(200, "text/plain; version=0.0.4", length=len(body)) + body)
+        await writer.drain()
+        return 200
+
+    def _options(self, payload):
+        max_questions = payload.get("max_questions", 5)
+        # bool is an int subclass, but true is not a question count
+        if (isinstance(max_questions, bool) or not isinstance(max_questions, int)
+                or not 1 <= max_questions <= MAX_QUESTIONS):
+            raise HTTPError(400, f"max_questions must be an integer from 1 to {MAX_QUESTIONS}")
+        return max_questions, bool(payload.get("use_cache", True))
+
+    async def _clean(self, text):
+        if len(text) > INLINE_CLEAN_CHARS:
+            return await asyncio.to_thread(clean_text, text)
+        return clean_text(text)
+
+    async def _mcqs(self, text, max_questions, use_cache):
+        cleaned = await self._clean(text)
+        mcq_text = await agenerate_mcqs(cleaned, max_questions, use_cache, backend=self.backend)
+        # The text answer lost the grounding scores; records carry them
+        mcqs = ground_mcq_list(parse_mcqs(mcq_text), new_verifier(cleaned))
+        return [mcq.to_dict() for mcq in mcqs]
+
+    async def _generate(self, request, writer):
+        payload = request.json()
+        text = payload.get("text")
+        if not isinstance(text, str) or not text.strip():
+            raise HTTPError(400, "text is required")
+        max_questions, use_cache = self._options(payload)
+
+        if not payload.get("stream"):
+            [future] = self.pool.submit_all([lambda: self._mcqs(text, max_questions, use_cache)])
+            try:
+                mcqs = await future
+            except MCQGenerationError as e:
+                await send_json(writer, 502, _error_payload(e))
+                return 502
+            await send_json(writer, 200, {"mcqs": mcqs})
+            return 200
+
+        # The worker forwards questions to this handler as they are generated
+        events = asyncio.Queue()
+
+        async def job():
+            cleaned = await self._clean(text)
+            async for mcq in astream_mcqs(cleaned, max_questions, use_cache, backend=self.backend):
+                events.put_nowait(sse("mcq", mcq.to_dict()))
+
+        [future] = self.pool.submit_all([job])
+        future.add_done_callback(lambda _: events.put_nowait(None))
+        writer.write(_head(200, "text/event-stream; charset=utf-8", {"Cache-Control": "no-cache"}))
+        try:
+            while (event := await events.get()) is not None:
+                writer.write(event)
+                await writer.drain()
+            if future.exception() is not None:
+                writer.write(sse("error", _error_payload(future.exception())))
+            else:
+                writer.write(sse("done", {}))
+            await writer.drain()
+        except ConnectionError:
+            # The client left; stop generating for it
+            future.cancel()
+        return 200
+
+    async def _batch(self, request, writer):
+        payload = request.json()
+        passages = payload.get("passages")
+        if not isinstance(passages, list) or not passages:
+            raise HTTPError(400, "passages must be a non-empty list")
+        items = []
+        for position, passage in enumerate(passages):
+            if isinstance(passage, str):
+                passage = {"id": position, "text": passage}
+            if not isinstance(passage, dict) or not isinstance(passage.get("text"), str):
+                raise HTTPError(400, f"passage {position} needs a text")
+            items.append((passage.get("id", position), passage["text"]))
+        max_questions, use_cache = self._options(payload)
+
+        futures = self.pool.submit_all([
+            (lambda text=text: self._mcqs(text, max_questions, use_cache)) for _, text in items
+        ])
+        ids = {future: passage_id for future, (passage_id, _) in zip(futures, items)}
+
+        def result(future):
+            passage_id = ids[future]
+            error = future.exception()
+            if error is None:
+                return {"id": passage_id, "ok": True, "mcqs": future.result()}
+            if not isinstance(error, MCQGenerationError):
+                log_event("api_error", level=logging.ERROR, sample=1, error=repr(error))
+            return {"id": passage_id, "ok": False, **_error_payload(error)}
+
+        if not payload.get("stream"):
+            await asyncio.wait(futures)
+            await send_json(writer, 200, {"results": [result(future) for future in futures]})
+            return 200
+
+        writer.write(_head(200, "text/event-stream; charset=utf-8", {"Cache-Control": "no-cache"}))
+        try:
+            pending = set(futures)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    writer.write(sse("result", result(future)))
+                await writer.drain()
+            writer.write(sse("done", {}))
+            await writer.drain()
+        except ConnectionError:
+            for future in futures:
+                future.cancel()
+        return 200
+
+
+def start_server(host="127.0.0.1", port=0, workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE, backend=None):
+    """Start the API on the shared backend loop and return ``(server, port)``; port 0 picks a free port"""
+    server = MCQServer(workers, queue_size, backend)
+    port = run_coroutine(server.start(host, port))
+    return server, port
+
+
+async def serve(host, port, workers, queue_size):
+    """Run the API until cancelled"""
+    server = MCQServer(workers, queue_size)
+    port = await server.start(host, port)
+    print(f"MCQ API on http://{host}:{port}", file=sys.stderr)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve MCQ generation over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="passages generated at once")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="passages waiting before requests get 503")
+    parser.add_argument("--backend", help="MCQ_BACKEND spec: gemini, fake, local, pool, pool:SPEC,... or a stand-in server URL")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=os.getenv("MCQ_LOG_LEVEL", "WARNING").upper(), format="%(message)s")
+
+    if args.backend:
+        set_backend(create_backend(args.backend))
+    backend = get_backend()
+    try:
+        # On the shared loop, like every other caller, so limits are process-wide
+        backend.run(serve(args.host, args.port, args.workers, args.queue_size))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""Offline bulk MCQ generation over a corpus of passages.
+
+Usage::
+
+    python -m src.batch lessons/ question_bank.jsonl --max-questions 10
+    python -m src.batch passages.jsonl question_bank.jsonl --concurrency 16
+
+The input is either a directory of ``.txt`` files (the relative path is the
+passage id) or a JSONL file with ``{"id": ..., "text": ...}`` records. Every
+finished passage is appended to the output JSONL immediately, and the output
+doubles as the checkpoint: rerunning the same command skips passages that
+already have an ``"ok"`` record, so a killed run resumes where it stopped.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from src.api.exceptions import MCQGenerationError
+from src.api.backends import get_backend
+from src.mcq_generator import agenerate_mcqs
+from src.mcq_parser import parse_mcqs
+from src.utils.metrics import write_snapshot
+from src.utils.text_processing import clean_text
+
+
+def iter_passages(source):
+    """Yield ``(passage_id, text)`` pairs from a directory or a JSONL file"""
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if not name.endswith(".txt"):
+                    continue
+                path = os.path.join(root, name)
+                with open(path, "r", encoding="utf-8") as f:
+                    yield os.path.relpath(path, source), f.read()
+        return
+
+    with open(source, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            yield str(record.get("id", line_no)), record["text"]
+
+
+def parse_records(mcq_text):
+    """Parse generated text into JSON-ready MCQ dicts (runs in the process pool)"""
+    return [mcq.to_dict() for mcq in parse_mcqs(mcq_text)]
+
+
+def load_checkpoint(output_path):
+    """Return the ids that already have a successful record in ``output_path``"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A run killed mid-write leaves a truncated last line
+                continue
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+def _open_output(output_path):
+    out = open(output_path, "a+", encoding="utf-8")
+    # Make sure appended records start on a fresh line after a truncated write
+    if out.tell() > 0:
+        out.seek(out.tell() - 1)
+        if out.read(1) != "\n":
+            out.write("\n")
+    return out
+
+
+async def run_batch(source, output_path, max_questions=5, concurrency=8, workers=None, use_cache=True):
+    """Generate MCQs for every pending passage and return summary counters"""
+    done = load_checkpoint(output_path)
+    stats = {"ok": 0, "failed": 0, "skipped": 0}
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+
+    async def process(pool, out, passage_id, text):
+        try:
+            # CPU-bound cleaning and parsing stay off the event loop
+            cleaned = await loop.run_in_executor(pool, clean_text, text)
+            # No local fallback: failed passages are recorded and retried on resume
+            mcq_text = await agenerate_mcqs(cleaned, max_questions, use_cache, fallback=False)
+            questions = await loop.run_in_executor(pool, parse_records, mcq_text)
+            record = {"id": passage_id, "status": "ok", "mcq_text": mcq_text, "questions": questions}
+            stats["ok"] += 1
+        except MCQGenerationError as e:
+            record = {"id": passage_id, "status": "error", "error_type": type(e).__name__, "error": str(e)}
+            stats["failed"] += 1
+        except Exception as e:
+            # One malformed passage must not take down a run over thousands
+            record = {"id": passage_id, "status": "error", "error_type": type(e).__name__, "error": repr(e)}
+            stats["failed"] += 1
+        finally:
+            slots.release()
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, _open_output(output_path) as out:
+        tasks = []
+        for passage_id, text in iter_passages(source):
+            if passage_id in done:
+                stats["skipped"] += 1
+                continue
+            # Bound the number of passages in memory, not just in flight at the API
+            await slots.acquire()
+            tasks.append(asyncio.create_task(process(pool, out, passage_id, text)))
+        await asyncio.gather(*tasks)
+
+    elapsed = time.perf_counter() - started
+    processed = stats["ok"] + stats["failed"]
+    stats["elapsed_seconds"] = round(elapsed, 2)
+    stats["passages_per_minute"] = round(processed / elapsed * 60, 2) if elapsed else 0.0
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Nepali MCQs for a corpus of passages.")
+    parser.add_argument("source", help="directory of .txt files or a JSONL file of {id, text} records")
+    parser.add_argument("output", help="JSONL file to append results to (also the resume checkpoint)")
+    parser.add_argument("--max-questions", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8, help="passages in flight at once")
+    parser.add_argument("--workers", type=int, default=None, help="processes for cleaning and parsing")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the response cache")
+    parser.add_argument("--metrics", help="write a JSON metrics snapshot here when done")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=os.getenv("MCQ_LOG_LEVEL", "WARNING").upper(), format="%(message)s")
+
+    stats = get_backend().run(run_batch(
+        args.source,
+        args.output,
+        max_questions=args.max_questions,
+        concurrency=args.concurrency,
+        workers=args.workers,
+        use_cache=not args.no_cache,
+    ))
+    print(
+        f"{stats['ok']} ok, {stats['failed']} failed, {stats['skipped']} skipped (already done) "
+        f"in {stats['elapsed_seconds']}s - {stats['passages_per_minute']} passages/min",
+        file=sys.stderr,
+    )
+    if args.metrics:
+        write_snapshot(args.metrics)
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""Export MCQs to GIFT, Moodle XML, CSV and printable HTML.
+
+Every writer takes an iterable of ``MCQ`` records and a text stream and
+writes question by question, so exporting a whole question bank needs no
+more memory than exporting one quiz::
+
+    from src.exporters import export, iter_bank
+    with open("bank.xml", "w", encoding="utf-8") as out:
+        export(iter_bank(get_question_bank()), out, "moodle", seed=7)
+
+or from the shell::
+
+    python -m src.exporters data/question_bank.sqlite3 exam.gift --seed 7
+    python -m src.exporters question_bank.jsonl exam.html
+"""
+
+from src.exporters.common import (
+    iter_bank,
+    iter_batch_output,
+    iter_mcq_text,
+    open_source,
+    shuffle_options,
+)
+from src.exporters.csv_export import write_csv
+from src.exporters.gift import write_gift
+from src.exporters.html_export import write_html
+from src.exporters.moodle_xml import write_moodle_xml
+
+FORMATS = {
+    "gift": write_gift,
+    "moodle": write_moodle_xml,
+    "csv": write_csv,
+    "html": write_html,
+}
+# Output file extension per format, and the format guessed from an extension
+EXTENSIONS = {"gift": ".gift", "moodle": ".xml", "csv": ".csv", "html": ".html"}
+MIME_TYPES = {"gift": "text/plain", "moodle": "application/xml", "csv": "text/csv", "html": "text/html"}
+
+
+def format_for(path):
+    """Export format implied by ``path``'s extension, or None"""
+    for name, extension in EXTENSIONS.items():
+        if path.endswith(extension):
+            return name
+    return None
+
+
+def export(mcqs, out, fmt, seed=None):
+    """Write ``mcqs`` to ``out`` in format ``fmt``; with ``seed`` options are shuffled first.
+
+    Returns the number of questions written.
+    """
+    try:
+        writer = FORMATS[fmt]
+    except KeyError:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {sorted(FORMATS)}")
+    if seed is not None:
+        mcqs = shuffle_options(mcqs, seed)
+    return writer(mcqs, out)
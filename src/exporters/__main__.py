@@ -0,0 +1,26 @@
+import argparse
+import sys
+
+from src.exporters import EXTENSIONS, FORMATS, export, format_for, open_source
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export MCQs to GIFT, Moodle XML, CSV or printable HTML.")
+    parser.add_argument("source", help="question bank (.sqlite3), batch output (.jsonl) or MCQ text file")
+    parser.add_argument("output", help=f"file to write; the format follows its extension ({', '.join(EXTENSIONS.values())})")
+    parser.add_argument("--format", choices=sorted(FORMATS), help="override the format implied by the extension")
+    parser.add_argument("--seed", type=int, help="shuffle each question's options with this seed")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or format_for(args.output)
+    if fmt is None:
+        parser.error(f"cannot tell the format of {args.output}; pass --format")
+    # newline="" as the csv module wants; the other formats only write "\n"
+    with open(args.output, "w", encoding="utf-8", newline="") as out:
+        written = export(open_source(args.source), out, fmt, args.seed)
+    print(f"{written} questions written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Question sources and option shuffling shared by the exporters.
+
+Every source is a generator that reads its input a page or a line at a
+time, so an export holds one question in memory however large the bank is.
+"""
+
+import json
+import random
+
+from src.mcq_parser import MCQ, MCQParser, OPTION_LETTERS
+
+# Questions fetched from the bank per query
+BANK_PAGE_SIZE = 500
+# Characters of an MCQ text file read per parser feed
+TEXT_CHUNK_CHARS = 1 << 16
+
+
+def shuffle_options(mcqs, seed):
+    """Yield each MCQ with its options in a seeded random order.
+
+    The order depends only on ``seed`` and the question itself, not on its
+    position, so re-exporting a bank (or a filtered part of it) with the same
+    seed gives every question the same option order.
+    """
+    for mcq in mcqs:
+        # String seeds are hashed with SHA-512, so this is stable across runs and machines
+        rng = random.Random(f"{seed}\x00{mcq.question}\x00" + "\x00".join(mcq.options))
+        order = list(range(len(mcq.options)))
+        rng.shuffle(order)
+        correct = order.index(mcq.correct_index) if mcq.correct_index is not None else None
+        yield MCQ(mcq.question, [mcq.options[i] for i in order], correct, mcq.span, mcq.local, mcq.grounding)
+
+
+def answer_letter(mcq):
+    """Letter of the correct option, or "" when it is unknown"""
+    return OPTION_LETTERS[mcq.correct_index] if mcq.correct_index is not None else ""
+
+
+def iter_bank(bank, page_size=BANK_PAGE_SIZE):
+    """Every question in a ``QuestionBank``, in id order, one page at a time"""
+    after = 0
+    while True:
+        page = bank.page(after, page_size)
+        if not page:
+            return
+        for _, mcq in page:
+            yield mcq
+        after = page[-1][0]
+
+
+def iter_batch_output(path):
+    """Questions from the ``"ok"`` records of a ``src.batch`` output file"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Truncated last line of a killed run
+                continue
+            if record.get("status") != "ok":
+                continue
+            for question in record.get("questions", ()):
+                yield MCQ.from_dict(question)
+
+
+def iter_mcq_text(path):
+    """Questions from a file in the numbered text format, parsed as it is read"""
+    parser = MCQParser()
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            chunk = f.read(TEXT_CHUNK_CHARS)
+            if not chunk:
+                break
+            yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def open_source(path):
+    """Question iterator for ``path``: a bank (``.sqlite3``), batch output (``.jsonl``) or MCQ text"""
+    if path.endswith((".sqlite3", ".db")):
+        from src.question_bank import QuestionBank
+        return iter_bank(QuestionBank(path))
+    if path.endswith(".jsonl"):
+        return iter_batch_output(path)
+    return iter_mcq_text(path)
@@ -0,0 +1,27 @@
+"""CSV with one row per question, for spreadsheets and custom imports.
+
+Columns are the question number, the question, one column per option
+(क to घ), the correct letter and the correct option's text. Open the file
+with ``newline=""`` as the ``csv`` module expects.
+"""
+
+import csv
+
+from src.exporters.common import answer_letter
+from src.mcq_parser import OPTION_LETTERS
+
+COLUMNS = ["number", "question", *OPTION_LETTERS, "answer", "answer_text"]
+
+
+def write_csv(mcqs, out):
+    """Write ``mcqs`` to the text stream ``out`` as CSV; returns the number written"""
+    writer = csv.writer(out)
+    writer.writerow(COLUMNS)
+    written = 0
+    for mcq in mcqs:
+        written += 1
+        options = list(mcq.options[:len(OPTION_LETTERS)])
+        options += [""] * (len(OPTION_LETTERS) - len(options))
+        answer_text = mcq.options[mcq.correct_index] if mcq.correct_index is not None else ""
+        writer.writerow([written, mcq.question, *options, answer_letter(mcq), answer_text])
+    return written
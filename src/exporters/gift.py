@@ -0,0 +1,35 @@
+"""GIFT, the plain-text quiz format Moodle and other LMSs import.
+
+Each question becomes::
+
+    ::Q1:: प्रश्न? {
+    =सही उत्तर
+    ~गलत उत्तर
+    }
+
+Questions without a known answer cannot be graded and are skipped.
+"""
+
+GIFT_SPECIAL = "~=#{}:\\"
+_ESCAPES = str.maketrans({c: "\\" + c for c in GIFT_SPECIAL} | {"\n": " "})
+
+
+def escape(text):
+    """``text`` with GIFT's control characters escaped and on one line"""
+    return text.translate(_ESCAPES)
+
+
+def write_gift(mcqs, out):
+    """Write ``mcqs`` to the text stream ``out`` as GIFT; returns the number written"""
+    written = 0
+    for mcq in mcqs:
+        if mcq.correct_index is None:
+            continue
+        written += 1
+        lines = [f"::Q{written}:: {escape(mcq.question)} {{"]
+        lines.extend(
+            ("=" if i == mcq.correct_index else "~") + escape(option) for i, option in enumerate(mcq.options)
+        )
+        lines.append("}\n\n")
+        out.write("\n".join(lines))
+    return written
@@ -0,0 +1,47 @@
+"""Printable HTML exam paper with the answer key on its own page.
+
+Questions are written as they arrive. The answer key rows go to a temporary
+file and are copied after the last question, so even a bank of tens of
+thousands of questions is exported in constant memory.
+"""
+
+import shutil
+import tempfile
+from html import escape
+
+from src.exporters.common import answer_letter
+from src.mcq_parser import NEPALI_DIGITS, OPTION_LETTERS
+
+PRINT_CSS = """
+body { font-family: 'Noto Sans Devanagari', 'Mangal', sans-serif; max-width: 48rem; margin: 2rem auto; line-height: 1.6; }
+h1 { text-align: center; }
+.mcq { break-inside: avoid; margin-bottom: 1.2rem; }
+.mcq ol { list-style: none; padding-left: 1.5rem; margin: 0.3rem 0; }
+.answer-key { break-before: page; }
+.answer-key table { border-collapse: collapse; }
+.answer-key td { border: 1px solid #999; padding: 0.2rem 0.8rem; }
+"""
+
+
+def write_html(mcqs, out, title="बहुविकल्पीय प्रश्नहरू"):
+    """Write ``mcqs`` to the text stream ``out`` as a printable page; returns the number written"""
+    out.write(
+        '<!DOCTYPE html>\n<html lang="ne">\n<head>\n<meta charset="utf-8">\n'
+        f"<title>{escape(title)}</title>\n<style>{PRINT_CSS}</style>\n</head>\n<body>\n"
+        f"<h1>{escape(title)}</h1>\n"
+    )
+    written = 0
+    with tempfile.TemporaryFile("w+", encoding="utf-8") as key:
+        for mcq in mcqs:
+            written += 1
+            number = str(written).translate(NEPALI_DIGITS)
+            options = "".join(
+                f"<li>{letter}) {escape(option)}</li>" for letter, option in zip(OPTION_LETTERS, mcq.options)
+            )
+            out.write(f'<div class="mcq"><p><strong>{number}. {escape(mcq.question)}</strong></p><ol>{options}</ol></div>\n')
+            key.write(f"<tr><td>{number}</td><td>{answer_letter(mcq) or '-'}</td></tr>\n")
+        out.write('<section class="answer-key">\n<h2>उत्तर कुञ्जी</h2>\n<table>\n')
+        key.seek(0)
+        shutil.copyfileobj(key, out)
+    out.write("</table>\n</section>\n</body>\n</html>\n")
+    return written
@@ -0,0 +1,44 @@
+"""Moodle XML quiz format: one ``multichoice`` question per MCQ.
+
+The document is written as a header, one element per question and a
+footer, so it never exists in memory as a tree. Questions without a known
+answer cannot be graded and are skipped.
+"""
+
+from xml.sax.saxutils import escape
+
+HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n<quiz>\n'
+FOOTER = "</quiz>\n"
+
+
+def _question(number, mcq):
+    answers = "".join(
+        f'    <answer fraction="{100 if i == mcq.correct_index else 0}" format="plain_text">'
+        f"<text>{escape(option)}</text></answer>\n"
+        for i, option in enumerate(mcq.options)
+    )
+    return (
+        '  <question type="multichoice">\n'
+        f"    <name><text>Q{number}</text></name>\n"
+        f'    <questiontext format="plain_text"><text>{escape(mcq.question)}</text></questiontext>\n'
+        "    <defaultgrade>1</defaultgrade>\n"
+        "    <single>true</single>\n"
+        # Options are already in their final (possibly seeded) order
+        "    <shuffleanswers>false</shuffleanswers>\n"
+        "    <answernumbering>abc</answernumbering>\n"
+        f"{answers}"
+        "  </question>\n"
+    )
+
+
+def write_moodle_xml(mcqs, out):
+    """Write ``mcqs`` to the text stream ``out`` as Moodle XML; returns the number written"""
+    out.write(HEADER)
+    written = 0
+    for mcq in mcqs:
+        if mcq.correct_index is None:
+            continue
+        written += 1
+        out.write(_question(written, mcq))
+    out.write(FOOTER)
+    return written
@@ -0,0 +1,398 @@
+"""Durable background jobs for MCQ generation.
+
+The UI submits a job and gets an id back immediately; a pool of worker
+threads claims jobs from a SQLite table (highest priority first, then
+oldest) and writes each question to the job as soon as it is generated.
+Because the job lives in the database rather than in a script thread, a
+browser refresh or reconnect can reattach to it by id, and the number of
+generations in flight is set by ``MCQ_JOB_WORKERS`` instead of by the number
+of open sessions.
+
+Workers run generation through ``stream_mcqs``, so everything still goes
+through the shared backend loop with its concurrency and rate limits.
+Running jobs whose worker stopped sending heartbeats (the process died) go
+back to the queue and start over. ``JobQueue.watch`` follows one job; it is
+woken by every change made in the same process, so a page streams questions
+as soon as its in-process worker saves them.
+
+Inspect the queue from the command line::
+
+    python -m src.jobs stats
+    python -m src.jobs show JOB_ID
+    python -m src.jobs cancel JOB_ID
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from src.api.exceptions import MCQGenerationError
+from src.mcq_parser import MCQ
+from src.utils.metrics import incr, log_event, observe
+
+DEFAULT_JOBS_PATH = os.getenv("MCQ_JOBS_PATH", os.path.join(".cache", "mcq_jobs.sqlite3"))
+DEFAULT_WORKERS = int(os.getenv("MCQ_JOB_WORKERS", "4"))
+# Idle workers look for jobs from other processes this often
+POLL_SECONDS = 0.5
+# Running jobs without a heartbeat for this long are requeued
+STALE_SECONDS = 300
+# Workers refresh the heartbeat this often, whether or not questions arrive
+HEARTBEAT_SECONDS = 30
+# Finished jobs are deleted after this long
+RETENTION_SECONDS = 24 * 60 * 60
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        priority INTEGER NOT NULL,
+        text TEXT NOT NULL,
+        max_questions INTEGER NOT NULL,
+        fast INTEGER NOT NULL,
+        mcqs TEXT NOT NULL DEFAULT '[]',
+        error TEXT,
+        owner TEXT,
+        created_at REAL NOT NULL,
+        started_at REAL,
+        heartbeat REAL,
+        finished_at REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority DESC, created_at)",
+]
+
+
+@dataclass(slots=True)
+class Job:
+    """Snapshot of one job; ``mcqs`` holds the questions generated so far"""
+    id: str
+    status: str
+    priority: int
+    max_questions: int
+    fast: bool
+    mcqs: List[MCQ] = field(default_factory=list)
+    error: Optional[str] = None
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self):
+        return self.status in FINISHED
+
+
+class JobQueue:
+    """SQLite job table; one instance is safe to share across threads"""
+
+    def __init__(self, path=DEFAULT_JOBS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        # Set on submit so idle workers in this process start at once
+        self.wakeup = threading.Event()
+        # Bumped on every change made through this instance; wakes ``watch``
+        self._version = 0
+        self._changed = threading.Condition()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+
+    def submit(self, text, max_questions=5, priority=0, fast=False):
+        """Queue a generation job and return its id"""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, priority, text, max_questions, fast, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, priority, text, max_questions, int(fast), time.time()),
+            )
+        incr("mcq_jobs_total", event="submitted")
+        self.wakeup.set()
+        return job_id
+
+    def get(self, job_id):
+        """The job's current state, or None for an unknown (or pruned) id"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, priority, max_questions, fast, mcqs, error, created_at, started_at, finished_at "
+                "FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        job_id, status, priority, max_questions, fast, mcqs, error, created_at, started_at, finished_at = row
+        return Job(job_id, status, priority, max_questions, bool(fast),
+                   [MCQ.from_dict(d) for d in json.loads(mcqs)], error, created_at, started_at, finished_at)
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns False if it had already finished.
+
+        A running job stops after the question it is generating.
+        """
+        with self._lock:
+            updated = self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status IN (?, ?)",
+                (CANCELLED, time.time(), job_id, QUEUED, RUNNING),
+            ).rowcount
+        if updated:
+            incr("mcq_jobs_total", event="cancelled")
+            self._notify()
+        return bool(updated)
+
+    def claim(self, owner):
+        """Mark the next job running for ``owner``; ``(id, text, max_questions, fast)`` or None"""
+        now = time.time()
+        with self._lock:
+            # Jobs of a worker that died start over, without its partial questions
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, mcqs = '[]', started_at = NULL "
+                "WHERE status = ? AND heartbeat < ?",
+                (QUEUED, RUNNING, now - STALE_SECONDS),
+            )
+            # One statement, so two processes can never claim the same job
+            claimed = self._conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, started_at = ?, heartbeat = ? "
+                "WHERE id = (SELECT id FROM jobs WHERE status = ? ORDER BY priority DESC, created_at LIMIT 1) "
+                "AND status = ? RETURNING id, text, max_questions, fast",
+                (RUNNING, owner, now, now, QUEUED, QUEUED),
+            ).fetchone()
+        if claimed is not None:
+            self._notify()
+        return claimed
+
+    def add_mcq(self, job_id, mcq):
+        """Append one generated question; returns False once the job was cancelled"""
+        with self._lock:
+            # Appended in SQL, so each question costs one small write
+            added = bool(self._conn.execute(
+                "UPDATE jobs SET mcqs = json_insert(mcqs, '$[#]', json(?)), heartbeat = ? "
+                "WHERE id = ? AND status = ?",
+                (json.dumps(mcq.to_dict(), ensure_ascii=False), time.time(), job_id, RUNNING),
+            ).rowcount)
+        if added:
+            self._notify()
+        return added
+
+    def heartbeat(self, job_id):
+        """Mark a running job as alive so it is not requeued as stale"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET heartbeat = ? WHERE id = ? AND status = ?", (time.time(), job_id, RUNNING)
+            )
+
+    def _finish(self, job_id, status, error=None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (status, error, time.time(), job_id, RUNNING),
+            )
+        incr("mcq_jobs_total", event=status)
+        self._notify()
+
+    def _notify(self):
+        with self._changed:
+            self._version += 1
+            self._changed.notify_all()
+
+    def watch(self, job_id, poll=POLL_SECONDS):
+        """Yield the job each time its status or question count changes, until it finishes.
+
+        Changes made in this process wake the watcher at once; changes from
+        workers in other processes are seen within ``poll`` seconds. Yields
+        nothing for an unknown id.
+        """
+        version = None
+        last = None
+        while True:
+            with self._changed:
+                if version == self._version:
+                    self._changed.wait(poll)
+                version = self._version
+            job = self.get(job_id)
+            if job is None:
+                return
+            state = (job.status, len(job.mcqs))
+            if state != last:
+                last = state
+                yield job
+            if job.finished:
+                return
+
+    def finish(self, job_id):
+        self._finish(job_id, DONE)
+
+    def fail(self, job_id, error):
+        self._finish(job_id, FAILED, error)
+
+    def prune(self, max_age=RETENTION_SECONDS):
+        """Delete jobs that finished more than ``max_age`` seconds ago"""
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM jobs WHERE finished_at < ?", (time.time() - max_age,)
+            ).rowcount
+
+    def stats(self):
+        """Job counts by status"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JobWorkers:
+    """Threads that claim jobs from ``queue`` and run them until ``stop``"""
+
+    def __init__(self, queue, workers=DEFAULT_WORKERS, backend=None):
+        self.queue = queue
+        self.workers = workers
+        self.backend = backend
+        self._stopping = threading.Event()
+        self._threads = []
+        self._stopwords = None
+
+    def start(self):
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"mcq-job-worker-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self.queue.wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _run(self):
+        owner = f"{os.getpid()}:{threading.current_thread().name}"
+        last_prune = 0.0
+        while not self._stopping.is_set():
+            if time.time() - last_prune > 600:
+                self.queue.prune()
+                last_prune = time.time()
+            claimed = self.queue.claim(owner)
+            if claimed is None:
+                self.queue.wakeup.wait(POLL_SECONDS)
+                self.queue.wakeup.clear()
+                continue
+            self._execute(*claimed)
+
+    def _execute(self, job_id, text, max_questions, fast):
+        # Deferred: importing the generator pulls in the backend stack
+        from src.api.local_backend import get_local_backend
+        from src.mcq_generator import stream_mcqs
+        from src.utils.text_processing import load_stopwords
+
+        if self._stopwords is None:
+            self._stopwords = load_stopwords()
+        backend = get_local_backend() if fast else self.backend
+        # Long fan-outs, retries and rate-limit waits can go minutes without a question
+        beating = threading.Event()
+        threading.Thread(
+            target=self._heartbeat, args=(job_id, beating), name=f"mcq-job-heartbeat-{job_id[:8]}", daemon=True
+        ).start()
+        started = time.perf_counter()
+        mcqs = stream_mcqs(text, self._stopwords, max_questions, backend=backend)
+        try:
+            for mcq in mcqs:
+                if not self.queue.add_mcq(job_id, mcq):
+                    # Cancelled: closing the stream stops the model call
+                    return
+        except MCQGenerationError as e:
+            self.queue.fail(job_id, str(e))
+            return
+        except Exception as e:
+            log_event("job_error", level=logging.ERROR, sample=1, job=job_id, error=repr(e))
+            self.queue.fail(job_id, repr(e))
+            return
+        finally:
+            mcqs.close()
+            beating.set()
+            observe("mcq_job_seconds", time.perf_counter() - started)
+        self.queue.finish(job_id)
+
+    def _heartbeat(self, job_id, stop):
+        while not stop.wait(HEARTBEAT_SECONDS):
+            self.queue.heartbeat(job_id)
+
+
+_queue = None
+_workers = None
+_jobs_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Return the process-wide job queue"""
+    global _queue
+    with _jobs_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
+
+
+def start_job_workers(workers=DEFAULT_WORKERS):
+    """Start the process-wide worker pool once; later calls return the running pool"""
+    global _workers
+    queue = get_job_queue()
+    with _jobs_lock:
+        if _workers is None:
+            _workers = JobWorkers(queue, workers).start()
+        return _workers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect the MCQ job queue.")
+    parser.add_argument("--path", default=DEFAULT_JOBS_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="count jobs by status")
+    show = commands.add_parser("show", help="print one job")
+    show.add_argument("job_id")
+    cancel = commands.add_parser("cancel", help="cancel a queued or running job")
+    cancel.add_argument("job_id")
+    args = parser.parse_args(argv)
+
+    queue = JobQueue(args.path)
+    if args.command == "stats":
+        print(json.dumps(queue.stats()))
+    elif args.command == "show":
+        job = queue.get(args.job_id)
+        if job is None:
+            print(f"no job {args.job_id}", file=sys.stderr)
+            return 1
+        print(json.dumps({
+            "id": job.id, "status": job.status, "priority": job.priority, "error": job.error,
+            "mcqs": [mcq.to_dict() for mcq in job.mcqs],
+        }, ensure_ascii=False, indent=2))
+    else:
+        if not queue.cancel(args.job_id):
+            print(f"job {args.job_id} is not queued or running", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
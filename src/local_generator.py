@@ -0,0 +1,168 @@
+"""Rule-based cloze MCQs built from the passage itself, without a model.
+
+Every content word is scored with TF-IDF (frequent in the passage, rare in
+general, longer words preferred), each sentence's best word becomes its
+blank, and the highest scoring sentences become questions. Distractors are
+other content words of the passage whose length and frequency are closest
+to the answer, compared on their stems so that another inflection of the
+answer ("नेपालमा" for "नेपालको") is never offered. Frequencies come from the corpus term index when one has been
+built (``src.utils.term_index``); otherwise the passage's sentences stand in
+for the corpus. The output uses the same text format as the model, headed by
+``LOCAL_NOTE`` so readers can tell the questions apart.
+"""
+
+import math
+import os
+import random
+import zlib
+from collections import Counter
+
+from src.mcq_parser import MCQ, format_mcqs
+from src.utils.text_processing import TERM_INDEX_PATH, get_tokenizer, load_stopwords, split_sentences, tokenize
+
+BLANK = "______"
+QUESTION_PREFIX = "खाली ठाउँमा मिल्ने शब्द छान्नुहोस्:"
+MIN_WORD_CHARS = 2
+MIN_SENTENCE_WORDS = 4
+DISTRACTORS = 3
+
+
+def _is_candidate(word, stopwords):
+    return len(word) >= MIN_WORD_CHARS and word not in stopwords and not word.isdigit()
+
+
+class LocalMCQGenerator:
+    """Cloze MCQ generator over one stopword list; instances are reusable and thread-safe.
+
+    ``term_index`` is an optional ``TermIndex`` supplying corpus document
+    frequencies for salience and distractor matching.
+    """
+
+    def __init__(self, stopwords=None, term_index=None):
+        self.stopwords = frozenset(stopwords) if stopwords is not None else load_stopwords()
+        self.term_index = term_index
+
+    def generate(self, cleaned, max_questions=5):
+        """Return up to ``max_questions`` MCQ records for already-cleaned text"""
+        sentences = [tokenize(s) for s in split_sentences(cleaned)]
+        sentences = [words for words in sentences if len(words) >= MIN_SENTENCE_WORDS]
+        if not sentences or max_questions < 1:
+            return []
+
+        stopwords = self.stopwords
+        term_counts = Counter()
+        sentence_counts = Counter()
+        for words in sentences:
+            content = [w for w in words if _is_candidate(w, stopwords)]
+            term_counts.update(content)
+            sentence_counts.update(set(content))
+        if len(term_counts) < DISTRACTORS + 1:
+            return []
+
+        terms = list(term_counts)
+        split_word = get_tokenizer(self.stopwords).split_word
+        stems = [split_word(term)[0] for term in terms]
+        stem_of = dict(zip(terms, stems))
+        if self.term_index is not None:
+            # The index counts stems, so "नेपालको" is looked up as "नेपाल"
+            idf = self.term_index.idf(stems).tolist()
+            frequency = dict(zip(terms, (1 + df for df in self.term_index.doc_frequencies(stems).tolist())))
+        else:
+            n = len(sentences)
+            idf = [math.log(1 + n / sentence_counts[term]) for term in terms]
+            frequency = term_counts
+        score = {
+            term: (1 + math.log(term_counts[term])) * weight * math.sqrt(len(term))
+            for term, weight in zip(terms, idf)
+        }
+
+        # Best blank for every sentence, then the best sentences with distinct answers
+        ranked = []
+        for position, words in enumerate(sentences):
+            candidates = [w for w in words if w in score]
+            if candidates:
+                answer = max(candidates, key=score.__getitem__)
+                ranked.append((score[answer], position, answer))
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+
+        chosen = []
+        used = set()
+        for _, position, answer in ranked:
+            if answer not in used:
+                used.add(answer)
+                chosen.append((position, answer))
+                if len(chosen) == max_questions:
+                    break
+        # Questions follow the passage order
+        chosen.sort()
+
+        vocabulary = sorted(term_counts, key=lambda t: (len(t), term_counts[t], t))
+        mcqs = []
+        for position, answer in chosen:
+            words = sentences[position]
+            options = self._options(answer, set(words), vocabulary, frequency, stem_of)
+            if options is None:
+                continue
+            stem = " ".join(BLANK if w == answer else w for w in words)
+            mcqs.append(MCQ(
+                f"{QUESTION_PREFIX} {stem}।", options, options.index(answer), (0, 0), local=True
+            ))
+        return mcqs
+
+    def _options(self, answer, sentence_words, vocabulary, frequency, stem_of):
+        """Answer plus the closest-looking distractors, shuffled per sentence.
+
+        Distractors are compared on stems: none shares the answer's stem
+        and no two share one, so inflections never stand in as wrong answers.
+        """
+        log_count = math.log(frequency[answer])
+
+        def distance(term):
+            return abs(len(term) - len(answer)) + abs(math.log(frequency[term]) - log_count)
+
+        def pick(pool):
+            distractors = []
+            seen = {stem_of[answer]}
+            for term in sorted(pool, key=distance):
+                if stem_of[term] not in seen:
+                    seen.add(stem_of[term])
+                    distractors.append(term)
+                    if len(distractors) == DISTRACTORS:
+                        return distractors
+            return None
+
+        distractors = pick(t for t in vocabulary if t not in sentence_words) or pick(vocabulary)
+        if distractors is None:
+            return None
+        options = distractors + [answer]
+        # Seeded on the answer so the same passage always gives the same quiz
+        random.Random(zlib.crc32(answer.encode("utf-8"))).shuffle(options)
+        return options
+
+    def generate_text(self, cleaned, max_questions=5):
+        """MCQ text in the model's format, headed by the local-generation note"""
+        mcqs = self.generate(cleaned, max_questions)
+        if not mcqs:
+            return ""
+        return format_mcqs(mcqs)
+
+
+_generator = None
+
+
+def get_local_generator():
+    """Return the process-wide generator (bundled stopwords, corpus index if built)"""
+    global _generator
+    if _generator is None:
+        # numpy is only loaded when there is an index to read
+        term_index = None
+        if os.path.exists(TERM_INDEX_PATH):
+            from src.utils.term_index import get_term_index
+            term_index = get_term_index()
+        _generator = LocalMCQGenerator(term_index=term_index)
+    return _generator
+
+
+def generate_local_mcqs(cleaned, max_questions=5):
+    """Cloze MCQ text for already-cleaned text, in milliseconds and without an API call"""
+    return get_local_generator().generate_text(cleaned, max_questions)
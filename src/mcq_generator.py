@@ -1,18 +1,427 @@
-from src.api.openai_client import generate_mcqs_from_text
-from src.utils.text_processing import clean_text, remove_stopwords, split_sentences
-
-def generate_mcqs(raw_text, stopwords, max_questions=5):
-    """Generate MCQs from raw text"""
-    print(f"DEBUG: Raw text length: {len(raw_text)}")
-    
-    cleaned = clean_text(raw_text)
-    print(f"DEBUG: Cleaned text length: {len(cleaned)}")
-    print(f"DEBUG: Cleaned text preview: {cleaned[:200]}...")
-    
+
+import asyncio
+import contextlib
+import logging
+import math
+import os
+
+from src.api.exceptions import MCQGenerationError
+from src.api.backends import get_backend
+from src.api.local_backend import get_local_backend
+from src.api.openai_client import PROMPT_VERSION
+from src.mcq_parser import MCQParser, format_mcqs, parse_mcqs
+from src.utils.cache import ResponseCache, make_cache_key
+from src.utils.metrics import SIZE_BUCKETS, incr, log_event, observe, span
+from src.utils.singleflight import SingleFlight
+from src.utils.text_processing import (
+    chunk_sentences,
+    clean_text,
+    estimate_tokens,
+    load_stopwords,
+    split_sentences,
+)
+
+# Passages above this many estimated tokens are split and generated in parallel
+DEFAULT_CHUNK_TOKENS = 1500
+DEFAULT_MAX_CONCURRENCY = 4
+# Answer with local cloze questions when the model backend fails
+LOCAL_FALLBACK = os.getenv("MCQ_LOCAL_FALLBACK", "1") != "0"
+# Passages longer than this many estimated tokens per question are cut down to
+# their most salient sentences before prompting; 0 sends everything. Kept well
+# above DEFAULT_CHUNK_TOKENS / 5 so a trimmed default request (5 questions)
+# can still be long enough to fan out over chunks
+TOKENS_PER_QUESTION = int(os.getenv("MCQ_TOKENS_PER_QUESTION", "600"))
+# Questions at least this similar (MinHash estimate) to an earlier one are dropped; 0 keeps all
+DEDUP_THRESHOLD = float(os.getenv("MCQ_DEDUP_THRESHOLD", "0.7"))
+# Identical requests in flight at the same time share one model call; 0 turns it off
+COALESCE = os.getenv("MCQ_COALESCE", "1") != "0"
+# Model questions the passage does not support are marked ("flag"), removed
+# ("drop") or not checked at all ("off"); see src.utils.grounding
+GROUNDING = os.getenv("MCQ_GROUNDING", "flag")
+
+_response_cache = None
+# Keyed like the response cache, so only interchangeable requests are merged
+_generate_flights = SingleFlight("generate")
+_stream_flights = SingleFlight("stream")
+
+def get_response_cache():
+    """Return the process-wide MCQ response cache, creating it on first use"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
+
+def _cached(cleaned, max_questions, use_cache, backend):
+    cache = get_response_cache() if use_cache else None
+    cache_key = make_cache_key(cleaned, max_questions, backend.model_name, PROMPT_VERSION, backend.output_format)
+    cached = cache.get(cache_key) if cache is not None else None
+    if cache is not None:
+        incr("mcq_cache_lookups_total", result="miss" if cached is None else "hit")
+    return cache, cache_key, cached
+
+def select_prompt_text(cleaned, max_questions, stopwords=None, tokens_per_question=TOKENS_PER_QUESTION):
+    """Shrink ``cleaned`` to the salient sentences that fit the question's token budget.
+
+    Keeps at least one sentence per question so coverage does not drop;
+    passages within budget are returned unchanged.
+    """
+    budget = tokens_per_question * max_questions
+    if not tokens_per_question or estimate_tokens(cleaned) <= budget:
+        return cleaned
+    # Deferred so numpy is only loaded for passages over budget
+    from src.utils.salience import select_sentences
+    from src.utils.term_index import get_term_index
+
+    if stopwords is None:
+        stopwords = load_stopwords()
+    with span("select"):
+        selection = select_sentences(cleaned, budget, max_questions, stopwords, get_term_index())
+    incr("mcq_prompt_tokens_saved_total", selection.tokens_before - selection.tokens_after)
+    log_event(
+        "prompt_selection", kept=selection.sentences_kept, total=selection.sentences_total,
+        tokens_before=selection.tokens_before, tokens_after=selection.tokens_after,
+    )
+    return selection.text
+
+def new_deduplicator():
+    """Fresh near-duplicate filter for one quiz, or None when dedup is disabled"""
+    if not DEDUP_THRESHOLD:
+        return None
+    # Deferred so numpy is only loaded once questions exist
+    from src.utils.minhash import MCQDeduplicator
+    return MCQDeduplicator(DEDUP_THRESHOLD)
+
+def dedupe_mcq_list(mcqs, deduplicator=None):
+    """Drop near-duplicate questions, keeping the first of each group"""
+    deduplicator = deduplicator or new_deduplicator()
+    if deduplicator is None:
+        return mcqs
+    unique = deduplicator.filter(mcqs)
+    if len(unique) < len(mcqs):
+        incr("mcq_duplicates_dropped_total", len(mcqs) - len(unique))
+    return unique
+
+def dedupe_mcq_text(mcq_text):
+    """``mcq_text`` without near-duplicate questions (unchanged if there are none)"""
+    with span("parse"):
+        mcqs = parse_mcqs(mcq_text)
+    unique = dedupe_mcq_list(mcqs)
+    return mcq_text if len(unique) == len(mcqs) else format_mcqs(unique)
+
+def new_verifier(passage, stopwords=None):
+    """Grounding check for questions on ``passage``, or None when it is off"""
+    if GROUNDING == "off":
+        return None
+    # Deferred like the other post-processing steps
+    from src.utils.grounding import GroundingVerifier
+    with span("ground_index"):
+        return GroundingVerifier(passage, stopwords)
+
+def ground_mcq_list(mcqs, verifier):
+    """Score model questions against the passage; in "drop" mode weak ones are removed"""
+    checked = [mcq for mcq in mcqs if not mcq.local] if verifier is not None else None
+    if not checked:
+        return mcqs
+    with span("ground"):
+        _, flagged = verifier.verify(checked)
+    if not flagged:
+        return mcqs
+    incr("mcq_ungrounded_total", len(flagged), action=GROUNDING)
+    if GROUNDING != "drop":
+        return mcqs
+    dropped = set(map(id, flagged))
+    return [mcq for mcq in mcqs if id(mcq) not in dropped]
+
+def _from_bank(cleaned, max_questions, backend):
+    """Stored questions of ``backend``'s model for a passage that overlaps heavily with ``cleaned``, or None"""
+    # Deferred so numpy and the bank file are only touched when generating
+    from src.question_bank import get_question_bank
+
+    bank = get_question_bank()
+    mcqs = bank.reuse(cleaned, max_questions, backend.model_name) if bank is not None else None
+    if bank is not None:
+        incr("mcq_bank_lookups_total", result="hit" if mcqs else "miss")
+    return mcqs
+
+def _save_to_bank(cleaned, mcqs, backend):
+    # Stand-ins and the local generator must not fill the bank with their output
+    if not backend.stores_questions:
+        return
+    from src.question_bank import get_question_bank
+
+    bank = get_question_bank()
+    if bank is not None:
+        bank.add(cleaned, mcqs, backend.model_name)
+
+def _uses_fallback(backend, fallback):
+    return fallback and backend is not get_local_backend()
+
+async def _agenerate_cleaned(cleaned, max_questions, use_cache=True, backend=None, fallback=LOCAL_FALLBACK):
+    """Generate MCQs for already-cleaned text, going through the response cache"""
+    backend = backend or get_backend()
+    # Identical passages (after cleaning) are answered from the on-disk cache
+    cache, cache_key, cached = _cached(cleaned, max_questions, use_cache, backend)
+    if cached is not None:
+        return cached
+
+    async def call():
+        mcq_text = await backend.generate(cleaned, max_questions)
+        # Written once by the shared call rather than by every waiting session
+        if cache is not None:
+            cache.set(cache_key, mcq_text)
+        return mcq_text
+
     # Use cleaned text for MCQ generation (don't remove stopwords as they're important for context)
-    mcq_text = generate_mcqs_from_text(cleaned, max_questions)
-    
-    print(f"DEBUG: Generated MCQ text length: {len(mcq_text)}")
-    print(f"DEBUG: Generated MCQ text: {mcq_text}")
-    
+    # Failures raise MCQGenerationError, so nothing below caches an error;
+    # each caller still applies its own fallback to a shared failure
+    try:
+        if COALESCE:
+            mcq_text = await _generate_flights.do(cache_key, call)
+        else:
+            mcq_text = await call()
+    except MCQGenerationError as e:
+        if not _uses_fallback(backend, fallback):
+            raise
+        incr("mcq_fallbacks_total", backend=backend.name, error=type(e).__name__)
+        log_event("fallback", level=logging.WARNING, sample=1, backend=backend.name, error=repr(e))
+        try:
+            # Not cached: the model should get another chance next time
+            return await get_local_backend().generate(cleaned, max_questions)
+        except MCQGenerationError:
+            raise e
+
+    return mcq_text
+
+async def agenerate_mcqs(cleaned, max_questions=5, use_cache=True,
+                         chunk_tokens=DEFAULT_CHUNK_TOKENS, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                         backend=None, fallback=LOCAL_FALLBACK, stopwords=None,
+                         tokens_per_question=TOKENS_PER_QUESTION, use_bank=True):
+    """Async core of ``generate_mcqs`` for text that has already been cleaned"""
+    backend = backend or get_backend()
+    # SQLite and MinHash work stays off the event loop
+    if use_bank:
+        reused = await asyncio.to_thread(_from_bank, cleaned, max_questions, backend)
+        if reused:
+            return format_mcqs(reused)
+
+    passage = cleaned
+    cleaned = select_prompt_text(cleaned, max_questions, stopwords, tokens_per_question)
+    if chunk_tokens and max_questions > 1 and estimate_tokens(cleaned) > chunk_tokens:
+        # Merging already drops repeats across chunks
+        mcq_text = await agenerate_mcqs_long(
+            cleaned, max_questions, use_cache, chunk_tokens, max_concurrency, backend, fallback
+        )
+    else:
+        mcq_text = dedupe_mcq_text(await _agenerate_cleaned(cleaned, max_questions, use_cache, backend, fallback))
+
+    if GROUNDING == "drop" or use_bank:
+        with span("parse"):
+            mcqs = parse_mcqs(mcq_text)
+        # Text output cannot carry a flag, so only "drop" changes it
+        if GROUNDING == "drop":
+            grounded = ground_mcq_list(mcqs, new_verifier(passage, stopwords))
+            if len(grounded) < len(mcqs):
+                mcqs = grounded
+                mcq_text = format_mcqs(mcqs)
+        if use_bank:
+            await asyncio.to_thread(_save_to_bank, passage, mcqs, backend)
     return mcq_text
+
+def generate_mcqs(raw_text, stopwords, max_questions=5, use_cache=True,
+                  chunk_tokens=DEFAULT_CHUNK_TOKENS, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                  backend=None, fallback=LOCAL_FALLBACK, tokens_per_question=TOKENS_PER_QUESTION,
+                  use_bank=True):
+    """Generate MCQs from raw text.
+
+    ``backend`` defaults to the process-wide one (pass ``get_local_backend()``
+    for the instant rule-based mode); with ``fallback`` a failing model
+    backend is answered with local cloze questions instead of an error.
+    Long passages are first reduced to their most salient sentences
+    (``tokens_per_question`` estimated tokens per question, ranked with
+    ``stopwords`` filtered out). With ``use_bank`` a passage that overlaps
+    heavily with one in the question bank is answered from the bank, and new
+    model output is added to it. Identical requests from concurrent sessions
+    share a single model call.
+    """
+    with span("request", mode="generate"):
+        with span("clean"):
+            cleaned = clean_text(raw_text)
+        observe("mcq_input_chars", len(raw_text), SIZE_BUCKETS)
+
+        backend = backend or get_backend()
+        # Runs on the shared backend loop so rate limits hold across sessions
+        return backend.run(agenerate_mcqs(
+            cleaned, max_questions, use_cache, chunk_tokens, max_concurrency, backend, fallback,
+            stopwords, tokens_per_question, use_bank,
+        ))
+
+def stream_mcqs(raw_text, stopwords, max_questions=5, use_cache=True,
+                chunk_tokens=DEFAULT_CHUNK_TOKENS, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                backend=None, fallback=LOCAL_FALLBACK, tokens_per_question=TOKENS_PER_QUESTION,
+                use_bank=True):
+    """Yield parsed MCQ records as soon as each one has been generated.
+
+    Each question is emitted when its "सही उत्तर:" line arrives on the
+    response stream, so the first question can be shown long before the model
+    has finished. Cache hits and long documents (which fan out to several
+    calls) yield their questions all at once, as do passages answered from
+    the question bank. If the stream fails and ``fallback`` is set, the
+    questions still missing are filled in locally. Model questions carry a
+    ``grounding`` score against the passage (see ``MCQ_GROUNDING``).
+    """
+    with span("clean"):
+        passage = clean_text(raw_text)
+    observe("mcq_input_chars", len(raw_text), SIZE_BUCKETS)
+    backend = backend or get_backend()
+    yield from backend.iter_sync(astream_mcqs(
+        passage, max_questions, use_cache, chunk_tokens, max_concurrency, backend, fallback,
+        stopwords, tokens_per_question, use_bank,
+    ))
+
+async def astream_mcqs(passage, max_questions=5, use_cache=True,
+                       chunk_tokens=DEFAULT_CHUNK_TOKENS, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                       backend=None, fallback=LOCAL_FALLBACK, stopwords=None,
+                       tokens_per_question=TOKENS_PER_QUESTION, use_bank=True):
+    """Async core of ``stream_mcqs`` for text that has already been cleaned"""
+    backend = backend or get_backend()
+    verifier = new_verifier(passage, stopwords)
+    reused = await asyncio.to_thread(_from_bank, passage, max_questions, backend) if use_bank else None
+    if reused:
+        for mcq in ground_mcq_list(reused, verifier):
+            yield mcq
+        return
+
+    cleaned = select_prompt_text(passage, max_questions, stopwords, tokens_per_question)
+    if chunk_tokens and max_questions > 1 and estimate_tokens(cleaned) > chunk_tokens:
+        # Already selected above, so the fan-out sends it as is
+        mcqs = ground_mcq_list(parse_mcqs(await agenerate_mcqs_long(
+            cleaned, max_questions, use_cache, chunk_tokens, max_concurrency, backend, fallback,
+        )), verifier)
+        for mcq in mcqs:
+            yield mcq
+        if use_bank:
+            await asyncio.to_thread(_save_to_bank, passage, mcqs, backend)
+        return
+
+    cache, cache_key, cached = _cached(cleaned, max_questions, use_cache, backend)
+    if cached is not None:
+        for mcq in ground_mcq_list(dedupe_mcq_list(parse_mcqs(cached)), verifier):
+            yield mcq
+        return
+
+    deduplicator = new_deduplicator()
+    parser = MCQParser()
+    pieces = []
+    emitted = []
+    if COALESCE:
+        pieces_iter = _stream_flights.stream(cache_key, lambda: backend.stream(cleaned, max_questions))
+    else:
+        pieces_iter = backend.stream(cleaned, max_questions)
+    try:
+        async with contextlib.aclosing(pieces_iter):
+            async for piece in pieces_iter:
+                pieces.append(piece)
+                for mcq in ground_mcq_list(dedupe_mcq_list(parser.feed(piece), deduplicator), verifier):
+                    emitted.append(mcq)
+                    yield mcq
+        for mcq in ground_mcq_list(dedupe_mcq_list(parser.close(), deduplicator), verifier):
+            emitted.append(mcq)
+            yield mcq
+    except MCQGenerationError as e:
+        # The last question is only complete at the end of the text; keep it if its answer arrived
+        finished = [mcq for mcq in parser.close() if mcq.correct_index is not None]
+        for mcq in ground_mcq_list(dedupe_mcq_list(finished, deduplicator), verifier):
+            emitted.append(mcq)
+            yield mcq
+        missing = max_questions - len(emitted)
+        if missing > 0:
+            if not _uses_fallback(backend, fallback):
+                raise
+            local = get_local_backend().generator.generate(cleaned, missing)
+            if not local:
+                raise
+            incr("mcq_fallbacks_total", backend=backend.name, error=type(e).__name__)
+            log_event("fallback", level=logging.WARNING, sample=1, backend=backend.name, error=repr(e))
+            for mcq in dedupe_mcq_list(local, deduplicator):
+                yield mcq
+            return
+        # Every question arrived before the stream broke, so the set is complete
+        log_event("stream_error_after_completion", level=logging.WARNING, sample=1,
+                  backend=backend.name, error=repr(e))
+
+    if cache is not None:
+        cache.set(cache_key, "".join(pieces).strip())
+    if use_bank:
+        await asyncio.to_thread(_save_to_bank, passage, emitted, backend)
+
+def allocate_questions(chunks, max_questions):
+    """Split the question budget across chunks in proportion to their size"""
+    sizes = [estimate_tokens(chunk) for chunk in chunks]
+    total = sum(sizes)
+    # Every chunk gets one question, the rest goes by largest remainder
+    spare = max_questions - len(chunks)
+    shares = [spare * size / total for size in sizes]
+    budget = [1 + int(share) for share in shares]
+    leftover = max_questions - sum(budget)
+    by_remainder = sorted(range(len(chunks)), key=lambda i: shares[i] - int(shares[i]), reverse=True)
+    for i in by_remainder[:leftover]:
+        budget[i] += 1
+    return budget
+
+async def agenerate_mcqs_long(cleaned, max_questions=5, use_cache=True,
+                              chunk_tokens=DEFAULT_CHUNK_TOKENS, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                              backend=None, fallback=LOCAL_FALLBACK):
+    """Generate MCQs for a long cleaned passage by fanning out sentence-aligned chunks.
+
+    Chunks are generated concurrently (at most ``max_concurrency`` in flight)
+    so wall-clock time tracks the slowest chunk rather than the sum of all of
+    them, and the per-chunk answers are merged into one numbered MCQ set.
+    """
+    sentences = split_sentences(cleaned)
+    # Never produce more chunks than questions, each chunk must get at least one
+    max_tokens = max(chunk_tokens, math.ceil(estimate_tokens(cleaned) / max_questions))
+    chunks = chunk_sentences(sentences, max_tokens)
+    while len(chunks) > max_questions:
+        max_tokens = int(max_tokens * 1.5)
+        chunks = chunk_sentences(sentences, max_tokens)
+    if len(chunks) <= 1:
+        return await _agenerate_cleaned(cleaned, max_questions, use_cache, backend, fallback)
+
+    budget = allocate_questions(chunks, max_questions)
+    log_event("long_document", chunks=len(chunks), budget=budget)
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def generate_chunk(chunk, n):
+        async with semaphore:
+            return await _agenerate_cleaned(chunk, n, use_cache, backend, fallback)
+
+    results = await asyncio.gather(
+        *(generate_chunk(chunk, n) for chunk, n in zip(chunks, budget)),
+        return_exceptions=True,
+    )
+    return merge_mcq_texts(results)
+
+def merge_mcq_texts(results):
+    """Merge several generated MCQ texts into one sequentially numbered set.
+
+    Near-duplicates across the texts are dropped. ``results`` may contain
+    ``MCQGenerationError`` instances for chunks that failed; they are skipped
+    unless every chunk failed, in which case the first error is raised.
+    """
+    mcqs = []
+    errors = []
+    for result in results:
+        if isinstance(result, BaseException):
+            if not isinstance(result, MCQGenerationError):
+                raise result
+            errors.append(result)
+            continue
+        with span("parse"):
+            mcqs.extend(parse_mcqs(result))
+
+    # Partial failures still return the chunks that worked
+    if not mcqs and errors:
+        raise errors[0]
+
+    return format_mcqs(dedupe_mcq_list(mcqs))
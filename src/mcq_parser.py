@@ -0,0 +1,202 @@
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+OPTION_LETTERS = "कखगघ"
+NEPALI_DIGITS = str.maketrans("0123456789", "०१२३४५६७८९")
+LOCAL_NOTE = "स्थानीय MCQ सिर्जना गरिएको छ"
+MARKUP = "*#>"
+OPTION_STARTS = OPTION_LETTERS + "("
+
+# Each line is classified once with these anchored patterns
+# Bold that closes right after a label ("**क)** ...", "**ख**") is skipped with it
+QUESTION_RE = re.compile(r'(?:प्रश्न\s*)?[०-९\d]+\s*[.):]\**\s*(.*)')
+OPTION_RE = re.compile(r'\(?([कखगघ])(?:[).:]|\s)\**\s*(.*)')
+ANSWER_RE = re.compile(r'सही\s*उत्तर\s*\**\s*[:：]?\s*\**\s*\(?([कखगघ])?\**(?:[).:]|\s|$)\s*(.*)')
+
+
+@dataclass(slots=True)
+class MCQ:
+    """One parsed question; ``span`` is its (start, end) offset in the source text.
+
+    ``local`` marks questions from the rule-based generator rather than the model.
+    ``grounding`` is the passage-support score from ``src.utils.grounding``
+    (None when the question was not checked).
+    """
+    question: str
+    options: List[str]
+    correct_index: Optional[int]
+    span: Tuple[int, int]
+    local: bool = False
+    grounding: Optional[float] = None
+
+    def to_dict(self):
+        return {
+            "question": self.question,
+            "options": list(self.options),
+            "correct_index": self.correct_index,
+            "span": list(self.span),
+            "local": self.local,
+            "grounding": self.grounding,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Inverse of ``to_dict``"""
+        return cls(data["question"], list(data["options"]), data["correct_index"],
+                   tuple(data.get("span", (0, 0))), data.get("local", False), data.get("grounding"))
+
+
+class _Draft:
+    __slots__ = ("question", "options", "letters", "answer", "start", "end", "local")
+
+    def __init__(self, question, start, end, local=False):
+        self.question = question
+        self.options = []
+        self.letters = []
+        self.answer = None
+        self.start = start
+        self.end = end
+        self.local = local
+
+    def finish(self):
+        """Return the finished MCQ, or None if it is not a usable question"""
+        if len(self.options) < 2:
+            return None
+        correct = None
+        letter, answer_text = self.answer or (None, "")
+        if letter in self.letters:
+            correct = self.letters.index(letter)
+        elif answer_text in self.options:
+            correct = self.options.index(answer_text)
+        return MCQ(self.question, self.options, correct, (self.start, self.end), self.local)
+
+
+class MCQParser:
+    """Line-oriented MCQ parser that makes one pass over the model output.
+
+    Text can be fed in arbitrary pieces with ``feed``; every question is
+    returned as soon as its "सही उत्तर:" line (or the next question) has been
+    seen, which is what lets callers render questions while a response is
+    still streaming. ``close`` flushes whatever is left.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._offset = 0
+        self._draft = None
+        # Set once the local-generation note has been seen
+        self._local = False
+
+    def feed(self, chunk):
+        """Consume ``chunk`` and return the MCQs completed by it"""
+        lines = (self._buffer + chunk).split("\n")
+        # The last piece has no newline yet and waits for the next chunk
+        self._buffer = lines.pop()
+        done = []
+        offset = self._offset
+        for raw in lines:
+            end = offset + len(raw)
+            self._line(raw, offset, end, done)
+            offset = end + 1
+        self._offset = offset
+        return done
+
+    def close(self):
+        """Flush the trailing partial line and any question still open"""
+        done = []
+        if self._buffer:
+            self._line(self._buffer, self._offset, self._offset + len(self._buffer), done)
+            self._offset += len(self._buffer)
+            self._buffer = ""
+        self._emit(done)
+        return done
+
+    def _emit(self, done):
+        if self._draft is not None:
+            mcq = self._draft.finish()
+            if mcq is not None:
+                done.append(mcq)
+            self._draft = None
+
+    def _line(self, raw, start, end, done):
+        line = raw.strip()
+        if not line:
+            return
+        if line[0] in MARKUP:
+            line = line.lstrip("*#> ").rstrip("*").strip()
+            if not line:
+                return
+        draft = self._draft
+        first = line[0]
+
+        # Dispatch on the first character so each line runs at most one regex
+        if first == "स" and line.startswith("सही"):
+            match = ANSWER_RE.match(line)
+            if match:
+                if draft is not None:
+                    draft.answer = (match.group(1), match.group(2).strip())
+                    draft.end = end
+                    self._emit(done)
+                return
+        elif first in OPTION_STARTS and draft is not None:
+            match = OPTION_RE.match(line)
+            if match and match.group(1) not in draft.letters and match.group(2):
+                draft.letters.append(match.group(1))
+                draft.options.append(match.group(2).rstrip())
+                draft.end = end
+                return
+        elif first.isdigit() or first == "प":
+            match = QUESTION_RE.match(line)
+            if match:
+                self._emit(done)
+                self._draft = _Draft(match.group(1).strip(), start, end, self._local)
+                return
+
+        if LOCAL_NOTE in line:
+            # Inside a question block the note marks only that question;
+            # anywhere else it heads a set that is local throughout
+            if draft is not None and draft.options:
+                draft.local = True
+            else:
+                self._local = True
+            return
+        if draft is None or draft.options:
+            # Unnumbered question: any free line once the previous one has options
+            self._emit(done)
+            self._draft = _Draft(line, start, end, self._local)
+        elif draft.question:
+            draft.question += " " + line
+            draft.end = end
+        else:
+            draft.question = line
+            draft.end = end
+
+
+def parse_mcqs(mcq_text):
+    """Parse model output into a list of MCQ records in one pass"""
+    parser = MCQParser()
+    mcqs = parser.feed(mcq_text)
+    mcqs.extend(parser.close())
+    return mcqs
+
+
+def format_mcqs(mcqs, start=1):
+    """Render MCQ records back into the numbered text format the prompt asks for.
+
+    Sets of locally generated questions are headed by ``LOCAL_NOTE``; in a
+    set that mixes them with model questions the note goes inside each local
+    question's block instead, so ``parse_mcqs`` restores ``local`` per question.
+    Numbering begins at ``start``, for sets rendered a few questions at a time.
+    """
+    all_local = bool(mcqs) and all(mcq.local for mcq in mcqs)
+    blocks = [LOCAL_NOTE + "।"] if all_local else []
+    for number, mcq in enumerate(mcqs, start=start):
+        lines = [f"{str(number).translate(NEPALI_DIGITS)}. {mcq.question}"]
+        lines.extend(f"{letter}) {option}" for letter, option in zip(OPTION_LETTERS, mcq.options))
+        if mcq.local and not all_local:
+            lines.append(LOCAL_NOTE + "।")
+        if mcq.correct_index is not None:
+            lines.append(f"सही उत्तर: {OPTION_LETTERS[mcq.correct_index]}")
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
@@ -0,0 +1,176 @@
+"""JSON output format for MCQs: schema, item validation and an incremental parser.
+
+In JSON mode the model answers with an array of objects matching
+``MCQ_SCHEMA`` instead of the numbered free-text format. Each object is
+checked on its own, so one malformed question costs only that question: the
+client re-requests just the missing ones instead of regenerating the set.
+
+``JSONMCQParser`` works like ``MCQParser``: it is fed the answer in
+arbitrary pieces and returns every item as soon as its closing brace has
+arrived, which keeps streaming working in JSON mode. Model output is rarely
+clean JSON as a whole (code fences, a wrapper object, a cut-off last item),
+so items are cut out of the text by bracket matching and decoded one by one
+rather than with a single ``json.loads``.
+"""
+
+import json
+import re
+
+from src.mcq_parser import MCQ, OPTION_LETTERS
+
+OPTION_COUNT = 4
+
+MCQ_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "question": {"type": "string"},
+            "options": {
+                "type": "array",
+                "items": {"type": "string"},
+                "minItems": OPTION_COUNT,
+                "maxItems": OPTION_COUNT,
+            },
+            "answer": {"type": "string", "enum": list(OPTION_LETTERS)},
+        },
+        "required": ["question", "options", "answer"],
+    },
+}
+
+# Escapes are matched as a pair so an escaped quote never ends a string;
+# a lone backslash at the end of a piece waits for the next one
+SCAN_RE = re.compile(r'\\.?|["{}\[\]]', re.S)
+# "क) " style labels some answers repeat inside the option text
+OPTION_LABEL_RE = re.compile(r'^\(?[कखगघ][).:]\s*')
+LATIN_LETTERS = "ABCD"
+
+
+def validate_item(item):
+    """``MCQ`` for one decoded item, or None if it does not match ``MCQ_SCHEMA``.
+
+    Small, unambiguous slips are repaired rather than rejected: option labels
+    copied into the text, and an answer given as A-D, as a 0-3 index or as
+    the text of the correct option.
+    """
+    if not isinstance(item, dict):
+        return None
+    question = item.get("question")
+    options = item.get("options")
+    if not isinstance(question, str) or not question.strip():
+        return None
+    if not isinstance(options, list) or len(options) != OPTION_COUNT:
+        return None
+    if not all(isinstance(option, str) for option in options):
+        return None
+    options = [OPTION_LABEL_RE.sub("", option.strip()) for option in options]
+    if not all(options) or len(set(options)) != OPTION_COUNT:
+        return None
+
+    answer = item.get("answer")
+    if isinstance(answer, str):
+        answer = answer.strip().rstrip(").")
+        if answer in OPTION_LETTERS:
+            correct = OPTION_LETTERS.index(answer)
+        elif len(answer) == 1 and answer.upper() in LATIN_LETTERS:
+            correct = LATIN_LETTERS.index(answer.upper())
+        else:
+            answer = OPTION_LABEL_RE.sub("", answer)
+            correct = options.index(answer) if answer in options else None
+    elif isinstance(answer, int) and not isinstance(answer, bool) and 0 <= answer < OPTION_COUNT:
+        correct = answer
+    else:
+        correct = None
+    if correct is None:
+        return None
+    return MCQ(question.strip(), options, correct, (0, 0))
+
+
+class JSONMCQParser:
+    """Incremental parser for a JSON array of MCQ objects.
+
+    ``feed`` returns the valid questions completed by a piece; ``invalid``
+    counts items that were malformed, failed validation or were cut off.
+    Items are the objects directly inside the first array that contains an
+    object, so both a bare array and ``{"questions": [...]}`` work.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._item_level = None
+        self._item_start = None
+        self.invalid = 0
+
+    def feed(self, chunk):
+        """Consume ``chunk`` and return the MCQs completed by it"""
+        self._buffer += chunk
+        done = []
+        buffer = self._buffer
+        pos = self._pos
+        for match in SCAN_RE.finditer(buffer, pos):
+            token = match.group()
+            if token[0] == "\\":
+                if len(token) == 1:
+                    # Resume at the lone backslash once its pair has arrived
+                    pos = match.start()
+                    break
+            elif token == '"':
+                self._in_string = not self._in_string
+            elif not self._in_string:
+                self._bracket(token, match.start(), done)
+            pos = match.end()
+        else:
+            pos = len(buffer)
+
+        # Keep only the unfinished item (if any) for the next piece
+        keep = self._item_start if self._item_start is not None else pos
+        self._buffer = buffer[keep:]
+        self._pos = pos - keep
+        if self._item_start is not None:
+            self._item_start = 0
+        return done
+
+    def close(self):
+        """Count an item left open by a truncated answer as invalid"""
+        if self._item_start is not None:
+            self.invalid += 1
+            self._item_start = None
+        self._buffer = ""
+        self._pos = 0
+        return []
+
+    def _bracket(self, token, position, done):
+        stack = self._stack
+        if token in "[{":
+            if token == "{" and stack and stack[-1] == "[":
+                if self._item_level is None:
+                    self._item_level = len(stack)
+                if len(stack) == self._item_level:
+                    self._item_start = position
+            stack.append(token)
+            return
+        if not stack:
+            return
+        stack.pop()
+        if token == "}" and self._item_start is not None and len(stack) == self._item_level:
+            raw = self._buffer[self._item_start:position + 1]
+            self._item_start = None
+            try:
+                mcq = validate_item(json.loads(raw))
+            except ValueError:
+                mcq = None
+            if mcq is None:
+                self.invalid += 1
+            else:
+                done.append(mcq)
+
+
+def parse_json_mcqs(text):
+    """Valid MCQs in a complete JSON answer and the number of invalid items"""
+    parser = JSONMCQParser()
+    mcqs = parser.feed(text)
+    parser.close()
+    return mcqs, parser.invalid
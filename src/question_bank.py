@@ -0,0 +1,290 @@
+"""Persistent bank of generated MCQs with full-text search and passage reuse.
+
+Every passage that gets model-generated questions is stored with its
+questions in one SQLite file (WAL mode, so Streamlit sessions, the batch
+tool and readers work concurrently). Question and option text is indexed
+with FTS5 for search, and each passage's MinHash band keys are indexed so a
+new passage that overlaps heavily with a stored one can be answered from the
+bank instead of the model.
+
+Browse it from the command line::
+
+    python -m src.question_bank stats
+    python -m src.question_bank search "सगरमाथा" --limit 10
+    python -m src.question_bank list --after 0 --limit 50
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from src.mcq_parser import MCQ, format_mcqs
+from src.utils.minhash import MinHashLSH, band_keys, signature_from_bytes, similarity
+from src.utils.text_processing import DATA_DIR
+
+DEFAULT_BANK_PATH = os.getenv("MCQ_BANK_PATH", os.path.join(DATA_DIR, "question_bank.sqlite3"))
+# Passages at least this similar (estimated Jaccard of shingles) count as the same text
+DEFAULT_REUSE_THRESHOLD = 0.8
+# Keeps Devanagari vowel signs and virama (Mc/Mn) inside tokens; the default
+# unicode61 categories would split words at every matra
+FTS_TOKENIZER = "unicode61 categories 'L* N* Co Mc Mn'"
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS passages (
+        id INTEGER PRIMARY KEY,
+        text_hash TEXT NOT NULL UNIQUE,
+        text TEXT NOT NULL,
+        signature BLOB NOT NULL,
+        created_at REAL NOT NULL
+    )
+    """,
+    "CREATE TABLE IF NOT EXISTS passage_bands (band INTEGER NOT NULL, passage_id INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS passage_bands_band ON passage_bands (band)",
+    """
+    CREATE TABLE IF NOT EXISTS questions (
+        id INTEGER PRIMARY KEY,
+        passage_id INTEGER NOT NULL REFERENCES passages (id),
+        question TEXT NOT NULL,
+        options TEXT NOT NULL,
+        correct_index INTEGER,
+        model TEXT NOT NULL,
+        created_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS questions_passage ON questions (passage_id)",
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5(
+        question, options, content='questions', content_rowid='id', tokenize="{FTS_TOKENIZER}"
+    )
+    """,
+    # Options are indexed as plain text, not their JSON encoding
+    """
+    CREATE TRIGGER IF NOT EXISTS questions_ai AFTER INSERT ON questions BEGIN
+        INSERT INTO questions_fts (rowid, question, options)
+        VALUES (new.id, new.question, (SELECT group_concat(value, ' ') FROM json_each(new.options)));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS questions_ad AFTER DELETE ON questions BEGIN
+        INSERT INTO questions_fts (questions_fts, rowid, question, options)
+        VALUES ('delete', old.id, old.question, (SELECT group_concat(value, ' ') FROM json_each(old.options)));
+    END
+    """,
+]
+
+
+def _row_to_mcq(row):
+    question, options, correct_index = row
+    return MCQ(question, json.loads(options), correct_index, (0, 0))
+
+
+def fts_query(text):
+    """FTS5 query matching every word of ``text`` (quoted, so user input is never syntax)"""
+    words = text.split()
+    return " ".join('"' + w.replace('"', '""') + '"' for w in words)
+
+
+class QuestionBank:
+    """SQLite question bank; one instance is safe to share across threads"""
+
+    def __init__(self, path=DEFAULT_BANK_PATH, reuse_threshold=DEFAULT_REUSE_THRESHOLD):
+        self.path = path
+        self._lsh = MinHashLSH(reuse_threshold)
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+
+    def _signature(self, text):
+        return self._lsh.hasher.signature(text)
+
+    def add(self, passage, mcqs, model_name):
+        """Store ``passage`` and its questions in one transaction; returns the passage id.
+
+        Locally generated questions are skipped so they never stand in for
+        model output later. Adding a passage that is already stored only adds
+        the new questions.
+        """
+        mcqs = [mcq for mcq in mcqs if not mcq.local]
+        if not mcqs:
+            return None
+        text_hash = hashlib.sha256(passage.encode("utf-8")).hexdigest()
+        signature = self._signature(passage)
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT id FROM passages WHERE text_hash = ?", (text_hash,)).fetchone()
+                if row is None:
+                    passage_id = self._conn.execute(
+                        "INSERT INTO passages (text_hash, text, signature, created_at) VALUES (?, ?, ?, ?)",
+                        (text_hash, passage, signature.tobytes(), now),
+                    ).lastrowid
+                    self._conn.executemany(
+                        "INSERT INTO passage_bands (band, passage_id) VALUES (?, ?)",
+                        [(band, passage_id) for band in band_keys(signature, self._lsh.bands)],
+                    )
+                    existing = set()
+                else:
+                    passage_id = row[0]
+                    existing = {q for (q,) in self._conn.execute(
+                        "SELECT question FROM questions WHERE passage_id = ?", (passage_id,)
+                    )}
+                self._conn.executemany(
+                    "INSERT INTO questions (passage_id, question, options, correct_index, model, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (passage_id, mcq.question, json.dumps(mcq.options, ensure_ascii=False),
+                         mcq.correct_index, model_name, now)
+                        for mcq in mcqs if mcq.question not in existing
+                    ],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return passage_id
+
+    def similar_passages(self, passage, model_name=None):
+        """Ids of stored passages that overlap heavily with ``passage``, most similar first.
+
+        With ``model_name`` only passages with questions from that model count.
+        """
+        signature = self._signature(passage)
+        keys = band_keys(signature, self._lsh.bands)
+        query = (
+            "SELECT id, signature FROM passages WHERE id IN ("
+            f"SELECT passage_id FROM passage_bands WHERE band IN ({','.join('?' * len(keys))}))"
+        )
+        params = list(keys)
+        if model_name is not None:
+            query += " AND EXISTS (SELECT 1 FROM questions WHERE passage_id = passages.id AND model = ?)"
+            params.append(model_name)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        scored = [
+            (similarity(signature, signature_from_bytes(blob)), passage_id)
+            for passage_id, blob in rows
+        ]
+        return [passage_id for score, passage_id in sorted(scored, reverse=True) if score >= self._lsh.threshold]
+
+    def questions_for(self, passage_ids, model_name=None):
+        """Stored questions of the given passages, in passage then insertion order.
+
+        With ``model_name`` only that model's questions are returned.
+        """
+        query = "SELECT question, options, correct_index FROM questions WHERE passage_id = ?"
+        if model_name is not None:
+            query += " AND model = ?"
+        query += " ORDER BY id"
+        mcqs = []
+        with self._lock:
+            for passage_id in passage_ids:
+                params = (passage_id,) if model_name is None else (passage_id, model_name)
+                mcqs.extend(_row_to_mcq(row) for row in self._conn.execute(query, params))
+        return mcqs
+
+    def reuse(self, passage, max_questions, model_name=None):
+        """Up to ``max_questions`` stored questions for a passage like ``passage``, or None.
+
+        Pass the backend's ``model_name`` so questions written by another
+        backend (a fake, the local generator) are never served as its own.
+        """
+        passage_ids = self.similar_passages(passage, model_name)
+        if not passage_ids:
+            return None
+        mcqs = self.questions_for(passage_ids, model_name)
+        if len(mcqs) < max_questions:
+            return None
+        return mcqs[:max_questions]
+
+    def search(self, text, limit=20, offset=0):
+        """Questions whose question or option text contains every word of ``text``, best match first"""
+        query = fts_query(text)
+        if not query:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT q.question, q.options, q.correct_index FROM questions_fts "
+                "JOIN questions q ON q.id = questions_fts.rowid "
+                "WHERE questions_fts MATCH ? ORDER BY bm25(questions_fts) LIMIT ? OFFSET ?",
+                (query, limit, offset),
+            ).fetchall()
+        return [_row_to_mcq(row) for row in rows]
+
+    def page(self, after_id=0, limit=50):
+        """``(id, MCQ)`` pairs with ids above ``after_id``; pass the last id to get the next page"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, question, options, correct_index FROM questions WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit),
+            ).fetchall()
+        return [(row[0], _row_to_mcq(row[1:])) for row in rows]
+
+    def stats(self):
+        with self._lock:
+            passages = self._conn.execute("SELECT COUNT(*) FROM passages").fetchone()[0]
+            questions = self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+        return {"passages": passages, "questions": questions}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_bank = None
+_bank_lock = threading.Lock()
+
+
+def get_question_bank():
+    """Return the process-wide bank, or None when ``MCQ_BANK_PATH`` is set empty"""
+    global _bank
+    if not DEFAULT_BANK_PATH:
+        return None
+    with _bank_lock:
+        if _bank is None:
+            _bank = QuestionBank()
+        return _bank
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect the MCQ question bank.")
+    parser.add_argument("--path", default=DEFAULT_BANK_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="count passages and questions")
+    search = commands.add_parser("search", help="full-text search over questions and options")
+    search.add_argument("text")
+    search.add_argument("--limit", type=int, default=20)
+    search.add_argument("--offset", type=int, default=0)
+    listing = commands.add_parser("list", help="page through questions by id")
+    listing.add_argument("--after", type=int, default=0)
+    listing.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    bank = QuestionBank(args.path)
+    if args.command == "stats":
+        print(json.dumps(bank.stats()))
+    elif args.command == "search":
+        print(format_mcqs(bank.search(args.text, args.limit, args.offset)))
+    else:
+        page = bank.page(args.after, args.limit)
+        print(format_mcqs([mcq for _, mcq in page]))
+        if page:
+            print(f"\n(next page: --after {page[-1][0]})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""In-process metrics, per-stage timing spans and sampled structured logs.
+
+Stages of a generation (``clean``, ``select``, ``prompt``, ``api``, ``parse``,
+``render``) are timed with ``span`` into the ``mcq_stage_seconds`` histogram;
+counters and size histograms cover cache hits, retries, fallbacks, errors and
+input/output characters. ``snapshot`` returns everything as a JSON-ready dict
+and ``render_prometheus`` in the Prometheus text format.
+
+``MCQ_METRICS=0`` turns recording off: ``span`` then returns a shared no-op
+context manager and ``incr``/``observe`` return after one flag check.
+``log_event`` writes one JSON line to the ``mcq`` logger for a sampled
+fraction (``MCQ_LOG_SAMPLE``, default 1%) of routine events; callers pass
+``sample=1`` for warnings and errors so those are always kept.
+"""
+
+import bisect
+import contextlib
+import functools
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+ENABLED = os.getenv("MCQ_METRICS", "1") != "0"
+LOG_SAMPLE_RATE = float(os.getenv("MCQ_LOG_SAMPLE", "0.01"))
+
+# Seconds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Characters
+SIZE_BUCKETS = (100, 300, 1_000, 3_000, 10_000, 30_000, 100_000, 300_000, 1_000_000)
+
+logger = logging.getLogger("mcq")
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def to_dict(self):
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {"count": self.count, "sum": self.sum, "buckets": buckets}
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Registry:
+    """Thread-safe store of labelled counters and histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def incr(self, name, value, labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets, labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def snapshot(self):
+        """All metrics as ``{"counters": [...], "histograms": [...]}``"""
+        with self._lock:
+            return {
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self._counters.items())
+                ],
+                "histograms": [
+                    {"name": name, "labels": dict(labels), **histogram.to_dict()}
+                    for (name, labels), histogram in sorted(self._histograms.items())
+                ],
+            }
+
+    def render_prometheus(self):
+        """Metrics in the Prometheus text exposition format"""
+        lines = []
+        typed = set()
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name}{_label_text(labels)} {value}")
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_label_text(labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_sum{_label_text(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{_label_text(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+REGISTRY = Registry()
+
+
+def incr(name, value=1, **labels):
+    """Add ``value`` to the counter ``name`` with ``labels``"""
+    if ENABLED:
+        REGISTRY.incr(name, value, labels)
+
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    """Record ``value`` in the histogram ``name`` with ``labels``"""
+    if ENABLED:
+        REGISTRY.observe(name, value, buckets, labels)
+
+
+class _Span:
+    __slots__ = ("labels", "start")
+
+    def __init__(self, labels):
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        REGISTRY.observe("mcq_stage_seconds", time.perf_counter() - self.start, LATENCY_BUCKETS, self.labels)
+        # Consumers closing a generator early is not an error
+        if exc_type is not None and issubclass(exc_type, Exception):
+            REGISTRY.incr("mcq_stage_errors_total", 1, {**self.labels, "error": exc_type.__name__})
+        return False
+
+
+_NO_SPAN = contextlib.nullcontext()
+
+
+def span(stage, **labels):
+    """Context manager timing one stage into ``mcq_stage_seconds{stage=...}``"""
+    if not ENABLED:
+        return _NO_SPAN
+    labels["stage"] = stage
+    return _Span(labels)
+
+
+def timed(stage, **labels):
+    """Decorator running the function inside ``span(stage, **labels)``"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def log_event(event, level=logging.INFO, sample=None, **fields):
+    """Log ``event`` and ``fields`` as one JSON line, for a sampled fraction of calls"""
+    rate = LOG_SAMPLE_RATE if sample is None else sample
+    if rate < 1 and random.random() >= rate:
+        return
+    if logger.isEnabledFor(level):
+        logger.log(level, json.dumps({"event": event, **fields}, ensure_ascii=False, default=str))
+
+
+def snapshot():
+    return REGISTRY.snapshot()
+
+
+def render_prometheus():
+    return REGISTRY.render_prometheus()
+
+
+def write_snapshot(path):
+    """Write the JSON snapshot to ``path``"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, ensure_ascii=False, indent=2)
+
+
+def stage_summary():
+    """Mean seconds and count per stage, for quick reports"""
+    summary = {}
+    for histogram in snapshot()["histograms"]:
+        if histogram["name"] == "mcq_stage_seconds" and histogram["count"]:
+            stage = histogram["labels"]["stage"]
+            total = summary.setdefault(stage, {"count": 0, "seconds": 0.0})
+            total["count"] += histogram["count"]
+            total["seconds"] += histogram["sum"]
+    return {stage: {"count": s["count"], "mean_ms": s["seconds"] / s["count"] * 1e3} for stage, s in summary.items()}
@@ -0,0 +1,142 @@
+"""Near-duplicate detection with MinHash signatures and LSH banding.
+
+A text is reduced to its set of character shingles and summarized by
+``num_perm`` minimum hash values; the fraction of equal positions between two
+signatures estimates the Jaccard similarity of the shingle sets. Signatures
+are cut into bands, and only items sharing a whole band are ever compared, so
+lookups stay sub-linear in the number of indexed items. Band keys are plain
+64-bit integers, which lets a database index them as well
+(see ``src.question_bank``).
+"""
+
+import hashlib
+import re
+import zlib
+
+import numpy as np
+
+from src.utils.normalizer import normalize_text
+
+SHINGLE_CHARS = 5
+NUM_PERM = 128
+DEFAULT_THRESHOLD = 0.7
+# Mersenne prime 2^31 - 1 keeps a * x + b inside uint64
+PRIME = np.uint64((1 << 31) - 1)
+BLANKS_RE = re.compile(r'_+')
+
+
+def choose_bands(num_perm, threshold):
+    """Bands and rows per band whose LSH threshold (1/b)^(1/r) is closest below ``threshold``.
+
+    Erring below means slightly more candidates to verify but no missed pairs
+    near the threshold.
+    """
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    below = [(b, r) for b, r in options if (1 / b) ** (1 / r) <= threshold]
+    return max(below or options, key=lambda br: (1 / br[0]) ** (1 / br[1]))
+
+
+class MinHasher:
+    """Computes signatures; hashers with the same seed and size produce comparable signatures"""
+
+    def __init__(self, num_perm=NUM_PERM, shingle_chars=SHINGLE_CHARS, seed=1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_chars = shingle_chars
+        self._a = rng.integers(1, int(PRIME), size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, int(PRIME), size=(num_perm, 1), dtype=np.uint64)
+
+    def shingles(self, text):
+        """Character shingles of the normalized text (blanks and spacing do not matter)"""
+        text = normalize_text(BLANKS_RE.sub(" ", text))
+        k = self.shingle_chars
+        if len(text) <= k:
+            return {text}
+        return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+    def signature(self, text):
+        """MinHash signature of ``text`` as a uint32 array of length ``num_perm``"""
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in self.shingles(text)), dtype=np.uint64
+        ) % PRIME
+        # One universal hash per permutation, applied to every shingle at once
+        return ((self._a * hashes + self._b) % PRIME).min(axis=1).astype(np.uint32)
+
+
+def signature_from_bytes(data):
+    """Inverse of ``signature.tobytes()`` for signatures read back from storage"""
+    return np.frombuffer(data, dtype=np.uint32)
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.count_nonzero(sig_a == sig_b)) / len(sig_a)
+
+
+def band_keys(signature, bands):
+    """One 64-bit key per band; equal keys mean the band's rows are identical"""
+    rows = len(signature) // bands
+    data = signature.astype("<u4").tobytes()
+    width = rows * 4
+    return [
+        int.from_bytes(hashlib.blake2b(data[i * width:(i + 1) * width], digest_size=8,
+                                       person=i.to_bytes(2, "little")).digest(), "little", signed=True)
+        for i in range(bands)
+    ]
+
+
+class MinHashLSH:
+    """In-memory LSH index from item keys to signatures"""
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, hasher=None):
+        self.threshold = threshold
+        self.hasher = hasher or MinHasher()
+        self.bands, self.rows = choose_bands(self.hasher.num_perm, threshold)
+        self._buckets = {}
+        self._signatures = {}
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def query(self, signature):
+        """Keys of indexed items estimated at least ``threshold`` similar to ``signature``"""
+        candidates = set()
+        for key in band_keys(signature, self.bands):
+            candidates.update(self._buckets.get(key, ()))
+        return [item for item in candidates
+                if similarity(signature, self._signatures[item]) >= self.threshold]
+
+    def insert(self, item, signature):
+        self._signatures[item] = signature
+        for key in band_keys(signature, self.bands):
+            self._buckets.setdefault(key, []).append(item)
+
+
+def mcq_text(mcq):
+    """What makes two questions the same: the question and its correct option"""
+    if mcq.correct_index is not None and mcq.correct_index < len(mcq.options):
+        return f"{mcq.question} {mcq.options[mcq.correct_index]}"
+    return mcq.question
+
+
+class MCQDeduplicator:
+    """Drops questions that nearly repeat one already seen; use one per quiz or bank"""
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, lsh=None):
+        self.lsh = lsh or MinHashLSH(threshold)
+
+    def is_new(self, mcq):
+        """Remember ``mcq`` and return True, or return False if it is a near-duplicate"""
+        signature = self.lsh.hasher.signature(mcq_text(mcq))
+        if self.lsh.query(signature):
+            return False
+        self.lsh.insert(len(self.lsh), signature)
+        return True
+
+    def filter(self, mcqs):
+        return [mcq for mcq in mcqs if self.is_new(mcq)]
+
+
+def dedupe_mcqs(mcqs, threshold=DEFAULT_THRESHOLD):
+    """Keep the first of every group of near-duplicate questions, in order"""
+    return MCQDeduplicator(threshold).filter(mcqs)
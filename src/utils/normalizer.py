@@ -0,0 +1,174 @@
+import re
+import unicodedata
+
+DEVANAGARI_DIGITS = "०१२३४५६७८९"
+ARABIC_DIGITS = "0123456789"
+DANDA = "।"
+DOUBLE_DANDA = "॥"
+NUKTA = "\u093c"
+# Characters that never take a space before them
+CLOSING_PUNCTUATION = DANDA + DOUBLE_DANDA + ",?"
+
+
+# Letters that NFC composes with (or decomposes into) a nukta
+NUKTA_LETTERS = {"\u0929": "न", "\u0931": "र", "\u0934": "ळ"}
+NUKTA_LETTERS.update(zip("\u0958\u0959\u095a\u095b\u095c\u095d\u095e\u095f", "कखगजडढफय"))
+
+
+def _build_table(digits_from, digits_to, strip_nukta):
+    table = dict(zip(digits_from, digits_to))
+    # ASCII pipes are a common stand-in for the danda
+    table["|"] = DANDA
+    if strip_nukta:
+        # Nepali orthography does not contrast nukta forms, so fold both the
+        # combining nukta and the precomposed letters onto the base letter
+        table[NUKTA] = ""
+        table.update(NUKTA_LETTERS)
+    return table
+
+
+# Precomputed once; each pair is only applied when its character occurs
+TABLES = {
+    ("devanagari", True): _build_table(ARABIC_DIGITS, DEVANAGARI_DIGITS, True),
+    ("devanagari", False): _build_table(ARABIC_DIGITS, DEVANAGARI_DIGITS, False),
+    ("arabic", True): _build_table(DEVANAGARI_DIGITS, ARABIC_DIGITS, True),
+    ("arabic", False): _build_table(DEVANAGARI_DIGITS, ARABIC_DIGITS, False),
+}
+REPLACEMENTS = {key: list(table.items()) for key, table in TABLES.items()}
+
+# Keep the Devanagari block, whitespace, ASCII digits and basic punctuation;
+# this also drops zero-width characters and marks from other scripts
+DISALLOWED_RE = re.compile(r'[^ऀ-ॿ0-9\s,.?|\-]+')
+# Sequences NFC would change once only Devanagari is left: nukta
+# compositions and reordering of the stress signs
+NUKTA_SEQUENCES = NUKTA + "".join(NUKTA_LETTERS)
+STRESS_SIGNS = "\u0951\u0952\u0953\u0954"
+
+
+def _needs_nfc(text, chars):
+    return any(c in text for c in chars)
+
+
+def _normalize(text, key):
+    """Normalize without trimming the ends (shared by the one-shot and streaming APIs).
+
+    Every step is a C-level pass (one regex, ``str.replace``, ``split``);
+    replacements and NFC only run when the characters they affect occur.
+    """
+    text = DISALLOWED_RE.sub("", text)
+    strip_nukta = key[1]
+    if not strip_nukta and _needs_nfc(text, NUKTA_SEQUENCES + STRESS_SIGNS):
+        text = unicodedata.normalize("NFC", text)
+    for source, target in REPLACEMENTS[key]:
+        if source in text:
+            text = text.replace(source, target)
+    # With nukta folded away only stress-sign ordering can still differ from NFC
+    if strip_nukta and _needs_nfc(text, STRESS_SIGNS):
+        text = unicodedata.normalize("NFC", text)
+
+    if not text:
+        return text
+    # Collapse whitespace but keep one space at either end for stream joins
+    leading = " " if text[0].isspace() else ""
+    trailing = " " if text[-1].isspace() else ""
+    text = " ".join(text.split())
+    text = leading + text + trailing if text else " "
+
+    for mark in CLOSING_PUNCTUATION:
+        if " " + mark in text:
+            text = text.replace(" " + mark, mark)
+    if DANDA + DANDA in text:
+        text = text.replace(DANDA + DANDA, DOUBLE_DANDA)
+    return text
+
+
+def normalize_text(text, digits="devanagari", strip_nukta=True):
+    """Canonical form of Nepali text.
+
+    Applies NFC, drops zero-width characters (and nukta unless
+    ``strip_nukta`` is False), unifies digits to Devanagari or Arabic, maps
+    ``|`` and ``।।`` to danda/double danda, removes characters outside the
+    Devanagari block and basic punctuation, and collapses whitespace. Texts
+    that differ only in code-point sequences normalize to the same string.
+    """
+    return _normalize(text, (digits, strip_nukta)).strip()
+
+
+def normalize_batch(texts, digits="devanagari", strip_nukta=True):
+    """Normalize many texts with the same settings"""
+    key = (digits, strip_nukta)
+    return [_normalize(text, key).strip() for text in texts]
+
+
+def _safe_cut(buffer):
+    """Index of a whitespace run that is safe to cut at, or -1.
+
+    Both neighbours must be ordinary characters so that danda rules and
+    combining sequences never straddle a chunk boundary.
+    """
+    end = len(buffer)
+    while True:
+        cut = max(buffer.rfind(" ", 0, end), buffer.rfind("\n", 0, end))
+        if cut <= 0:
+            return -1
+        start, stop = cut, cut + 1
+        while start > 0 and buffer[start - 1].isspace():
+            start -= 1
+        # The run can go on past the space or newline in other whitespace (tabs)
+        while stop < len(buffer) and buffer[stop].isspace():
+            stop += 1
+        if (start > 0 and stop < len(buffer)
+                and buffer[start - 1] not in CLOSING_PUNCTUATION + "|"
+                and buffer[stop] not in CLOSING_PUNCTUATION + "|"
+                and not unicodedata.combining(buffer[stop])):
+            return start
+        end = start
+
+
+def iter_normalized(chunks, digits="devanagari", strip_nukta=True):
+    """Normalize a stream of text chunks, yielding normalized pieces.
+
+    Works in bounded memory on inputs of any size (for example a file read
+    in 1 MB blocks); joining the pieces gives the same result as
+    ``normalize_text`` on the whole input.
+    """
+    key = (digits, strip_nukta)
+    carry = ""
+    started = False
+    pending_space = False
+
+    def emit(piece):
+        nonlocal started, pending_space
+        if not piece.strip():
+            pending_space = pending_space or bool(piece)
+            return ""
+        if piece[0] == " ":
+            piece = piece[1:]
+            pending_space = True
+        out = " " + piece if pending_space and started and piece[0] not in CLOSING_PUNCTUATION else piece
+        pending_space = piece[-1] == " "
+        started = True
+        return out.rstrip(" ")
+
+    for chunk in chunks:
+        # Deleting first (it is per character, so safe per chunk) lets
+        # _safe_cut see the neighbours the whole-text pass will see
+        buffer = carry + DISALLOWED_RE.sub("", chunk)
+        cut = _safe_cut(buffer)
+        if cut < 0:
+            carry = buffer
+            continue
+        carry = buffer[cut:]
+        out = emit(_normalize(buffer[:cut], key))
+        if out:
+            yield out
+    if carry:
+        out = emit(_normalize(carry, key))
+        if out:
+            yield out
+
+
+def iter_normalized_file(path, chunk_size=1 << 20, digits="devanagari", strip_nukta=True):
+    """Normalize a UTF-8 text file in ``chunk_size`` character blocks"""
+    with open(path, "r", encoding="utf-8") as f:
+        yield from iter_normalized(iter(lambda: f.read(chunk_size), ""), digits, strip_nukta)
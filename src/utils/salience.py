@@ -0,0 +1,149 @@
+"""Pick the most informative sentences of a passage under a token budget.
+
+Sentences are rows of a stopword-filtered TF-IDF matrix. Their salience is
+TextRank centrality over cosine similarity (similarity to the passage
+centroid for very long inputs), and they are chosen greedily by salience
+minus redundancy with what is already chosen, so the kept text covers many
+distinct facts rather than paraphrases of one. Kept sentences stay in their
+original order.
+"""
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.utils.text_processing import estimate_tokens, get_tokenizer, split_sentences
+
+DAMPING = 0.85
+ITERATIONS = 30
+# Weight of the redundancy penalty against salience when picking sentences
+REDUNDANCY = 0.5
+# Above this many sentences the similarity matrix gets too big; use the centroid
+MAX_TEXTRANK_SENTENCES = 2000
+# Term columns densified at once when building the similarity matrix
+SIMILARITY_BLOCK_TERMS = 512
+
+
+@dataclass(slots=True)
+class SentenceSelection:
+    """Result of ``select_sentences``; ``text`` is what should be sent to the model"""
+    text: str
+    sentences_kept: int
+    sentences_total: int
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def reduction(self):
+        """Fraction of estimated prompt tokens removed"""
+        return 1 - self.tokens_after / self.tokens_before if self.tokens_before else 0.0
+
+
+def _tfidf(sentence_terms, term_index=None):
+    """COO entries (rows, cols, weights) of the L2-normalized sentence-term matrix and term document counts"""
+    vocabulary = {}
+    rows, cols, counts = [], [], []
+    for row, terms in enumerate(sentence_terms):
+        seen = {}
+        for term in terms:
+            col = vocabulary.setdefault(term, len(vocabulary))
+            seen[col] = seen.get(col, 0) + 1
+        rows.extend([row] * len(seen))
+        cols.extend(seen)
+        counts.extend(seen.values())
+
+    rows = np.asarray(rows, dtype=np.intp)
+    cols = np.asarray(cols, dtype=np.intp)
+    n = len(sentence_terms)
+    df = np.bincount(cols, minlength=len(vocabulary))
+    if term_index is not None:
+        idf = term_index.idf(list(vocabulary))
+    else:
+        idf = np.log((1 + n) / (1 + df)) + 1.0
+    weights = np.log1p(np.asarray(counts, dtype=np.float64)) * idf[cols]
+    norms = np.sqrt(np.bincount(rows, weights * weights, minlength=n))
+    weights /= np.where(norms > 0, norms, 1.0)[rows]
+    return rows, cols, weights, df
+
+
+def _textrank(similarity):
+    """Stationary scores of a damped random walk over the similarity graph"""
+    n = len(similarity)
+    out = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, out, out=np.full_like(similarity, 1.0 / n), where=out > 0)
+    scores = np.full(n, 1.0 / n)
+    for _ in range(ITERATIONS):
+        updated = (1 - DAMPING) / n + DAMPING * (scores @ transition)
+        if np.abs(updated - scores).sum() < 1e-9:
+            return updated
+        scores = updated
+    return scores
+
+
+def rank_sentences(sentence_terms, term_index=None):
+    """Salience of each sentence and their pairwise similarity (None for very long inputs)"""
+    n = len(sentence_terms)
+    rows, cols, weights, df = _tfidf(sentence_terms, term_index)
+    if n <= MAX_TEXTRANK_SENTENCES:
+        # Terms in a single sentence add nothing to similarity. The rest are
+        # densified a block of columns at a time, so memory stays near the
+        # n x n result instead of n x vocabulary
+        shared = np.flatnonzero(df > 1)
+        column = np.full(len(df), -1)
+        column[shared] = np.arange(len(shared))
+        keep = column[cols] >= 0
+        rows, cols, weights = rows[keep], column[cols[keep]], weights[keep]
+        similarity = np.zeros((n, n))
+        for first in range(0, len(shared), SIMILARITY_BLOCK_TERMS):
+            in_block = (cols >= first) & (cols < first + SIMILARITY_BLOCK_TERMS)
+            block = np.zeros((n, min(SIMILARITY_BLOCK_TERMS, len(shared) - first)))
+            block[rows[in_block], cols[in_block] - first] = weights[in_block]
+            similarity += block @ block.T
+        np.fill_diagonal(similarity, 0.0)
+        return _textrank(similarity), similarity
+    centroid = np.bincount(cols, weights, minlength=len(df)) / n
+    return np.bincount(rows, weights * centroid[cols], minlength=n), None
+
+
+def select_sentences(cleaned, token_budget, min_sentences=1, stopwords=frozenset(), term_index=None):
+    """Keep the most salient sentences of ``cleaned`` that fit in ``token_budget`` estimated tokens.
+
+    At least ``min_sentences`` sentences are kept even if they exceed the
+    budget, so every requested question still has a fact of its own. Text
+    that already fits is returned unchanged.
+    """
+    tokens_before = estimate_tokens(cleaned)
+    if tokens_before <= token_budget:
+        count = len(split_sentences(cleaned))
+        return SentenceSelection(cleaned, count, count, tokens_before, tokens_before)
+    # Terms are stems, so "नेपालको" and "नेपालमा" count as the same word
+    pairs = list(get_tokenizer(frozenset(stopwords)).sentence_terms(cleaned))
+    sentences = [sentence.text for sentence, _ in pairs]
+    if len(sentences) <= min_sentences:
+        return SentenceSelection(cleaned, len(sentences), len(sentences), tokens_before, tokens_before)
+
+    sentence_terms = [terms for _, terms in pairs]
+    salience, similarity = rank_sentences(sentence_terms, term_index)
+    salience = salience / (salience.max() or 1.0)
+    sizes = [estimate_tokens(s) for s in sentences]
+
+    chosen = []
+    used = 0
+    available = np.ones(len(sentences), dtype=bool)
+    redundancy = np.zeros(len(sentences))
+    while available.any():
+        gain = np.where(available, salience - REDUNDANCY * redundancy, -math.inf)
+        best = int(gain.argmax())
+        available[best] = False
+        if used + sizes[best] > token_budget and len(chosen) >= min_sentences:
+            # Too big for what is left; smaller sentences may still fit
+            continue
+        chosen.append(best)
+        used += sizes[best]
+        if similarity is not None:
+            np.maximum(redundancy, similarity[best], out=redundancy)
+
+    chosen.sort()
+    text = "। ".join(sentences[i] for i in chosen) + "।"
+    return SentenceSelection(text, len(chosen), len(sentences), tokens_before, estimate_tokens(text))
@@ -0,0 +1,119 @@
+"""Coalesce identical in-flight requests into one call.
+
+When many sessions ask for the same thing at once (a class pasting the same
+passage), only the first caller for a key runs the work; everyone who
+arrives while it is in flight waits for that result instead of issuing
+their own. Keys are forgotten as soon as the call finishes, so this is not a
+cache: later callers go through the response cache as usual.
+
+Everything runs on the shared backend event loop (see
+``src.api.backends``), which is what makes one ``SingleFlight`` instance
+process-wide without locks.
+"""
+
+import asyncio
+
+from src.utils.metrics import incr
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time and shares its outcome"""
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._streams = {}
+
+    def in_flight(self):
+        return len(self._calls) + len(self._streams)
+
+    async def do(self, key, factory):
+        """Await ``factory()`` for the first caller of ``key``; later callers share its result.
+
+        The call runs as its own task, so a caller that gives up (a closed
+        browser tab) does not cancel it for the others. Exceptions are
+        shared like results.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            incr("mcq_singleflight_total", kind=self.name, result="leader")
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            incr("mcq_singleflight_total", kind=self.name, result="coalesced")
+        return await asyncio.shield(task)
+
+    async def stream(self, key, factory):
+        """Iterate ``factory()`` (an async iterator) once per key and replay it to every caller.
+
+        Callers that join late first get the pieces already received, then
+        follow along live. When the last caller stops iterating (a closed
+        stream or a cancelled request) the shared call is cancelled, so
+        nobody keeps paying for an answer no one reads.
+        """
+        shared = self._streams.get(key)
+        if shared is None:
+            incr("mcq_singleflight_total", kind=self.name, result="leader")
+            shared = self._streams[key] = _SharedStream()
+            shared.task = asyncio.ensure_future(shared.pump(factory()))
+            shared.task.add_done_callback(lambda _: self._forget(key, shared))
+        else:
+            incr("mcq_singleflight_total", kind=self.name, result="coalesced")
+        shared.followers += 1
+        try:
+            async for piece in shared.follow():
+                yield piece
+        finally:
+            shared.followers -= 1
+            if not shared.followers and not shared.task.done():
+                # Later callers must start a fresh call, not join one being cancelled
+                self._forget(key, shared)
+                shared.task.cancel()
+
+    def _forget(self, key, shared):
+        if self._streams.get(key) is shared:
+            del self._streams[key]
+
+
+class _SharedStream:
+    __slots__ = ("pieces", "done", "error", "changed", "task", "followers")
+
+    def __init__(self):
+        self.pieces = []
+        self.done = False
+        self.error = None
+        self.changed = asyncio.Condition()
+        self.followers = 0
+
+    async def pump(self, agen):
+        try:
+            async for piece in agen:
+                async with self.changed:
+                    self.pieces.append(piece)
+                    self.changed.notify_all()
+        except Exception as e:
+            self.error = e
+        except asyncio.CancelledError as e:
+            # A follower still waiting must not take a cut-off answer for a complete one
+            self.error = e
+            raise
+        finally:
+            async with self.changed:
+                self.done = True
+                self.changed.notify_all()
+
+    async def follow(self):
+        position = 0
+        while True:
+            async with self.changed:
+                await self.changed.wait_for(lambda: position < len(self.pieces) or self.done)
+                pieces = self.pieces[position:]
+                done = self.done
+            for piece in pieces:
+                yield piece
+            position += len(pieces)
+            if done and position == len(self.pieces):
+                if self.error is not None:
+                    raise self.error
+                return
@@ -0,0 +1,231 @@
+"""Corpus term statistics in a compact, memory-mapped file.
+
+Build once from a corpus::
+
+    python -m src.utils.term_index build corpus/ -o data/term_index.bin
+    python -m src.utils.term_index build articles.jsonl news.txt -o data/term_index.bin --min-df 3
+    python -m src.utils.term_index info data/term_index.bin
+
+Sources are read like ``python -m src.batch`` input (a directory of ``.txt``
+files or a JSONL file of ``{"id", "text"}`` records, one document each); any
+other file is read as one document per non-empty line. Documents go through
+``clean_text`` and ``Tokenizer.content_terms`` (stopwords dropped,
+postpositions split off), so "नेपालको" and "नेपालमा" are both counted as
+"नेपाल", the same terms salience ranking looks up. Indexes in an older
+format are ignored until rebuilt.
+
+The file holds a small header and three arrays ordered by term hash: the
+64-bit hashes (their position is the term ID), term frequencies and document
+frequencies. Nothing is parsed at load time; ``TermIndex`` maps the arrays
+read-only, so every process shares the page-cached file and opening it costs
+microseconds. Terms themselves are not stored, which keeps the file at 20
+bytes per term.
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import struct
+import sys
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+
+import numpy as np
+
+from src.utils.metrics import log_event
+from src.utils.text_processing import TERM_INDEX_PATH, clean_text, get_tokenizer
+
+# Bumped whenever the terms counted change; version 1 held surface forms
+MAGIC = b"MCQTIDX2"
+# magic, document count, term count, token count
+HEADER = struct.Struct("<8sQQQ")
+BATCH_DOCUMENTS = 1000
+# Batches queued per worker process; bounds the corpus text held in memory
+BATCHES_IN_FLIGHT = 2
+
+
+def term_hash(term):
+    """Stable 64-bit hash of a term (Python's ``hash`` differs between processes)"""
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def hash_terms(terms):
+    return np.fromiter((term_hash(t) for t in terms), dtype=np.uint64, count=len(terms))
+
+
+class TermIndex:
+    """Read-only view of a term-statistics file"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            magic, self.n_docs, n_terms, self.total_tokens = HEADER.unpack(f.read(HEADER.size))
+        if magic[:7] == MAGIC[:7] and magic != MAGIC:
+            raise ValueError(f"{path} is an older term index format; rebuild it")
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a term index")
+        self.path = path
+        offset = HEADER.size
+        self.hashes = _map(path, np.uint64, offset, n_terms)
+        offset += 8 * n_terms
+        self.term_freq = _map(path, np.uint64, offset, n_terms)
+        offset += 8 * n_terms
+        self.doc_freq = _map(path, np.uint32, offset, n_terms)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def term_ids(self, terms):
+        """Term IDs for ``terms`` as an int64 array, -1 where a term is unknown"""
+        hashes = hash_terms(terms)
+        positions = np.searchsorted(self.hashes, hashes)
+        found = positions < len(self.hashes)
+        found[found] = self.hashes[positions[found]] == hashes[found]
+        return np.where(found, positions, -1)
+
+    def doc_frequencies(self, terms):
+        """Number of corpus documents containing each term (0 if unknown)"""
+        ids = self.term_ids(terms)
+        known = ids >= 0
+        counts = np.zeros(len(ids), dtype=np.float64)
+        counts[known] = self.doc_freq[ids[known]]
+        return counts
+
+    def idf(self, terms):
+        """Smoothed IDF for each term; unknown terms get the maximum value"""
+        return np.log((1 + self.n_docs) / (1 + self.doc_frequencies(terms))) + 1.0
+
+
+def _map(path, dtype, offset, count):
+    if not count:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=np.dtype(dtype).newbyteorder("<"), mode="r", offset=offset, shape=(count,))
+
+
+@lru_cache(maxsize=None)
+def get_term_index(path=TERM_INDEX_PATH):
+    """Return the shared index at ``path`` (``MCQ_TERM_INDEX``), or None if none was built"""
+    if not os.path.exists(path):
+        return None
+    try:
+        return TermIndex(path)
+    except ValueError as e:
+        # An outdated index would skew ranking; generation works without one
+        log_event("term_index_unusable", level=logging.WARNING, sample=1, path=path, error=str(e))
+        return None
+
+
+def iter_documents(sources):
+    """Yield document texts from corpus files and directories"""
+    from src.batch import iter_passages
+
+    for source in sources:
+        if os.path.isdir(source) or source.endswith(".jsonl"):
+            for _, text in iter_passages(source):
+                yield text
+            continue
+        with open(source, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield line
+
+
+def count_terms(documents):
+    """Term and document frequencies of a batch of raw documents (runs in the process pool)"""
+    tokenizer = get_tokenizer()
+    term_freq = Counter()
+    doc_freq = Counter()
+    for text in documents:
+        terms = [term for _, terms in tokenizer.sentence_terms(clean_text(text)) for term in terms]
+        term_freq.update(terms)
+        doc_freq.update(set(terms))
+    return term_freq, doc_freq, len(documents)
+
+
+def _batches(documents, size):
+    batch = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _map_bounded(pool, fn, items, limit):
+    """``pool.map`` that reads ``items`` lazily, with at most ``limit`` calls pending.
+
+    Results come back in completion order.
+    """
+    pending = set()
+    for item in items:
+        pending.add(pool.submit(fn, item))
+        # Wait before reading the next item, so it is not held in memory either
+        if len(pending) >= limit:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    for future in pending:
+        yield future.result()
+
+
+def build_index(sources, output_path, min_df=2, workers=None):
+    """Count terms over ``sources`` and write the index; returns (documents, terms kept)"""
+    term_freq = Counter()
+    doc_freq = Counter()
+    n_docs = 0
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        batches = _batches(iter_documents(sources), BATCH_DOCUMENTS)
+        for batch_tf, batch_df, count in _map_bounded(pool, count_terms, batches, BATCHES_IN_FLIGHT * workers):
+            term_freq.update(batch_tf)
+            doc_freq.update(batch_df)
+            n_docs += count
+
+    # Rare terms (mostly typos) are dropped; lookups treat them as unseen
+    terms = [t for t, df in doc_freq.items() if df >= min_df]
+    hashes = hash_terms(terms)
+    order = np.argsort(hashes, kind="stable")
+    hashes = hashes[order]
+    if len(hashes) > 1 and (hashes[1:] == hashes[:-1]).any():
+        raise ValueError("two corpus terms share a 64-bit hash")
+    tf = np.fromiter((term_freq[t] for t in terms), dtype=np.uint64, count=len(terms))[order]
+    df = np.fromiter((doc_freq[t] for t in terms), dtype=np.uint32, count=len(terms))[order]
+
+    # Workers may have the old file mapped; replace it atomically
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, n_docs, len(terms), sum(term_freq.values())))
+        for array in (hashes, tf, df):
+            f.write(array.astype(array.dtype.newbyteorder("<")).tobytes())
+    os.replace(tmp_path, output_path)
+    get_term_index.cache_clear()
+    return n_docs, len(terms)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect the corpus term-statistics index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="count terms over a corpus")
+    build.add_argument("sources", nargs="+", help=".txt files (one document per line), JSONL files or directories")
+    build.add_argument("-o", "--output", default=TERM_INDEX_PATH)
+    build.add_argument("--min-df", type=int, default=2, help="drop terms in fewer documents")
+    build.add_argument("--workers", type=int, default=None, help="tokenizer processes")
+    info = commands.add_parser("info", help="print index statistics")
+    info.add_argument("path", nargs="?", default=TERM_INDEX_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        n_docs, n_terms = build_index(args.sources, args.output, args.min_df, args.workers)
+        size = os.path.getsize(args.output)
+        print(f"{n_docs} documents, {n_terms} terms, {size / 1e6:.1f} MB -> {args.output}", file=sys.stderr)
+    else:
+        index = TermIndex(args.path)
+        print(f"{index.n_docs} documents, {len(index)} terms, {index.total_tokens} tokens")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
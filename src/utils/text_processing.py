@@ -1,20 +1,65 @@
+import os
 import re
-import nltk
+from functools import lru_cache
 
-# Download Nepali sentence tokenizer models or use basic split by punctuation
-# For simplicity, we'll split on punctuation marks for Nepali
+from src.utils.normalizer import normalize_text
+from src.utils.tokenizer import Tokenizer
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data")
+STOPWORDS_PATH = os.path.join(DATA_DIR, "nepali_stopwords.txt")
+# Built with ``python -m src.utils.term_index build``; optional
+TERM_INDEX_PATH = os.getenv("MCQ_TERM_INDEX", os.path.join(DATA_DIR, "term_index.bin"))
+
+# Split on punctuation marks for Nepali
 def split_sentences(text):
     # Simple split on '।' or newline or dot (for Nepali sentences)
-    sentences = re.split(r'[।\n]', text)
+    sentences = re.split(r'[।॥\n]', text)
     return [s.strip() for s in sentences if s.strip()]
 
+# Trimmed from word ends when tokenizing
+TOKEN_PUNCTUATION = ",?.-|।॥"
+
+def tokenize(text):
+    """Split cleaned text into words without surrounding punctuation"""
+    return [w for w in (w.strip(TOKEN_PUNCTUATION) for w in text.split()) if w]
+
 def remove_stopwords(text, stopwords):
-    words = text.split()
-    filtered = [w for w in words if w not in stopwords]
-    return " ".join(filtered)
+    # Attached postpositions ("नेपालको") are split off and dropped with the stopwords
+    return " ".join(get_tokenizer(frozenset(stopwords)).content_terms(text))
+
+@lru_cache(maxsize=None)
+def load_stopwords(path=STOPWORDS_PATH):
+    """Read a one-word-per-line stopword file once per process"""
+    with open(path, "r", encoding="utf-8") as f:
+        return frozenset(line.strip() for line in f if line.strip())
+
+@lru_cache(maxsize=8)
+def get_tokenizer(stopwords=None):
+    """Shared ``Tokenizer`` for a frozenset of stopwords (the bundled list by default)"""
+    return Tokenizer(load_stopwords() if stopwords is None else stopwords)
 
 def clean_text(text):
-    # Remove special characters except Nepali alphabets, digits, spaces, punctuation
-    text = re.sub(r'[^ऀ-ःक-हअ-औऔ-०-९\s।,.]', '', text)
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
+    # NFC, zero-width/nukta folding, digit and danda canonicalization, then
+    # drop everything but Devanagari, digits, spaces and basic punctuation
+    return normalize_text(text)
+
+def estimate_tokens(text):
+    # Rough model token count; Devanagari averages about three characters per token
+    return max(1, len(text) // 3)
+
+def chunk_sentences(sentences, max_tokens):
+    """Greedily pack sentences into chunks of at most ``max_tokens`` estimated tokens"""
+    chunks = []
+    current = []
+    current_tokens = 0
+    for sentence in sentences:
+        tokens = estimate_tokens(sentence)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("। ".join(current) + "।")
+            current = []
+            current_tokens = 0
+        current.append(sentence)
+        current_tokens += tokens
+    if current:
+        chunks.append("। ".join(current) + "।")
+    return chunks
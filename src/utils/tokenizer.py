@@ -0,0 +1,179 @@
+"""Streaming Devanagari tokenizer with sentence spans and postposition splitting.
+
+Text is read once, from a string or any iterable of string chunks (an open
+file, ``iter_normalized`` output), so inputs larger than memory are handled
+a buffer at a time. Sentences end at danda (।), double danda (॥) or a
+newline, as in ``split_sentences``; tokens are words, numbers in either
+digit set and punctuation, all with character offsets into the whole input.
+
+Nepali writes postpositions attached to the word ("नेपालको",
+"काठमाडौंमा"), so a word list never matches them against the stopword set.
+Words ending in a postposition that the stopword list contains are split
+into the stem and the postposition (stacked ones too: "घरभित्रको" gives
+"घर", "भित्र", "को"). The split is a heuristic on word endings; stems must
+keep at least ``MIN_STEM_CHARS`` characters.
+"""
+
+import re
+from collections import namedtuple
+
+# Candidate endings; only those also in the stopword list are split off
+POSTPOSITIONS = (
+    "को", "का", "की", "के", "मा", "ले", "लाई", "बाट", "देखि", "सम्म", "सँग", "संग",
+    "भन्दा", "तिर", "नै", "भित्र", "माथि", "मुनि", "पछि", "अघि", "बारे",
+)
+MIN_STEM_CHARS = 2
+VIRAMA = "्"
+NUKTA = "़"
+
+WORD_CHARS = "ऀ-ॣॱ-ॿA-Za-z‌‍"
+DIGITS = "0-9०-९"
+SENTENCE_ENDS = "।॥\n"
+SENTENCE_RE = re.compile(f"[^{SENTENCE_ENDS}]+")
+TOKEN_RE = re.compile(rf"([{WORD_CHARS}]+)|([{DIGITS}]+(?:[.,:][{DIGITS}]+)*)|([{SENTENCE_ENDS}])|(\S)")
+# Trimmed from word ends, matching ``text_processing.tokenize``
+PUNCTUATION = ",?.-|।॥"
+
+WORD = "word"
+SUFFIX = "suffix"
+NUMBER = "number"
+PUNCT = "punct"
+
+Sentence = namedtuple("Sentence", "text start end")
+Token = namedtuple("Token", "text start end kind sentence")
+
+# A buffer with no sentence end is cut at its last space once it grows past this
+MAX_CARRY_CHARS = 1 << 20
+# Word splits remembered per tokenizer; cleared when full
+MEMO_SIZE = 200_000
+
+
+def iter_file_chunks(path, chunk_size=1 << 20):
+    """Yield a UTF-8 text file in chunks of about ``chunk_size`` characters"""
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _segments(source):
+    """``(offset, text)`` pieces of ``source`` that end on a sentence boundary (or the input end)"""
+    if isinstance(source, str):
+        yield 0, source
+        return
+    offset = 0
+    carry = ""
+    for chunk in source:
+        buffer = carry + chunk
+        cut = max(buffer.rfind(end) for end in SENTENCE_ENDS) + 1
+        if not cut and len(buffer) > MAX_CARRY_CHARS:
+            cut = buffer.rfind(" ") + 1
+        if cut:
+            yield offset, buffer[:cut]
+            offset += cut
+        carry = buffer[cut:]
+    if carry:
+        yield offset, carry
+
+
+class _Terms(dict):
+    """Surface word -> content term ("" for stopwords), filled in on first sight"""
+
+    def __init__(self, tokenizer):
+        super().__init__()
+        self.tokenizer = tokenizer
+
+    def __missing__(self, word):
+        if len(self) >= MEMO_SIZE:
+            self.clear()
+        stem = self.tokenizer.split_word(word.strip(PUNCTUATION))[0]
+        term = self[word] = "" if stem in self.tokenizer.stopwords else stem
+        return term
+
+
+class Tokenizer:
+    """Sentence and token iterators over one stopword list; reusable across inputs"""
+
+    def __init__(self, stopwords=frozenset(), postpositions=POSTPOSITIONS):
+        self.stopwords = frozenset(stopwords)
+        # Longest first, so an ending is never cut short by a shorter one it ends with
+        self.suffixes = tuple(sorted((p for p in postpositions if p in self.stopwords), key=len, reverse=True))
+        self._splits = {}
+        self._terms = _Terms(self)
+
+    def split_word(self, word):
+        """``word`` as a tuple of its stem followed by the postpositions attached to it"""
+        pieces = self._splits.get(word)
+        if pieces is not None:
+            return pieces
+        stem = word
+        suffixes = []
+        # endswith with a tuple rules out most words in one call
+        while stem.endswith(self.suffixes) and stem not in self.stopwords:
+            for suffix in self.suffixes:
+                rest = len(stem) - len(suffix)
+                if rest >= MIN_STEM_CHARS and stem.endswith(suffix) and stem[rest - 1] not in (VIRAMA, NUKTA):
+                    suffixes.append(suffix)
+                    stem = stem[:rest]
+                    break
+            else:
+                break
+        pieces = (stem, *reversed(suffixes))
+        if len(self._splits) >= MEMO_SIZE:
+            self._splits.clear()
+        self._splits[word] = pieces
+        return pieces
+
+    def iter_sentences(self, source):
+        """Yield ``Sentence(text, start, end)`` for every non-empty sentence, stripped"""
+        for offset, segment in _segments(source):
+            for match in SENTENCE_RE.finditer(segment):
+                text = match.group()
+                stripped = text.strip()
+                if stripped:
+                    start = offset + match.start() + (len(text) - len(text.lstrip()))
+                    yield Sentence(stripped, start, start + len(stripped))
+
+    def iter_tokens(self, source):
+        """Yield a ``Token`` per word, postposition, number and punctuation mark, with offsets.
+
+        ``sentence`` is the index of the sentence the token belongs to, as
+        counted by ``iter_sentences``.
+        """
+        sentence = 0
+        in_sentence = False
+        for offset, segment in _segments(source):
+            for match in TOKEN_RE.finditer(segment):
+                word, number, end, mark = match.groups()
+                start = offset + match.start()
+                if word is not None:
+                    pieces = self.split_word(word)
+                    stem = pieces[0]
+                    yield Token(stem, start, start + len(stem), WORD, sentence)
+                    start += len(stem)
+                    for suffix in pieces[1:]:
+                        yield Token(suffix, start, start + len(suffix), SUFFIX, sentence)
+                        start += len(suffix)
+                    in_sentence = True
+                elif number is not None:
+                    yield Token(number, start, start + len(number), NUMBER, sentence)
+                    in_sentence = True
+                elif end is not None:
+                    if in_sentence:
+                        sentence += 1
+                        in_sentence = False
+                else:
+                    yield Token(mark, start, start + 1, PUNCT, sentence)
+                    in_sentence = True
+
+    def content_terms(self, sentence):
+        """Words of one sentence without stopwords or attached postpositions"""
+        # Mostly dictionary hits in C; unseen words go through ``_Terms.__missing__``
+        return [term for term in map(self._terms.__getitem__, sentence.split()) if term]
+
+    def sentence_terms(self, source):
+        """Yield ``(Sentence, content terms)`` for every sentence; the fast path for term statistics"""
+        for sentence in self.iter_sentences(source):
+            yield sentence, self.content_terms(sentence.text)
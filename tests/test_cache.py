@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src import mcq_generator
+from src.utils import cache as cache_module
+from src.api.fake_backend import FakeBackend
+from src.api.openai_client import PROMPT_VERSION
+from src.utils.cache import ResponseCache, make_cache_key
+
+PASSAGE = "नेपालको राजधानी काठमाडौं हो। सगरमाथा विश्वको सबैभन्दा अग्लो हिमाल हो।"
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(mcq_generator, "_response_cache", cache)
+    return cache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=clock.time))
+    return clock
+
+
+def test_key_depends_on_every_request_field():
+    key = make_cache_key(PASSAGE, 5, "gemini", "2")
+    assert key == make_cache_key(PASSAGE, 5, "gemini", "2")
+    assert len({
+        key,
+        make_cache_key(PASSAGE, 5, "gemini", "3"),
+        make_cache_key(PASSAGE, 6, "gemini", "2"),
+        make_cache_key(PASSAGE, 5, "gemini-pro", "2"),
+        make_cache_key(PASSAGE + " ", 5, "gemini", "2"),
+    }) == 5
+
+
+def test_prompt_version_bump_misses_old_answers(cache, monkeypatch):
+    backend = FakeBackend()
+    _, key, _ = mcq_generator._cached(PASSAGE, 3, True, backend)
+    cache.set(key, "answer for the old prompt")
+    monkeypatch.setattr(mcq_generator, "PROMPT_VERSION", PROMPT_VERSION + ".1")
+    _, new_key, cached = mcq_generator._cached(PASSAGE, 3, True, backend)
+    assert new_key != key and cached is None
+
+
+def test_entries_expire(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), ttl=60)
+    cache.set("default", "a")
+    cache.set("short", "b", ttl=10)
+    cache.set("forever", "c", ttl=0)
+    clock.now += 30
+    assert (cache.get("default"), cache.get("short"), cache.get("forever")) == ("a", None, "c")
+    clock.now += 31
+    assert (cache.get("default"), cache.get("forever")) == (None, "c")
+    assert cache.stats()["entries"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), max_bytes=30)
+    for key in "abc":
+        cache.set(key, "x" * 10)
+        clock.now += 1
+    assert cache.get("a") == "x" * 10
+    clock.now += 1
+    cache.set("d", "x" * 10)
+    # "b" was used least recently once "a" was read again
+    assert [cache.get(key) is not None for key in "abcd"] == [True, False, True, True]
+    assert cache.stats()["bytes"] <= 30
+    cache.set("huge", "x" * 31)
+    assert cache.get("huge") is None
+
+
+def test_hit_and_miss_counters(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    cache.set("k", "v")
+    cache.get("k")
+    cache.get("missing")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+    cache.clear()
+    assert cache.stats()["entries"] == cache.stats()["hits"] == 0
+
+
+def test_key_depends_on_the_output_format():
+    text = make_cache_key(PASSAGE, 5, "gemini", PROMPT_VERSION, "text")
+    assert text == make_cache_key(PASSAGE, 5, "gemini", PROMPT_VERSION)
+    assert text != make_cache_key(PASSAGE, 5, "gemini", PROMPT_VERSION, "json")
+
+
+def test_text_and_json_answers_are_cached_apart(cache):
+    text_backend = FakeBackend(output_format="text")
+    json_backend = FakeBackend(output_format="json")
+    _, key, _ = mcq_generator._cached(PASSAGE, 3, True, text_backend)
+    cache.set(key, "cached text answer")
+    assert mcq_generator._cached(PASSAGE, 3, True, text_backend)[2] == "cached text answer"
+    assert mcq_generator._cached(PASSAGE, 3, True, json_backend)[2] is None
@@ -0,0 +1,104 @@
+import csv
+import io
+import re
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from src.exporters import export, format_for, iter_mcq_text, shuffle_options
+from src.mcq_parser import MCQ, OPTION_LETTERS, format_mcqs
+
+MCQS = [
+    MCQ("नेपालको राजधानी कुन हो?", ["पोखरा", "काठमाडौं", "धरान", "बुटवल"], 1, (0, 0), grounding=0.9),
+    MCQ("फेवा ताल कहाँ छ? {ब्रेस} = ~", ["पोखरा", "चितवन", "जनकपुर", "इलाम"], 0, (0, 0)),
+    MCQ("सगरमाथा <कति> अग्लो?", ["८८४८ मि.", "७००० मि.", "६००० मि.", "५००० मि."], 3, (0, 0), local=True),
+    MCQ("उत्तर नभएको प्रश्न?", ["क१", "ख१", "ग१", "घ१"], None, (0, 0)),
+]
+
+
+def exported(fmt, mcqs=MCQS, seed=None):
+    out = io.StringIO(newline="")
+    count = export(mcqs, out, fmt, seed=seed)
+    return count, out.getvalue()
+
+
+def correct_texts(mcqs):
+    return [mcq.options[mcq.correct_index] for mcq in mcqs if mcq.correct_index is not None]
+
+
+def test_shuffle_keeps_the_answer_and_every_field():
+    shuffled = list(shuffle_options(MCQS, seed=7))
+    assert correct_texts(shuffled) == correct_texts(MCQS)
+    for before, after in zip(MCQS, shuffled):
+        assert sorted(after.options) == sorted(before.options)
+        assert (after.question, after.span, after.local, after.grounding) == (
+            before.question, before.span, before.local, before.grounding
+        )
+    assert shuffled[-1].correct_index is None
+
+
+def test_shuffle_depends_only_on_seed_and_question():
+    first = [mcq.options for mcq in shuffle_options(MCQS, seed=7)]
+    assert first == [mcq.options for mcq in shuffle_options(MCQS, seed=7)]
+    # Position in the set does not matter
+    assert [mcq.options for mcq in shuffle_options(MCQS[::-1], seed=7)] == first[::-1]
+    assert any(
+        a != b for a, b in zip(first, (mcq.options for mcq in shuffle_options(MCQS, seed=8)))
+    )
+
+
+@pytest.mark.parametrize("seed", [None, 1, 2, 3])
+def test_csv_answer_letter_round_trips(seed):
+    count, text = exported("csv", seed=seed)
+    rows = list(csv.DictReader(io.StringIO(text, newline="")))
+    assert count == len(rows) == 4
+    for row in rows[:3]:
+        assert row[row["answer"]] == row["answer_text"]
+    assert [row["answer_text"] for row in rows[:3]] == correct_texts(MCQS)
+    assert rows[3]["answer"] == ""
+
+
+@pytest.mark.parametrize("seed", [None, 1, 2])
+def test_moodle_xml_marks_the_correct_option(seed):
+    count, text = exported("moodle", seed=seed)
+    questions = ET.fromstring(text).findall("question")
+    # The unanswerable question is skipped
+    assert count == len(questions) == 3
+    right = [a.find("text").text for q in questions for a in q.findall("answer") if a.get("fraction") == "100"]
+    assert right == correct_texts(MCQS)
+    assert questions[2].find("questiontext/text").text == "सगरमाथा <कति> अग्लो?"
+
+
+@pytest.mark.parametrize("seed", [None, 5])
+def test_gift_marks_the_correct_option_and_escapes(seed):
+    count, text = exported("gift", seed=seed)
+    assert count == 3
+    right = [line[1:] for line in text.splitlines() if line.startswith("=")]
+    assert right == correct_texts(MCQS)
+    assert r"\{ब्रेस\} \= \~" in text
+
+
+@pytest.mark.parametrize("seed", [None, 4])
+def test_html_answer_key_matches_the_options(seed):
+    count, text = exported("html", seed=seed)
+    assert count == 4
+    shuffled = list(shuffle_options(MCQS, seed)) if seed is not None else MCQS
+    keys = re.findall(r"<tr><td>[^<]+</td><td>([^<]+)</td></tr>", text)
+    assert keys == [OPTION_LETTERS[m.correct_index] if m.correct_index is not None else "-" for m in shuffled]
+    assert "&lt;कति&gt;" in text
+
+
+def test_text_source_round_trip(tmp_path):
+    path = tmp_path / "mcqs.txt"
+    path.write_text(format_mcqs(MCQS), encoding="utf-8")
+    parsed = list(iter_mcq_text(str(path)))
+    assert [(m.question, m.options, m.correct_index, m.local) for m in parsed] == [
+        (m.question, m.options, m.correct_index, m.local) for m in MCQS
+    ]
+
+
+def test_formats():
+    assert format_for("exam.xml") == "moodle"
+    assert format_for("exam.pdf") is None
+    with pytest.raises(ValueError):
+        exported("pdf")
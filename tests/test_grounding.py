@@ -0,0 +1,78 @@
+import pytest
+
+from src import mcq_generator
+from src.mcq_parser import MCQ
+from src.utils.grounding import DEFAULT_THRESHOLD, GroundingVerifier, is_flagged
+
+PASSAGE = (
+    "नेपालको राजधानी काठमाडौं हो। "
+    "सगरमाथा विश्वको सबैभन्दा अग्लो हिमाल हो। "
+    "पोखरामा फेवा ताल छ। "
+    "चितवन राष्ट्रिय निकुञ्जमा एकसिङ्गे गैंडा पाइन्छ।"
+)
+
+
+def mcq(question, options, correct_index, local=False):
+    return MCQ(question, options, correct_index, (0, 0), local=local)
+
+
+SUPPORTED = mcq("नेपालको राजधानी कुन हो?", ["पोखरा", "काठमाडौं", "धरान", "बुटवल"], 1)
+# The answer is in the passage, but far from anything the question asks about
+UNSUPPORTED = mcq("नेपालको राजधानी कुन हो?", ["चितवन", "धरान", "बुटवल", "इलाम"], 0)
+# The answer does not occur in the passage at all
+INVENTED = mcq("फेवा ताल कहाँ छ?", ["जनकपुर", "धरान", "बुटवल", "इलाम"], 0)
+
+
+@pytest.fixture(scope="module")
+def verifier():
+    return GroundingVerifier(PASSAGE)
+
+
+def test_supported_answer_scores_high(verifier):
+    grounding = verifier.score(SUPPORTED)
+    assert grounding.score >= DEFAULT_THRESHOLD
+    assert grounding.answer == grounding.question == grounding.support == 1.0
+
+
+def test_answer_far_from_the_question_is_flagged(verifier):
+    grounding = verifier.score(UNSUPPORTED)
+    assert grounding.answer == 1.0 and grounding.support == 0.0
+    assert grounding.score < DEFAULT_THRESHOLD
+
+
+def test_invented_answer_is_flagged(verifier):
+    grounding = verifier.score(INVENTED)
+    assert grounding.answer == 0.0 and grounding.score < DEFAULT_THRESHOLD
+
+
+def test_multi_word_answer(verifier):
+    question = mcq("एकसिङ्गे गैंडा कहाँ पाइन्छ?", ["चितवन राष्ट्रिय निकुञ्ज", "फेवा ताल", "धरान", "इलाम"], 0)
+    assert verifier.score(question).score >= DEFAULT_THRESHOLD
+
+
+def test_unanswered_question_scores_zero(verifier):
+    assert verifier.score(mcq("के हो?", ["क", "ख"], None)).score == 0.0
+
+
+def test_verify_sets_scores_and_splits(verifier):
+    questions = [mcq(q.question, q.options, q.correct_index) for q in (SUPPORTED, UNSUPPORTED, INVENTED)]
+    kept, flagged = verifier.verify(questions)
+    assert kept == questions[:1] and flagged == questions[1:]
+    assert [is_flagged(q) for q in questions] == [False, True, True]
+    assert not is_flagged(mcq("के हो?", ["क", "ख"], 0))
+
+
+@pytest.mark.parametrize("mode, kept", [("flag", 4), ("drop", 2)])
+def test_generator_flags_or_drops_model_questions_only(monkeypatch, mode, kept):
+    monkeypatch.setattr(mcq_generator, "GROUNDING", mode)
+    local = mcq("फेवा ताल कहाँ छ?", ["जनकपुर", "धरान", "बुटवल", "इलाम"], 0, local=True)
+    questions = [mcq(q.question, q.options, q.correct_index) for q in (SUPPORTED, UNSUPPORTED, INVENTED)] + [local]
+    result = mcq_generator.ground_mcq_list(questions, mcq_generator.new_verifier(PASSAGE))
+    assert len(result) == kept
+    # Local questions come from the passage itself and are never scored
+    assert local in result and local.grounding is None
+
+
+def test_off_checks_nothing(monkeypatch):
+    monkeypatch.setattr(mcq_generator, "GROUNDING", "off")
+    assert mcq_generator.new_verifier(PASSAGE) is None
@@ -0,0 +1,170 @@
+import threading
+import time
+
+import pytest
+
+from src import jobs
+from src.jobs import CANCELLED, DONE, QUEUED, RUNNING, JobQueue, JobWorkers
+from src.mcq_parser import MCQ
+
+PASSAGE = (
+    "नेपालको राजधानी काठमाडौं हो। काठमाडौं उपत्यकामा तीन प्राचीन सहर छन्। "
+    "सगरमाथा विश्वको सबैभन्दा अग्लो हिमाल हो। फेवा ताल पोखरामा पर्छ।"
+)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    yield queue
+    queue.close()
+
+
+def mcq(n):
+    return MCQ(f"प्रश्न {n}?", ["क", "ख", "ग", "घ"], 0, (0, 0))
+
+
+def column(queue, job_id, name):
+    with queue._lock:
+        return queue._conn.execute(f"SELECT {name} FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+
+
+def test_claim_takes_the_highest_priority_then_the_oldest(queue):
+    low = queue.submit("क", priority=0)
+    first = queue.submit("ख", priority=5)
+    second = queue.submit("ग", priority=5)
+    assert [queue.claim("test")[0] for _ in range(3)] == [first, second, low]
+    assert queue.claim("test") is None
+    assert queue.get(low).status == RUNNING
+
+
+def test_questions_are_appended_until_the_job_is_cancelled(queue):
+    job_id = queue.submit("क", max_questions=3)
+    queue.claim("test")
+    assert queue.add_mcq(job_id, mcq(1))
+    assert queue.cancel(job_id)
+    assert not queue.add_mcq(job_id, mcq(2))
+    job = queue.get(job_id)
+    assert job.status == CANCELLED and job.finished
+    assert [m.question for m in job.mcqs] == ["प्रश्न 1?"]
+    assert not queue.cancel(job_id)
+
+
+def test_stale_job_is_requeued_without_its_partial_questions(queue):
+    job_id = queue.submit("क")
+    queue.claim("dead")
+    queue.add_mcq(job_id, mcq(1))
+    with queue._lock:
+        queue._conn.execute("UPDATE jobs SET heartbeat = ?", (time.time() - jobs.STALE_SECONDS - 1,))
+
+    assert queue.claim("alive")[0] == job_id
+    job = queue.get(job_id)
+    assert job.status == RUNNING
+    assert job.mcqs == []
+    assert column(queue, job_id, "owner") == "alive"
+
+
+def test_live_job_is_not_requeued(queue):
+    job_id = queue.submit("क")
+    queue.claim("first")
+    assert queue.claim("second") is None
+    assert column(queue, job_id, "owner") == "first"
+
+
+def test_heartbeat_only_touches_running_jobs(queue):
+    job_id = queue.submit("क")
+    queue.heartbeat(job_id)
+    assert column(queue, job_id, "heartbeat") is None
+    queue.claim("test")
+    with queue._lock:
+        queue._conn.execute("UPDATE jobs SET heartbeat = 0")
+    queue.heartbeat(job_id)
+    assert column(queue, job_id, "heartbeat") > time.time() - 60
+
+
+def test_heartbeat_thread_beats_until_stopped(queue, monkeypatch):
+    monkeypatch.setattr(jobs, "HEARTBEAT_SECONDS", 0.01)
+    job_id = queue.submit("क")
+    queue.claim("test")
+    beats = []
+    monkeypatch.setattr(queue, "heartbeat", beats.append)
+    stop = threading.Event()
+    thread = threading.Thread(target=JobWorkers(queue)._heartbeat, args=(job_id, stop))
+    thread.start()
+    time.sleep(0.1)
+    stop.set()
+    thread.join(1)
+    assert not thread.is_alive()
+    assert beats and set(beats) == {job_id}
+
+
+def test_finish_does_not_overwrite_a_cancel(queue):
+    job_id = queue.submit("क")
+    queue.claim("test")
+    queue.cancel(job_id)
+    queue.finish(job_id)
+    assert queue.get(job_id).status == CANCELLED
+
+
+def test_prune_keeps_unfinished_jobs(queue):
+    done = queue.submit("क")
+    waiting = queue.submit("ख")
+    queue.claim("test")
+    queue.finish(done)
+    assert queue.prune(max_age=-1) == 1
+    assert queue.get(done) is None
+    assert queue.get(waiting).status == QUEUED
+
+
+def test_workers_run_a_fast_job_to_completion(queue):
+    workers = JobWorkers(queue, workers=1).start()
+    try:
+        job_id = queue.submit(PASSAGE, max_questions=2, fast=True)
+        deadline = time.time() + 30
+        while not queue.get(job_id).finished and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        workers.stop(timeout=5)
+    job = queue.get(job_id)
+    assert job.status == DONE, job.error
+    assert 1 <= len(job.mcqs) <= 2
+    assert job.started_at is not None and job.finished_at >= job.started_at
+
+
+def test_watch_wakes_on_each_change_until_the_job_finishes(queue):
+    job_id = queue.submit("क", max_questions=2)
+
+    def work():
+        time.sleep(0.05)
+        queue.claim("test")
+        for n in (1, 2):
+            time.sleep(0.05)
+            queue.add_mcq(job_id, mcq(n))
+        time.sleep(0.05)
+        queue.finish(job_id)
+
+    thread = threading.Thread(target=work)
+    started = time.perf_counter()
+    thread.start()
+    # A long poll: only the in-process notifications can make this quick
+    states = [(job.status, len(job.mcqs)) for job in queue.watch(job_id, poll=30)]
+    thread.join()
+    assert time.perf_counter() - started < 5
+    assert states == [(QUEUED, 0), (RUNNING, 0), (RUNNING, 1), (RUNNING, 2), (DONE, 2)]
+
+
+def test_watch_sees_other_processes_by_polling(queue):
+    other = JobQueue(queue.path)
+    try:
+        job_id = queue.submit("क")
+        watched = queue.watch(job_id, poll=0.01)
+        assert next(watched).status == QUEUED
+        other.claim("elsewhere")
+        other.cancel(job_id)
+        assert [job.status for job in watched] == [CANCELLED]
+    finally:
+        other.close()
+
+
+def test_watch_unknown_job(queue):
+    assert list(queue.watch("missing", poll=0.01)) == []
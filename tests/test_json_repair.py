@@ -0,0 +1,96 @@
+import asyncio
+import json
+import re
+
+import pytest
+
+from src.api.exceptions import APIError, EmptyResponseError
+from src.api.fake_backend import FakeResponse
+from src.api.openai_client import AsyncGeminiClient
+from src.mcq_parser import parse_mcqs
+
+PASSAGE = "नेपालको राजधानी काठमाडौं हो। सगरमाथा विश्वको सबैभन्दा अग्लो हिमाल हो।"
+COUNT_RE = re.compile(r"(\d+) वटा MCQs")
+
+
+def item(n, valid=True):
+    options = [f"विकल्प{n}-{i}" for i in range(4)]
+    return {"question": f"प्रश्न नम्बर {n}?", "options": options if valid else options[:2], "answer": "क"}
+
+
+class ScriptedModel:
+    """Answers each call with the next scripted reply and records the prompts"""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.prompts = []
+
+    async def generate_content_async(self, prompt, stream=False, generation_config=None):
+        self.prompts.append(prompt)
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        if stream:
+            return self._stream(reply)
+        return FakeResponse(reply)
+
+    async def _stream(self, text):
+        for i in range(0, len(text), 7):
+            yield FakeResponse(text[i:i + 7])
+
+
+def client(model, repair_rounds=1):
+    return AsyncGeminiClient(model, max_retries=0, base_delay=0, requests_per_minute=None,
+                             tokens_per_minute=None, output_format="json", repair_rounds=repair_rounds)
+
+
+def requested(prompt):
+    return int(COUNT_RE.search(prompt).group(1))
+
+
+def test_repair_requests_exactly_the_shortfall():
+    first = [item(1), item(2, valid=False), item(3)]
+    model = ScriptedModel(json.dumps(first, ensure_ascii=False), json.dumps([item(4), item(5), item(6)]))
+    mcqs = parse_mcqs(asyncio.run(client(model).generate(PASSAGE, 4)))
+
+    assert [requested(prompt) for prompt in model.prompts] == [4, 2]
+    # The valid questions are listed so the repair does not repeat them
+    assert "प्रश्न नम्बर 1?" in model.prompts[1] and "प्रश्न नम्बर 3?" in model.prompts[1]
+    # Extra items in the repair answer are cut to the shortfall
+    assert [mcq.question for mcq in mcqs] == ["प्रश्न नम्बर 1?", "प्रश्न नम्बर 3?", "प्रश्न नम्बर 4?", "प्रश्न नम्बर 5?"]
+
+
+def test_no_repair_when_every_item_is_valid():
+    model = ScriptedModel(json.dumps([item(1), item(2)], ensure_ascii=False))
+    assert len(parse_mcqs(asyncio.run(client(model).generate(PASSAGE, 2)))) == 2
+    assert len(model.prompts) == 1
+
+
+def test_repair_rounds_stop_when_filled():
+    model = ScriptedModel(json.dumps([item(1)]), json.dumps([item(2)]), json.dumps([item(3)]))
+    mcqs = parse_mcqs(asyncio.run(client(model, repair_rounds=3).generate(PASSAGE, 3)))
+    assert [requested(prompt) for prompt in model.prompts] == [3, 2, 1]
+    assert len(mcqs) == 3
+
+
+def test_failed_repair_keeps_the_valid_questions():
+    model = ScriptedModel(json.dumps([item(1), item(2, valid=False)]), APIError("bad request", status=400))
+    mcqs = parse_mcqs(asyncio.run(client(model).generate(PASSAGE, 2)))
+    assert [mcq.question for mcq in mcqs] == ["प्रश्न नम्बर 1?"]
+
+
+def test_nothing_valid_and_nothing_repaired_raises():
+    model = ScriptedModel(json.dumps([item(1, valid=False)]), "[]")
+    with pytest.raises(EmptyResponseError):
+        asyncio.run(client(model).generate(PASSAGE, 1))
+
+
+def test_stream_repairs_after_the_answer_ends():
+    model = ScriptedModel(json.dumps([item(1), item(2, valid=False)]), json.dumps([item(3)]))
+
+    async def collect():
+        return "".join([piece async for piece in client(model).stream(PASSAGE, 2)])
+
+    mcqs = parse_mcqs(asyncio.run(collect()))
+    assert [mcq.question for mcq in mcqs] == ["प्रश्न नम्बर 1?", "प्रश्न नम्बर 3?"]
+    assert requested(model.prompts[1]) == 1
@@ -0,0 +1,53 @@
+"""``KeyedModel`` reaches into google-generativeai internals; these tests pin that down.
+
+They make no network calls: the generated client's RPC method is replaced,
+so what is checked is which client the SDK calls and which key it carries.
+"""
+
+import asyncio
+
+import pytest
+from google.ai import generativelanguage as glm
+from google.ai.generativelanguage_v1beta.services.generative_service.async_client import (
+    GenerativeServiceAsyncClient,
+)
+from google.generativeai import client as sdk_client
+
+from src.api.openai_client import KeyedModel
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    async def generate_content(self, request=None, **kwargs):
+        calls.append(self)
+        return glm.GenerateContentResponse(
+            candidates=[{"content": {"parts": [{"text": "उत्तर"}]}, "finish_reason": 1}]
+        )
+
+    monkeypatch.setattr(GenerativeServiceAsyncClient, "generate_content", generate_content)
+    return calls
+
+
+def api_key_of(client):
+    return client._client._transport._credentials.token
+
+
+def test_each_model_calls_with_its_own_key(calls):
+    async def main():
+        first = KeyedModel("key-A", "gemini-test")
+        second = KeyedModel("key-B", "gemini-test")
+        answers = [(await model.generate_content_async("प्रश्न")).text for model in (first, second, first)]
+        return answers
+
+    assert asyncio.run(main()) == ["उत्तर"] * 3
+    assert [api_key_of(client) for client in calls] == ["key-A", "key-B", "key-A"]
+    # One client per model, built once
+    assert calls[0] is calls[2] and calls[0] is not calls[1]
+
+
+def test_process_wide_client_is_left_alone(calls):
+    before = dict(sdk_client._client_manager.clients)
+    asyncio.run(KeyedModel("key-A", "gemini-test").generate_content_async("प्रश्न"))
+    assert sdk_client._client_manager.clients == before
@@ -0,0 +1,39 @@
+from src.local_generator import LocalMCQGenerator
+from src.utils.text_processing import get_tokenizer, load_stopwords
+
+PASSAGE = (
+    "नेपालको राजधानी काठमाडौं उपत्यकामा पर्छ। "
+    "नेपालमा धेरै अग्ला हिमालहरू छन् र पर्यटक आउँछन्। "
+    "पोखरामा फेवा ताल र सुन्दर पहाडहरू छन्। "
+    "चितवनमा राष्ट्रिय निकुञ्ज र गैंडा पाइन्छन्। "
+    "जनकपुरमा जानकी मन्दिर प्रसिद्ध छ।"
+)
+
+
+def stem_of(words):
+    split_word = get_tokenizer(load_stopwords()).split_word
+    return {word: split_word(word)[0] for word in words}
+
+
+def test_inflections_of_the_answer_are_not_distractors():
+    # The closest words by length and frequency are inflections of the answer
+    vocabulary = ["नेपालमा", "नेपालले", "नेपालका", "पोखरामा", "पोखराको", "चितवनमा", "जनकपुरमा", "नेपालको"]
+    frequency = dict.fromkeys(vocabulary, 2)
+    options = LocalMCQGenerator()._options("नेपालको", set(), vocabulary, frequency, stem_of(vocabulary))
+    stems = list(stem_of(options).values())
+    assert "नेपालको" in options
+    assert stems.count("नेपाल") == 1 and len(set(stems)) == 4
+
+
+def test_too_few_stems_gives_no_question():
+    vocabulary = ["नेपालमा", "नेपालले", "पोखरामा", "पोखराको", "नेपालको"]
+    frequency = dict.fromkeys(vocabulary, 2)
+    assert LocalMCQGenerator()._options("नेपालको", set(), vocabulary, frequency, stem_of(vocabulary)) is None
+
+
+def test_generated_options_have_distinct_stems():
+    mcqs = LocalMCQGenerator().generate(PASSAGE, max_questions=5)
+    assert mcqs
+    for mcq in mcqs:
+        assert len(set(stem_of(mcq.options).values())) == len(mcq.options), mcq.options
+        assert mcq.local and mcq.correct_index is not None
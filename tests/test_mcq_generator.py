@@ -0,0 +1,53 @@
+import pytest
+
+from src.api.exceptions import APIError
+from src.mcq_generator import merge_mcq_texts
+from src.mcq_parser import LOCAL_NOTE, MCQ, format_mcqs, parse_mcqs
+
+
+def mcq(question, local=False):
+    return MCQ(question, [f"{question}-{i}" for i in range(4)], 1, (0, 0), local)
+
+
+MODEL_TEXT = format_mcqs([mcq("काठमाडौं कहाँ छ?"), mcq("सगरमाथा कति अग्लो छ?")])
+LOCAL_TEXT = format_mcqs([mcq("फेवा ताल ____ छ।", local=True)])
+
+
+def test_local_set_is_headed_by_the_note():
+    assert LOCAL_TEXT.startswith(LOCAL_NOTE)
+    assert [m.local for m in parse_mcqs(LOCAL_TEXT)] == [True]
+
+
+def test_merge_keeps_the_local_flag_per_question():
+    merged = merge_mcq_texts([MODEL_TEXT, LOCAL_TEXT])
+    assert [m.local for m in parse_mcqs(merged)] == [False, False, True]
+    # The note marks the local question only, not the whole set
+    assert not merged.startswith(LOCAL_NOTE)
+
+
+def test_merge_with_local_chunk_first():
+    merged = merge_mcq_texts([LOCAL_TEXT, MODEL_TEXT])
+    mcqs = parse_mcqs(merged)
+    assert [m.local for m in mcqs] == [True, False, False]
+    assert [m.correct_index for m in mcqs] == [1, 1, 1]
+
+
+def test_mixed_set_round_trips_through_text():
+    mcqs = [mcq("एक?"), mcq("दुई ____।", local=True), mcq("तीन?"), mcq("चार ____।", local=True)]
+    parsed = parse_mcqs(format_mcqs(mcqs))
+    assert [(m.question, m.local, m.correct_index) for m in parsed] == [
+        (m.question, m.local, m.correct_index) for m in mcqs
+    ]
+
+
+def test_merge_skips_failed_chunks_unless_all_failed():
+    error = APIError("down")
+    assert len(parse_mcqs(merge_mcq_texts([error, MODEL_TEXT]))) == 2
+    with pytest.raises(APIError):
+        merge_mcq_texts([error, error])
+
+
+def test_merge_renumbers_and_drops_duplicates():
+    merged = merge_mcq_texts([MODEL_TEXT, MODEL_TEXT])
+    assert [m.question for m in parse_mcqs(merged)] == ["काठमाडौं कहाँ छ?", "सगरमाथा कति अग्लो छ?"]
+    assert merged.startswith("१.") and "\n\n२." in merged
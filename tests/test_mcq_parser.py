@@ -0,0 +1,120 @@
+import pytest
+
+from src.mcq_parser import MCQ, MCQParser, format_mcqs, parse_mcqs
+
+PLAIN = """१. नेपालको राजधानी कुन हो?
+क) पोखरा
+ख) काठमाडौं
+ग) धरान
+घ) बुटवल
+सही उत्तर: ख
+
+२. फेवा ताल कहाँ छ?
+क) पोखरा
+ख) चितवन
+ग) जनकपुर
+घ) इलाम
+सही उत्तर: क"""
+
+OPTIONS = ["पोखरा", "काठमाडौं", "धरान", "बुटवल"]
+
+
+def summary(mcqs):
+    return [(mcq.question, mcq.options, mcq.correct_index) for mcq in mcqs]
+
+
+def test_plain_format():
+    assert summary(parse_mcqs(PLAIN)) == [
+        ("नेपालको राजधानी कुन हो?", OPTIONS, 1),
+        ("फेवा ताल कहाँ छ?", ["पोखरा", "चितवन", "जनकपुर", "इलाम"], 0),
+    ]
+
+
+@pytest.mark.parametrize("text", [
+    "**१. राजधानी कुन हो?**\n**क)** पोखरा\n**ख)** काठमाडौं\n**ग)** धरान\n**घ)** बुटवल\n**सही उत्तर:** ख",
+    "**१.** राजधानी कुन हो?\nक) पोखरा\nख) काठमाडौं\nग) धरान\nघ) बुटवल\nसही उत्तर: **ख**",
+    "## १. राजधानी कुन हो?\n(क) पोखरा\n(ख) काठमाडौं\n(ग) धरान\n(घ) बुटवल\n**सही उत्तर: (ख)**",
+    "> १. राजधानी कुन हो?\n> क. पोखरा\n> ख. काठमाडौं\n> ग. धरान\n> घ. बुटवल\n> सही उत्तर: ख) काठमाडौं",
+])
+def test_markdown_and_bold_variants(text):
+    assert summary(parse_mcqs(text)) == [("राजधानी कुन हो?", OPTIONS, 1)]
+
+
+@pytest.mark.parametrize("line", ["प्रश्न १: राजधानी कुन हो?", "प्रश्न 1. राजधानी कुन हो?", "प्रश्न१) राजधानी कुन हो?", "1) राजधानी कुन हो?"])
+def test_question_prefixes(line):
+    text = line + "\nक) पोखरा\nख) काठमाडौं\nग) धरान\nघ) बुटवल\nसही उत्तर: ख"
+    assert summary(parse_mcqs(text)) == [("राजधानी कुन हो?", OPTIONS, 1)]
+
+
+def test_unnumbered_questions():
+    text = "राजधानी कुन हो?\nक) पोखरा\nख) काठमाडौं\nसही उत्तर: ख\nताल कहाँ छ?\nक) पोखरा\nख) चितवन\nसही उत्तर: क"
+    assert [mcq.question for mcq in parse_mcqs(text)] == ["राजधानी कुन हो?", "ताल कहाँ छ?"]
+
+
+def test_fewer_than_four_options():
+    text = "१. राजधानी?\nक) पोखरा\nख) काठमाडौं\nसही उत्तर: ख\n\n२. एक मात्र?\nक) पोखरा\nसही उत्तर: क"
+    # Two options still make a question; one does not
+    assert summary(parse_mcqs(text)) == [("राजधानी?", ["पोखरा", "काठमाडौं"], 1)]
+
+
+def test_missing_answer_line():
+    text = "१. राजधानी?\nक) पोखरा\nख) काठमाडौं\nग) धरान\n\n२. ताल?\nक) पोखरा\nख) चितवन\nसही उत्तर: क"
+    mcqs = parse_mcqs(text)
+    assert [mcq.correct_index for mcq in mcqs] == [None, 0]
+    assert mcqs[0].options == ["पोखरा", "काठमाडौं", "धरान"]
+
+
+def test_answer_given_as_option_text():
+    text = "१. राजधानी?\nक) पोखरा\nख) काठमाडौं\nसही उत्तर: काठमाडौं"
+    assert parse_mcqs(text)[0].correct_index == 1
+
+
+def test_answer_letter_not_among_the_options():
+    text = "१. राजधानी?\nक) पोखरा\nख) काठमाडौं\nसही उत्तर: घ"
+    assert parse_mcqs(text)[0].correct_index is None
+
+
+def test_multiline_question_text():
+    text = "१. तलको अनुच्छेद पढ्नुहोस्।\nराजधानी कुन हो?\nक) पोखरा\nख) काठमाडौं\nसही उत्तर: ख"
+    assert parse_mcqs(text)[0].question == "तलको अनुच्छेद पढ्नुहोस्। राजधानी कुन हो?"
+
+
+def test_spans_point_into_the_source():
+    mcqs = parse_mcqs(PLAIN)
+    start, end = mcqs[1].span
+    assert PLAIN[start:end].startswith("२. फेवा ताल") and PLAIN[start:end].endswith("सही उत्तर: क")
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 13])
+def test_streaming_feed_split_mid_line(size):
+    parser = MCQParser()
+    mcqs = []
+    for i in range(0, len(PLAIN), size):
+        mcqs.extend(parser.feed(PLAIN[i:i + size]))
+    mcqs.extend(parser.close())
+    assert summary(mcqs) == summary(parse_mcqs(PLAIN))
+    assert [mcq.span for mcq in mcqs] == [mcq.span for mcq in parse_mcqs(PLAIN)]
+
+
+def test_feed_returns_each_question_once_its_answer_arrives():
+    parser = MCQParser()
+    first_answer = PLAIN.index("सही उत्तर: ख")
+    assert parser.feed(PLAIN[:first_answer]) == []
+    # The answer line is complete only at its newline
+    assert parser.feed("सही उत्तर: ख") == []
+    [mcq] = parser.feed("\n")
+    assert mcq.correct_index == 1
+    rest = PLAIN[first_answer + len("सही उत्तर: ख\n"):]
+    assert parser.feed(rest) == []
+    assert [m.question for m in parser.close()] == ["फेवा ताल कहाँ छ?"]
+
+
+def test_format_round_trip():
+    mcqs = parse_mcqs(PLAIN)
+    assert summary(parse_mcqs(format_mcqs(mcqs))) == summary(mcqs)
+    assert format_mcqs(mcqs[1:], start=2).startswith("२. फेवा ताल")
+
+
+def test_dict_round_trip():
+    mcq = MCQ("राजधानी?", OPTIONS, 1, (3, 9), local=True, grounding=0.75)
+    assert MCQ.from_dict(mcq.to_dict()) == mcq
@@ -0,0 +1,92 @@
+import json
+
+from src.mcq_schema import JSONMCQParser, parse_json_mcqs, validate_item
+
+ITEMS = [
+    {"question": "नेपालको राजधानी कुन हो?", "options": ["पोखरा", "काठमाडौं", "धरान", "बुटवल"], "answer": "ख"},
+    # Quotes, an escaped backslash and braces inside strings must not end the item
+    {"question": 'उद्धरण "सगरमाथा" {कोष्ठक} [सूची] \\ को अर्थ?', "options": ["क१", "ख१", "ग१", "घ१"], "answer": "क"},
+    {"question": "फेवा ताल कहाँ छ?", "options": ["पोखरा", "चितवन", "जनकपुर", "इलाम"], "answer": "क"},
+]
+
+
+def feed_in_pieces(text, size):
+    parser = JSONMCQParser()
+    mcqs = []
+    for i in range(0, len(text), size):
+        mcqs.extend(parser.feed(text[i:i + size]))
+    mcqs.extend(parser.close())
+    return mcqs, parser.invalid
+
+
+def test_whole_array():
+    mcqs, invalid = parse_json_mcqs(json.dumps(ITEMS, ensure_ascii=False))
+    assert invalid == 0
+    assert [mcq.question for mcq in mcqs] == [item["question"] for item in ITEMS]
+    assert [mcq.correct_index for mcq in mcqs] == [1, 0, 0]
+
+
+def test_every_split_point_inside_strings_and_escapes():
+    text = json.dumps(ITEMS, ensure_ascii=False)
+    expected = [item["question"] for item in ITEMS]
+    for size in (1, 2, 3, 7):
+        mcqs, invalid = feed_in_pieces(text, size)
+        assert [mcq.question for mcq in mcqs] == expected, size
+        assert invalid == 0
+
+
+def test_escaped_quote_split_from_its_backslash():
+    text = json.dumps([{**ITEMS[0], "question": 'क "ख" ग?'}], ensure_ascii=False)
+    cut = text.index('\\"') + 1
+    parser = JSONMCQParser()
+    assert parser.feed(text[:cut]) == []
+    [mcq] = parser.feed(text[cut:])
+    assert mcq.question == 'क "ख" ग?'
+
+
+def test_questions_are_returned_as_soon_as_their_item_closes():
+    text = json.dumps(ITEMS, ensure_ascii=False)
+    parser = JSONMCQParser()
+    first_end = text.index("}") + 1
+    assert len(parser.feed(text[:first_end])) == 1
+    assert len(parser.feed(text[first_end:])) == 2
+
+
+def test_truncated_last_item_counts_as_invalid():
+    text = json.dumps(ITEMS, ensure_ascii=False)
+    cut = text.rindex("{") + 20
+    mcqs, invalid = feed_in_pieces(text[:cut], 5)
+    assert len(mcqs) == 2
+    assert invalid == 1
+
+
+def test_wrapper_object_and_code_fence():
+    text = "```json\n" + json.dumps({"questions": ITEMS}, ensure_ascii=False) + "\n```"
+    mcqs, invalid = parse_json_mcqs(text)
+    assert len(mcqs) == 3
+    assert invalid == 0
+
+
+def test_invalid_items_are_skipped_and_counted():
+    items = [ITEMS[0], {**ITEMS[2], "options": ITEMS[2]["options"][:3]}, {"question": "?"}, ITEMS[2]]
+    mcqs, invalid = parse_json_mcqs(json.dumps(items, ensure_ascii=False))
+    assert [mcq.question for mcq in mcqs] == [ITEMS[0]["question"], ITEMS[2]["question"]]
+    assert invalid == 2
+
+
+def test_malformed_item_does_not_stop_the_rest():
+    text = json.dumps(ITEMS[:1], ensure_ascii=False)[:-1] + ', {"question": ,}, ' + json.dumps(ITEMS[2], ensure_ascii=False) + "]"
+    mcqs, invalid = parse_json_mcqs(text)
+    assert len(mcqs) == 2
+    assert invalid == 1
+
+
+def test_validate_item_repairs_answers_and_labels():
+    base = {"question": "प्रश्न?", "options": ["क) एक", "ख) दुई", "ग) तीन", "घ) चार"]}
+    assert validate_item({**base, "answer": "ग"}).options == ["एक", "दुई", "तीन", "चार"]
+    assert validate_item({**base, "answer": "C"}).correct_index == 2
+    assert validate_item({**base, "answer": 3}).correct_index == 3
+    assert validate_item({**base, "answer": "दुई"}).correct_index == 1
+    assert validate_item({**base, "answer": "पाँच"}) is None
+    assert validate_item({**base, "answer": True}) is None
+    assert validate_item({**base, "options": ["एक", "एक", "दुई", "तीन"], "answer": "क"}) is None
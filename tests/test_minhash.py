@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from src.mcq_parser import MCQ
+from src.utils.minhash import (
+    MinHasher,
+    MinHashLSH,
+    band_keys,
+    choose_bands,
+    dedupe_mcqs,
+    signature_from_bytes,
+    similarity,
+)
+
+OPTIONS = ["पोखरा", "काठमाडौं", "धरान", "बुटवल"]
+SENTENCE = "नेपालको राजधानी काठमाडौं उपत्यकाको बीचमा रहेको ऐतिहासिक सहर हो"
+
+
+def mcq(question, correct_index=1):
+    return MCQ(question, OPTIONS, correct_index, (0, 0))
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+
+def test_signature_estimates_jaccard():
+    hasher = MinHasher(num_perm=256)
+    a = SENTENCE
+    b = SENTENCE.replace("ऐतिहासिक", "पुरानो")
+    estimate = similarity(hasher.signature(a), hasher.signature(b))
+    assert estimate == pytest.approx(jaccard(hasher.shingles(a), hasher.shingles(b)), abs=0.1)
+
+
+def test_spacing_and_blanks_do_not_matter():
+    hasher = MinHasher()
+    signature = hasher.signature("राजधानी ______ हो")
+    assert np.array_equal(signature, hasher.signature("राजधानी   _ हो"))
+    assert np.array_equal(signature_from_bytes(signature.tobytes()), signature)
+
+
+def test_bands_sit_just_below_the_threshold():
+    for threshold in (0.5, 0.7, 0.9):
+        bands, rows = choose_bands(128, threshold)
+        assert bands * rows == 128
+        assert (1 / bands) ** (1 / rows) <= threshold
+
+
+def test_lsh_finds_near_duplicates_only():
+    lsh = MinHashLSH(0.7)
+    hasher = lsh.hasher
+    lsh.insert("original", hasher.signature(SENTENCE))
+    lsh.insert("other", hasher.signature("सगरमाथा विश्वकै सबैभन्दा अग्लो हिमाल हो र यो नेपालमा पर्छ"))
+    assert lsh.query(hasher.signature(SENTENCE + "।")) == ["original"]
+    assert lsh.query(hasher.signature("फेवा ताल पोखरामा छ र यहाँ धेरै पर्यटक आउँछन्")) == []
+    assert len(band_keys(hasher.signature(SENTENCE), lsh.bands)) == lsh.bands
+
+
+def test_dedup_drops_near_duplicates_and_keeps_order():
+    questions = [
+        mcq("काठमाडौं उपत्यकामा रहेको नेपालको राजधानी कुन हो?"),
+        mcq("सगरमाथा कुन देशमा पर्छ?", 0),
+        mcq("काठमाडौं  उपत्यकामा रहेको नेपालको राजधानी कुन हो ?"),
+        mcq("काठमाडौं उपत्यकामा रहेको नेपालको राजधानी कुन होला?"),
+    ]
+    assert dedupe_mcqs(questions) == questions[:2]
+
+
+def test_same_question_with_another_answer_is_kept():
+    first = mcq("नेपालको सबैभन्दा ठूलो ताल कुन हो?", 0)
+    assert dedupe_mcqs([first, mcq(first.question, 3)]) == [first, mcq(first.question, 3)]
+
+
+def test_threshold_decides_how_close_counts():
+    a = mcq(SENTENCE + "?")
+    b = mcq(SENTENCE.replace("ऐतिहासिक", "पुरानो") + "?")
+    hasher = MinHasher()
+    estimate = similarity(hasher.signature(f"{a.question} {OPTIONS[1]}"), hasher.signature(f"{b.question} {OPTIONS[1]}"))
+    assert 0.3 < estimate < 0.95
+    assert dedupe_mcqs([a, b], threshold=estimate - 0.1) == [a]
+    assert dedupe_mcqs([a, b], threshold=min(1.0, estimate + 0.1)) == [a, b]
@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+from src.utils.normalizer import iter_normalized, normalize_batch, normalize_text
+
+# Characters that exercise every rule: dandas and pipes, zero-width and
+# foreign characters that are deleted, nukta forms, stress signs, digits
+# and whitespace of several kinds
+ALPHABET = [
+    "क", "ा", "न", "\u093c", "\u0929", "\u0958", "\u0928\u093c", "\u0951", "\u0952", "।", "॥", "|",
+    " ", "  ", "\n", "\t", "\r", "\u00a0", "\u200b", "\u200c", "\u200d", "\ufeff",
+    "1", "१", ",", "?", "!", "-", ".", "a", "é",
+]
+
+
+def split(text, rng):
+    cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, rng.randint(0, 8))))
+    return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+
+
+@pytest.mark.parametrize("strip_nukta", [True, False])
+def test_streaming_matches_whole_text(strip_nukta):
+    rng = random.Random(8)
+    for _ in range(3000):
+        text = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 50)))
+        chunks = split(text, rng)
+        assert "".join(iter_normalized(chunks, strip_nukta=strip_nukta)) == normalize_text(
+            text, strip_nukta=strip_nukta
+        ), chunks
+
+
+@pytest.mark.parametrize("chunks", [
+    ["|\u200d \u200d।"],
+    ["|\u200d", " \u200d।"],
+    ["क।\u200b", "\n\t।"],
+    ["क ", "\u093c ख"],
+])
+def test_streaming_regressions(chunks):
+    assert "".join(iter_normalized(chunks)) == normalize_text("".join(chunks))
+
+
+def test_rules():
+    assert normalize_text("क|  ख ।।") == "क। ख॥"
+    assert normalize_text("सन् 2080 ,\u200bक") == "सन् २०८०,क"
+    assert normalize_text("२०८०", digits="arabic") == "2080"
+    assert normalize_text("\u0958") == normalize_text("\u0915\u093c") == "\u0915"
+    # Precomposed and combining nukta forms agree when the nukta is kept
+    assert normalize_text("\u0958", strip_nukta=False) == normalize_text("\u0915\u093c", strip_nukta=False)
+
+
+def test_batch_matches_single():
+    texts = ["क|ख", " ग  घ ", "१ 2"]
+    assert normalize_batch(texts) == [normalize_text(text) for text in texts]
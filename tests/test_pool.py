@@ -0,0 +1,176 @@
+import asyncio
+
+import pytest
+
+from src.api.backends import GenerationBackend
+from src.api.exceptions import (
+    APIError,
+    CircuitOpenError,
+    ConfigurationError,
+    EmptyResponseError,
+    GenerationTimeoutError,
+    RateLimitError,
+)
+from src.api.pool import CLOSED, HALF_OPEN, OPEN, BackendPool, CircuitBreaker, Endpoint, is_endpoint_fault
+
+
+class Scripted(GenerationBackend):
+    """Backend that answers after ``delay`` seconds (or once ``gate`` opens), or raises ``error``"""
+
+    name = "scripted"
+
+    def __init__(self, model_name, delay=0.0, error=None, gate=None):
+        self.model_name = model_name
+        self.delay = delay
+        self.error = error
+        self.gate = gate
+        self.calls = 0
+
+    async def generate(self, text, max_questions=5, timeout=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.error is not None:
+            raise self.error
+        return f"{self.model_name}: {text}"
+
+
+def pool_of(*backends, **options):
+    return BackendPool([Endpoint(backend.model_name, backend) for backend in backends], **options)
+
+
+def test_success_beats_a_rejection_finishing_with_it():
+    async def main():
+        # The first call and its hedge finish together: one rejected, one answered
+        gate = asyncio.Event()
+        rejecting = Scripted("a", error=EmptyResponseError("blocked"), gate=gate)
+        answering = Scripted("b", gate=gate)
+        pool = pool_of(rejecting, answering)
+        pool.hedge_delay = lambda kind: 0.01
+        call = asyncio.ensure_future(pool.generate("पाठ"))
+        while not answering.calls:
+            await asyncio.sleep(0.005)
+        gate.set()
+        return await call
+
+    assert asyncio.run(main()) == "b: पाठ"
+
+
+def test_rejection_alone_is_raised_without_failover():
+    rejecting = Scripted("a", error=EmptyResponseError("blocked"))
+    spare = Scripted("b")
+    pool = pool_of(rejecting, spare, hedge=False)
+    with pytest.raises(EmptyResponseError):
+        asyncio.run(pool.generate("पाठ"))
+    assert spare.calls == 0
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_after_threshold_and_half_opens_after_cooldown():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=10, clock=clock)
+    assert [breaker.record_failure() for _ in range(3)] == [False, False, True]
+    assert breaker.state == OPEN and not breaker.allow()
+
+    clock.now = 9.9
+    assert breaker.state == OPEN
+    clock.now = 10
+    assert breaker.state == HALF_OPEN
+    # Only one probe gets through
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow() and breaker.allow()
+
+
+def test_cancelled_probe_is_given_back():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=1, clock=clock)
+    breaker.record_failure()
+    clock.now = 1
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+@pytest.mark.parametrize("error, fault", [
+    (RateLimitError("slow down"), True),
+    (GenerationTimeoutError("late"), True),
+    (APIError("server", status=503), True),
+    (APIError("bad key", status=403), True),
+    (APIError("no status"), True),
+    (ConnectionError("reset"), True),
+    (APIError("bad request", status=400), False),
+    (EmptyResponseError("blocked"), False),
+    (ConfigurationError("no key"), False),
+])
+def test_fault_classification(error, fault):
+    assert is_endpoint_fault(error) is fault
+
+
+def test_failover_and_breaker_skip_a_failing_endpoint():
+    failing = Scripted("a", error=APIError("server", status=503))
+    healthy = Scripted("b")
+    pool = BackendPool(
+        [Endpoint("a", failing, CircuitBreaker(failure_threshold=2)), Endpoint("b", healthy)], hedge=False
+    )
+    for _ in range(4):
+        assert asyncio.run(pool.generate("पाठ")) == "b: पाठ"
+    # Two failures opened the breaker; later calls no longer try the endpoint
+    assert failing.calls == 2
+    stats = {s["endpoint"]: s for s in pool.stats()}
+    assert stats["a"]["state"] == OPEN and stats["a"]["errors"] == 2
+    assert stats["b"]["errors"] == 0
+
+
+def test_every_endpoint_open_raises_circuit_open():
+    pool = BackendPool([Endpoint("a", Scripted("a", error=RateLimitError("429")), CircuitBreaker(1))])
+    with pytest.raises(RateLimitError):
+        asyncio.run(pool.generate("पाठ"))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(pool.generate("पाठ"))
+
+
+def test_slow_call_is_hedged_and_the_loser_cancelled():
+    slow = Scripted("a", delay=5)
+    fast = Scripted("b", delay=0.01)
+    pool = pool_of(slow, fast)
+    pool.hedge_delay = lambda kind: 0.02
+    assert asyncio.run(pool.generate("पाठ")) == "b: पाठ"
+    stats = {s["endpoint"]: s for s in pool.stats()}
+    assert stats["b"]["hedges"] == stats["b"]["hedge_wins"] == 1
+    assert stats["a"]["in_flight"] == 0 and stats["a"]["errors"] == 0
+
+
+def test_hedges_are_capped_by_ratio():
+    pool = pool_of(Scripted("a", delay=0.03), Scripted("b", delay=0.03), hedge_ratio=0.1)
+    pool.hedge_delay = lambda kind: 0.001
+
+    async def main():
+        for _ in range(20):
+            await pool.generate("पाठ")
+
+    asyncio.run(main())
+    # One free hedge plus a tenth of the calls
+    assert 1 <= pool._hedges <= 0.1 * 20 + 1
+
+
+def test_stream_fails_over_before_the_first_piece():
+    pool = pool_of(Scripted("a", error=RateLimitError("429")), Scripted("b"), hedge=False)
+
+    async def main():
+        return [piece async for piece in pool.stream("पाठ")]
+
+    assert asyncio.run(main()) == ["b: पाठ"]
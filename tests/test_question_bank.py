@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from src.mcq_parser import MCQ
+from src.question_bank import QuestionBank, fts_query, main
+
+PASSAGE = (
+    "नेपालको राजधानी काठमाडौं हो। काठमाडौं उपत्यकामा तीन ऐतिहासिक सहर छन्। "
+    "सगरमाथा विश्वको सबैभन्दा अग्लो हिमाल हो र यो नेपालमा पर्छ।"
+)
+OTHER = "पोखरामा फेवा ताल छ र त्यहाँ धेरै पर्यटक डुंगा चलाउन आउँछन्।"
+
+
+def mcq(question, options, correct_index=0, local=False):
+    return MCQ(question, options, correct_index, (0, 0), local=local)
+
+
+QUESTIONS = [
+    mcq("नेपालको राजधानी कुन हो?", ["काठमाडौं", "पोखरा", "धरान", "बुटवल"]),
+    mcq("सगरमाथा कुन देशमा पर्छ?", ["नेपाल", "भारत", "चीन", "भुटान"]),
+    mcq("उपत्यकामा कति सहर छन्?", ["तीन", "दुई", "चार", "पाँच"]),
+]
+
+
+@pytest.fixture
+def bank(tmp_path):
+    bank = QuestionBank(str(tmp_path / "bank.sqlite3"))
+    yield bank
+    bank.close()
+
+
+def summary(mcqs):
+    return [(m.question, m.options, m.correct_index) for m in mcqs]
+
+
+def test_add_skips_local_questions_and_repeats(bank):
+    assert bank.add(PASSAGE, [mcq("स्थानीय?", ["क", "ख"], local=True)], "gemini") is None
+    passage_id = bank.add(PASSAGE, QUESTIONS[:2], "gemini")
+    # The same passage again only adds questions it does not have yet
+    assert bank.add(PASSAGE, QUESTIONS, "gemini") == passage_id
+    assert bank.stats() == {"passages": 1, "questions": 3}
+    assert summary(bank.questions_for([passage_id])) == summary(QUESTIONS)
+
+
+def test_search_matches_devanagari_words_in_questions_and_options(bank):
+    bank.add(PASSAGE, QUESTIONS, "gemini")
+    bank.add(OTHER, [mcq("फेवा ताल कहाँ छ?", ["पोखरा", "चितवन"])], "gemini")
+    assert [m.question for m in bank.search("सगरमाथा")] == ["सगरमाथा कुन देशमा पर्छ?"]
+    # Words with vowel signs stay whole, and option text is searched too
+    assert sorted(m.question for m in bank.search("पोखरा")) == ["नेपालको राजधानी कुन हो?", "फेवा ताल कहाँ छ?"]
+    assert bank.search("राजधानी काठमाडौं")[0].question == "नेपालको राजधानी कुन हो?"
+    assert bank.search("राजधानी इलाम") == []
+    assert len(bank.search("पोखरा", limit=1)) == 1
+
+
+@pytest.mark.parametrize("text", ['"', 'सगरमाथा OR', "NEAR(", "*", "  "])
+def test_search_input_is_never_query_syntax(bank, text):
+    bank.add(PASSAGE, QUESTIONS, "gemini")
+    assert bank.search(text) == []
+
+
+def test_fts_query_quotes_every_word():
+    assert fts_query('नेपाल "हिमाल"') == '"नेपाल" """हिमाल"""'
+
+
+def test_reuse_needs_a_similar_passage_and_enough_questions(bank):
+    bank.add(PASSAGE, QUESTIONS, "gemini")
+    near = PASSAGE.replace("हो र यो", "हो अनि यो")
+    assert summary(bank.reuse(near, 2)) == summary(QUESTIONS[:2])
+    assert bank.reuse(near, 4) is None
+    assert bank.reuse(OTHER, 1) is None
+
+
+def test_reuse_only_serves_the_requested_model(bank):
+    bank.add(PASSAGE, QUESTIONS, "fake")
+    assert bank.reuse(PASSAGE, 2, model_name="gemini") is None
+    assert bank.similar_passages(PASSAGE, model_name="gemini") == []
+    bank.add(PASSAGE, [mcq("काठमाडौं कुन उपत्यकामा छ?", ["काठमाडौं", "पोखरा"])], "gemini")
+    assert [m.question for m in bank.reuse(PASSAGE, 1, model_name="gemini")] == ["काठमाडौं कुन उपत्यकामा छ?"]
+    assert len(bank.reuse(PASSAGE, 3, model_name="fake")) == 3
+
+
+def test_page_walks_every_question(bank):
+    bank.add(PASSAGE, QUESTIONS, "gemini")
+    first = bank.page(limit=2)
+    rest = bank.page(after_id=first[-1][0], limit=2)
+    assert [m.question for _, m in first + rest] == [m.question for m in QUESTIONS]
+
+
+def test_command_line(bank, capsys):
+    bank.add(PASSAGE, QUESTIONS, "gemini")
+    assert main(["--path", bank.path, "stats"]) == 0
+    assert json.loads(capsys.readouterr().out) == {"passages": 1, "questions": 3}
+    main(["--path", bank.path, "search", "सगरमाथा"])
+    assert "सगरमाथा कुन देशमा पर्छ?" in capsys.readouterr().out
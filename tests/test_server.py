@@ -0,0 +1,108 @@
+import http.client
+import json
+import socket
+
+import pytest
+
+from src.api.backends import create_backend, run_coroutine
+from src.api import server
+from src.api.server import HTTPError, WorkerPool, start_server
+
+PASSAGE = (
+    "नेपालको राजधानी काठमाडौं हो। काठमाडौं उपत्यकामा तीन प्राचीन सहर छन्। "
+    "सगरमाथा विश्वको सबैभन्दा अग्लो हिमाल हो। फेवा ताल पोखरामा पर्छ।"
+)
+
+
+@pytest.fixture(scope="module")
+def port():
+    server, port = start_server(workers=2, queue_size=2, backend=create_backend("local"))
+    yield port
+    run_coroutine(server.stop())
+
+
+def request(port, method, path, payload=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        body = None if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        conn.request(method, path, body, {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        conn.close()
+
+
+def raw(port, data):
+    with socket.create_connection(("127.0.0.1", port), timeout=30) as sock:
+        sock.sendall(data)
+        return sock.makefile("rb").readline()
+
+
+def test_generate(port):
+    status, _, body = request(port, "POST", "/v1/mcqs", {"text": PASSAGE, "max_questions": 2})
+    assert status == 200
+    mcqs = json.loads(body)["mcqs"]
+    assert 1 <= len(mcqs) <= 2
+    assert all(len(mcq["options"]) == 4 for mcq in mcqs)
+
+
+def test_batch_within_the_queue(port):
+    passages = [{"id": "a", "text": PASSAGE}, {"id": "b", "text": PASSAGE}]
+    status, _, body = request(port, "POST", "/v1/mcqs/batch", {"passages": passages, "max_questions": 1})
+    assert status == 200
+    assert [result["id"] for result in json.loads(body)["results"]] == ["a", "b"]
+
+
+def test_batch_larger_than_the_queue_is_413(port):
+    status, _, body = request(port, "POST", "/v1/mcqs/batch", {"passages": [PASSAGE] * 3})
+    assert status == 413
+    assert "at most 2" in json.loads(body)["error"]
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-5"])
+def test_malformed_content_length_is_400(port, length):
+    line = raw(port, b"POST /v1/mcqs HTTP/1.1\r\nHost: x\r\nContent-Length: " + length + b"\r\n\r\n")
+    assert line.startswith(b"HTTP/1.1 400")
+
+
+@pytest.mark.parametrize("payload", [
+    {}, {"text": "  "}, {"text": PASSAGE, "max_questions": 0}, {"text": PASSAGE, "max_questions": True},
+])
+def test_bad_payload_is_400(port, payload):
+    assert request(port, "POST", "/v1/mcqs", payload)[0] == 400
+
+
+@pytest.mark.parametrize("partial", [b"", b"POST /v1/mcqs HTTP/1.1\r\nHost: x\r\n", (
+    b"POST /v1/mcqs HTTP/1.1\r\nHost: x\r\nContent-Length: 100\r\n\r\n{"
+)])
+def test_slow_client_gets_408(port, monkeypatch, partial):
+    monkeypatch.setattr(server, "READ_TIMEOUT_SECONDS", 0.2)
+    with socket.create_connection(("127.0.0.1", port), timeout=30) as sock:
+        sock.sendall(partial)
+        # The request never completes; the server gives up instead of waiting forever
+        assert sock.makefile("rb").readline().startswith(b"HTTP/1.1 408")
+
+
+def test_unknown_path_and_method(port):
+    assert request(port, "GET", "/nope")[0] == 404
+    assert request(port, "GET", "/v1/mcqs")[0] == 405
+
+
+def test_health(port):
+    status, _, body = request(port, "GET", "/healthz")
+    assert status == 200
+    assert json.loads(body)["workers"] == 2
+
+
+def test_full_queue_is_503_with_retry_after():
+    async def fill():
+        pool = WorkerPool(workers=1, queue_size=2)
+        pool.submit_all([object()])
+        with pytest.raises(HTTPError) as full:
+            pool.submit_all([object(), object()])
+        pool.submit_all([object()])
+        return full.value
+
+    error = run_coroutine(fill())
+    assert error.status == 503
+    assert int(error.headers["Retry-After"]) >= 1
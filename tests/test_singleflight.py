@@ -0,0 +1,137 @@
+import asyncio
+import contextlib
+
+import pytest
+
+from src.utils.singleflight import SingleFlight
+
+
+class Source:
+    """Async iterator factory that counts calls and records whether it was stopped early"""
+
+    def __init__(self, pieces, delay=0.01):
+        self.pieces = pieces
+        self.delay = delay
+        self.calls = 0
+        self.cancelled = False
+        self.finished = False
+
+    async def stream(self):
+        self.calls += 1
+        try:
+            for piece in self.pieces:
+                await asyncio.sleep(self.delay)
+                yield piece
+            self.finished = True
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+async def collect(agen):
+    return [piece async for piece in agen]
+
+
+def test_concurrent_callers_share_one_stream():
+    async def main():
+        flights = SingleFlight("test")
+        source = Source(list("abcd"))
+        results = await asyncio.gather(*(collect(flights.stream("k", source.stream)) for _ in range(3)))
+        return source, results, flights.in_flight()
+
+    source, results, in_flight = asyncio.run(main())
+    assert source.calls == 1
+    assert results == [list("abcd")] * 3
+    assert in_flight == 0
+
+
+def test_late_caller_replays_the_pieces_already_received():
+    async def main():
+        flights = SingleFlight("test")
+        source = Source(list("abcd"))
+        first = asyncio.ensure_future(collect(flights.stream("k", source.stream)))
+        await asyncio.sleep(0.025)
+        late = await collect(flights.stream("k", source.stream))
+        return source.calls, await first, late
+
+    calls, first, late = asyncio.run(main())
+    assert calls == 1
+    assert first == late == list("abcd")
+
+
+def test_errors_are_shared():
+    async def failing():
+        yield "a"
+        raise ValueError("boom")
+
+    async def main():
+        flights = SingleFlight("test")
+        return await asyncio.gather(
+            *(collect(flights.stream("k", failing)) for _ in range(2)), return_exceptions=True
+        )
+
+    assert all(isinstance(result, ValueError) for result in asyncio.run(main()))
+
+
+def test_last_follower_leaving_cancels_the_call():
+    async def main():
+        flights = SingleFlight("test")
+        source = Source(list("abcdefgh"))
+        first = flights.stream("k", source.stream)
+        second = flights.stream("k", source.stream)
+        async with contextlib.aclosing(first), contextlib.aclosing(second):
+            assert await first.__anext__() == "a"
+            assert await second.__anext__() == "a"
+        # Closing only one of them would keep the call going for the other
+        await asyncio.sleep(0.05)
+        return source, flights.in_flight()
+
+    source, in_flight = asyncio.run(main())
+    assert source.cancelled and not source.finished
+    assert in_flight == 0
+
+
+def test_one_follower_leaving_keeps_the_call_for_the_rest():
+    async def main():
+        flights = SingleFlight("test")
+        source = Source(list("abcd"))
+        leaver = flights.stream("k", source.stream)
+        stayer = asyncio.ensure_future(collect(flights.stream("k", source.stream)))
+        async with contextlib.aclosing(leaver):
+            await leaver.__anext__()
+        return source, await stayer
+
+    source, stayed = asyncio.run(main())
+    assert stayed == list("abcd")
+    assert source.finished and not source.cancelled
+
+
+def test_cancelled_follower_task_cancels_the_call():
+    async def main():
+        flights = SingleFlight("test")
+        source = Source(list("abcdefgh"))
+        task = asyncio.ensure_future(collect(flights.stream("k", source.stream)))
+        await asyncio.sleep(0.025)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.02)
+        # A new caller starts a fresh call instead of joining the cancelled one
+        return source, await collect(flights.stream("k", source.stream))
+
+    source, again = asyncio.run(main())
+    assert source.calls == 2
+    assert again == list("abcdefgh")
+
+
+def test_remaining_followers_see_a_cancelled_call_as_cancelled():
+    async def main():
+        flights = SingleFlight("test")
+        source = Source(list("abcdefgh"))
+        follower = asyncio.ensure_future(collect(flights.stream("k", source.stream)))
+        await asyncio.sleep(0.025)
+        next(iter(flights._streams.values())).task.cancel()
+        return await asyncio.gather(follower, return_exceptions=True)
+
+    [result] = asyncio.run(main())
+    assert isinstance(result, asyncio.CancelledError)
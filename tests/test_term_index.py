@@ -0,0 +1,74 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.utils import term_index
+from src.utils.term_index import HEADER, MAGIC, TermIndex, _map_bounded, build_index, count_terms, get_term_index
+
+DOCUMENTS = [
+    "नेपालको राजधानी काठमाडौं हो।",
+    "काठमाडौं उपत्यकामा तीन सहर छन्।",
+    "सगरमाथा विश्वको सबैभन्दा अग्लो हिमाल हो।",
+    "पोखरा सुन्दर सहर हो। पोखरामा फेवा ताल छ।",
+] * 5
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    path = tmp_path / "corpus.txt"
+    path.write_text("\n".join(DOCUMENTS) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_build_matches_counting_everything_at_once(corpus, tmp_path, monkeypatch):
+    # Many small batches so the bounded window actually fills
+    monkeypatch.setattr(term_index, "BATCH_DOCUMENTS", 3)
+    output = str(tmp_path / "index.bin")
+    n_docs, n_terms = build_index([corpus], output, min_df=2, workers=2)
+
+    term_freq, doc_freq, count = count_terms(DOCUMENTS)
+    kept = [term for term, df in doc_freq.items() if df >= 2]
+    index = TermIndex(output)
+    assert n_docs == count == index.n_docs == len(DOCUMENTS)
+    assert n_terms == len(index) == len(kept)
+    assert list(index.doc_frequencies(kept)) == [doc_freq[term] for term in kept]
+    assert list(index.doc_frequencies(["अज्ञातशब्द"])) == [0]
+    assert index.idf(["अज्ञातशब्द"])[0] > index.idf(kept[:1])[0]
+
+
+def test_map_bounded_keeps_at_most_limit_pending():
+    consumed = 0
+    finished = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def items():
+        nonlocal consumed, peak
+        for i in range(40):
+            with lock:
+                consumed += 1
+                peak = max(peak, consumed - finished)
+            yield i
+
+    def work(i):
+        nonlocal finished
+        time.sleep(0.002)
+        with lock:
+            finished += 1
+        return i * i
+
+    with ThreadPoolExecutor(4) as pool:
+        results = sorted(_map_bounded(pool, work, items(), 5))
+    assert results == [i * i for i in range(40)]
+    assert peak <= 5
+
+
+def test_older_format_is_rejected(tmp_path):
+    path = tmp_path / "old.bin"
+    path.write_bytes(HEADER.pack(MAGIC[:7] + b"1", 0, 0, 0))
+    with pytest.raises(ValueError, match="older term index format"):
+        TermIndex(str(path))
+    get_term_index.cache_clear()
+    assert get_term_index(str(path)) is None
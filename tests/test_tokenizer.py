@@ -0,0 +1,72 @@
+import pytest
+
+from src.utils import tokenizer as tokenizer_module
+from src.utils.text_processing import load_stopwords, split_sentences
+from src.utils.tokenizer import NUMBER, PUNCT, SUFFIX, WORD, Tokenizer, iter_file_chunks
+
+TEXT = "नेपालको राजधानी काठमाडौं हो। घरभित्रको कोठामा २०८०.५ रुपैयाँ छ!\nसगरमाथा अग्लो छ॥"
+
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    return Tokenizer(load_stopwords())
+
+
+def chunked(text, size):
+    return (text[i:i + size] for i in range(0, len(text), size))
+
+
+def test_postpositions_are_split_off(tokenizer):
+    assert tokenizer.split_word("नेपालको") == ("नेपाल", "को")
+    assert tokenizer.split_word("घरभित्रको") == ("घर", "भित्र", "को")
+    # Stems keep at least two characters, and stopwords stay whole
+    assert tokenizer.split_word("मा") == ("मा",)
+    assert tokenizer.split_word("हिमाल") == ("हिमाल",)
+
+
+def test_only_stopword_postpositions_are_split():
+    assert Tokenizer(stopwords={"को"}).split_word("नेपालमा") == ("नेपालमा",)
+
+
+def test_sentences_match_split_sentences(tokenizer):
+    sentences = list(tokenizer.iter_sentences(TEXT))
+    assert [s.text for s in sentences] == split_sentences(TEXT)
+    assert all(TEXT[s.start:s.end] == s.text for s in sentences)
+
+
+def test_tokens_carry_offsets_kinds_and_sentences(tokenizer):
+    tokens = list(tokenizer.iter_tokens(TEXT))
+    assert all(TEXT[t.start:t.end] == t.text for t in tokens)
+    kinds = {}
+    for t in tokens:
+        kinds.setdefault(t.text, (t.kind, t.sentence))
+    assert kinds["नेपाल"] == (WORD, 0) and kinds["को"] == (SUFFIX, 0)
+    assert kinds["२०८०.५"] == (NUMBER, 1)
+    assert kinds["!"] == (PUNCT, 1)
+    assert kinds["सगरमाथा"] == (WORD, 2)
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1000])
+def test_chunked_input_matches_whole_text(tokenizer, size):
+    assert list(tokenizer.iter_tokens(chunked(TEXT, size))) == list(tokenizer.iter_tokens(TEXT))
+    assert list(tokenizer.iter_sentences(chunked(TEXT, size))) == list(tokenizer.iter_sentences(TEXT))
+
+
+def test_long_input_without_sentence_ends_is_cut_at_spaces(tokenizer, monkeypatch):
+    monkeypatch.setattr(tokenizer_module, "MAX_CARRY_CHARS", 10)
+    text = "नेपाल सुन्दर देश हो " * 20
+    tokens = list(tokenizer.iter_tokens(chunked(text, 7)))
+    assert [t.text for t in tokens] == [t.text for t in tokenizer.iter_tokens(text)]
+    assert all(text[t.start:t.end] == t.text for t in tokens)
+
+
+def test_content_terms_drop_stopwords_and_postpositions(tokenizer):
+    assert tokenizer.content_terms("नेपालको राजधानी काठमाडौं हो।") == ["नेपाल", "राजधानी", "काठमाडौं"]
+    [(sentence, terms)] = tokenizer.sentence_terms("पोखरामा फेवा ताल छ")
+    assert sentence.text == "पोखरामा फेवा ताल छ" and terms == ["पोखरा", "फेवा", "ताल"]
+
+
+def test_file_chunks(tmp_path):
+    path = tmp_path / "text.txt"
+    path.write_text(TEXT, encoding="utf-8")
+    assert "".join(iter_file_chunks(str(path), chunk_size=5)) == TEXT